@@ -38,8 +38,8 @@ class BlockInfo:
     transactions_generator_ref_list: List[uint32]
 
 
-def random_refs() -> List[uint32]:
-    ret = random.sample(transaction_block_heights, DEFAULT_CONSTANTS.MAX_GENERATOR_REF_LIST_SIZE)
+def random_refs(pool: List[int]) -> List[uint32]:
+    ret = random.sample(pool, min(len(pool), DEFAULT_CONSTANTS.MAX_GENERATOR_REF_LIST_SIZE))
     random.shuffle(ret)
     return [uint32(i) for i in ret]
 
@@ -47,10 +47,14 @@ def random_refs() -> List[uint32]:
 REPETITIONS = 100
 
 
-async def main(db_path: Path):
+async def main(db_path: Path, pool_size: int):
 
     random.seed(0x213FB154)
 
+    # blocks tend to reference the same (popular) generators over and over. The
+    # refs are picked from a pool of pool_size transaction blocks
+    pool = random.sample(transaction_block_heights, min(pool_size, len(transaction_block_heights)))
+
     async with aiosqlite.connect(db_path) as connection:
         await connection.execute("pragma journal_mode=wal")
         await connection.execute("pragma synchronous=FULL")
@@ -73,29 +77,34 @@ async def main(db_path: Path):
 
         peak = blockchain.get_peak()
         assert peak is not None
-        timing = 0.0
-        for i in range(REPETITIONS):
-            block = BlockInfo(
-                peak.header_hash,
-                SerializedProgram.from_bytes(bytes.fromhex("80")),
-                random_refs(),
-            )
-
-            start_time = monotonic()
-            gen = await blockchain.get_block_generator(block)
-            one_call = monotonic() - start_time
-            timing += one_call
-            assert gen is not None
-
-        print(f"get_block_generator(): {timing/REPETITIONS:0.3f}s")
+
+        for cached in [False, True]:
+            timing = 0.0
+            for i in range(REPETITIONS):
+                block = BlockInfo(
+                    peak.header_hash,
+                    SerializedProgram.from_bytes(bytes.fromhex("80")),
+                    random_refs(pool),
+                )
+
+                if not cached:
+                    block_store.rollback_generator_cache(-1)
+                start_time = monotonic()
+                gen = await blockchain.get_block_generator(block)
+                one_call = monotonic() - start_time
+                timing += one_call
+                assert gen is not None
+
+            print(f"get_block_generator() {'with' if cached else 'without'} cache: {timing/REPETITIONS:0.3f}s")
 
         blockchain.shut_down()
 
 
 @click.command()
 @click.argument("db-path", type=click.Path())
-def entry_point(db_path: Path):
-    asyncio.run(main(Path(db_path)))
+@click.option("--pool-size", default=512, help="Number of distinct blocks the refs are picked from")
+def entry_point(db_path: Path, pool_size: int):
+    asyncio.run(main(Path(db_path), pool_size))
 
 
 if __name__ == "__main__":
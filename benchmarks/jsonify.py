@@ -1,6 +1,7 @@
 import random
 from time import perf_counter
 
+from chia.util.json_util import dict_to_json_bytes
 from tests.util.test_full_block_utils import get_full_blocks
 
 random.seed(123456789)
@@ -8,15 +9,19 @@ random.seed(123456789)
 
 def main() -> None:
     total_time = 0.0
+    encode_time = 0.0
     counter = 0
     for block in get_full_blocks():
         start = perf_counter()
-        block.to_json_dict()
+        json_dict = block.to_json_dict()
         end = perf_counter()
+        dict_to_json_bytes(json_dict)
         total_time += end - start
+        encode_time += perf_counter() - end
         counter += 1
 
     print(f"total time: {total_time:0.2f}s ({counter} iterations)")
+    print(f"encoding time: {encode_time:0.2f}s")
 
 
 if __name__ == "__main__":
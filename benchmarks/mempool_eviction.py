@@ -0,0 +1,64 @@
+from time import perf_counter
+
+import click
+from blspy import G2Element
+
+from chia.consensus.cost_calculator import NPCResult
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.full_node.mempool_manager import MempoolManager
+from chia.full_node.pending_tx_cache import PendingTxCache
+from chia.types.blockchain_format.program import SerializedProgram
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.mempool_item import MempoolItem
+from chia.types.spend_bundle import SpendBundle
+from chia.util.ints import uint64
+
+
+def make_hash(idx: int) -> bytes32:
+    return bytes32(idx.to_bytes(32, "big"))
+
+
+def benchmark_seen(count: int) -> None:
+    # the seen cache doesn't touch the coin store
+    mempool_manager = MempoolManager(None, DEFAULT_CONSTANTS, single_threaded=True)  # type: ignore[arg-type]
+    hashes = [make_hash(i) for i in range(count)]
+
+    start = perf_counter()
+    for h in hashes:
+        mempool_manager.add_and_maybe_pop_seen(h)
+    end = perf_counter()
+    mempool_manager.shut_down()
+    assert len(mempool_manager.seen_bundle_hashes) == mempool_manager.seen_cache_size
+    print(f"seen_bundle_hashes: {end - start:0.2f}s ({count} hashes, cache size {mempool_manager.seen_cache_size})")
+
+
+def benchmark_pending_tx_cache(count: int, cache_size: int) -> None:
+    cost = uint64(1000)
+    cache = PendingTxCache(cost * cache_size)
+    empty_bundle = SpendBundle([], G2Element())
+    items = [
+        MempoolItem(
+            empty_bundle, uint64(0), NPCResult(None, None, cost), cost, make_hash(i), [], [], SerializedProgram()
+        )
+        for i in range(count)
+    ]
+
+    start = perf_counter()
+    for item in items:
+        cache.add(item)
+    end = perf_counter()
+    assert cache.cost() == cost * cache_size
+    print(f"PendingTxCache: {end - start:0.2f}s ({count} items, cache size {cache_size})")
+
+
+@click.command()
+@click.option("--count", default=1000000, help="number of hashes to flood the caches with")
+@click.option("--cache-size", default=10000, help="number of items that fit in the PendingTxCache")
+def main(count: int, cache_size: int) -> None:
+    benchmark_seen(count)
+    benchmark_pending_tx_cache(count, cache_size)
+
+
+if __name__ == "__main__":
+    # pylint: disable = no-value-for-parameter
+    main()
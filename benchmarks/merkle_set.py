@@ -0,0 +1,40 @@
+import random
+from time import perf_counter
+from typing import List
+
+import click
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.merkle_set import MerkleSet
+
+
+@click.command()
+@click.option("--count", default=10000, help="number of elements in each set")
+@click.option("--iterations", default=10, help="number of sets to build")
+def main(count: int, iterations: int) -> None:
+    rng = random.Random(1337)
+    sets: List[List[bytes32]] = [
+        [bytes32(rng.getrandbits(256).to_bytes(32, "big")) for _ in range(count)] for _ in range(iterations)
+    ]
+
+    start = perf_counter()
+    incremental_roots: List[bytes32] = []
+    for values in sets:
+        merkle_set = MerkleSet()
+        for v in values:
+            merkle_set.add_already_hashed(v)
+        incremental_roots.append(merkle_set.get_root())
+    incremental = perf_counter() - start
+
+    start = perf_counter()
+    bulk_roots: List[bytes32] = [MerkleSet.from_already_hashed(values).get_root() for values in sets]
+    bulk = perf_counter() - start
+
+    assert incremental_roots == bulk_roots
+    print(f"add_already_hashed:  {incremental:0.4f}s ({iterations} sets of {count} elements)")
+    print(f"from_already_hashed: {bulk:0.4f}s ({incremental / bulk:0.1f}x)")
+
+
+if __name__ == "__main__":
+    # pylint: disable = no-value-for-parameter
+    main()
@@ -7,10 +7,20 @@ from time import process_time as clock
 from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple, Type, Union
 
 import click
-from utils import EnumType, get_commit_hash, rand_bytes, rand_full_block, rand_hash
-
+from utils import (
+    EnumType,
+    get_commit_hash,
+    rand_block_record,
+    rand_bytes,
+    rand_full_block,
+    rand_hash,
+    rand_header_block,
+)
+
+from chia.consensus.block_record import BlockRecord
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.full_block import FullBlock
+from chia.types.header_block import HeaderBlock
 from chia.util.ints import uint8, uint64
 from chia.util.streamable import Streamable, streamable
 
@@ -110,6 +120,8 @@ class Data(str, Enum):
     all = "all"
     benchmark = "benchmark"
     full_block = "full_block"
+    header_block = "header_block"
+    block_record = "block_record"
 
 
 # The strings in this Enum are by purpose. See benchmark.utils.EnumType.
@@ -162,6 +174,28 @@ benchmark_parameter: Dict[Data, BenchmarkParameter] = {
             Mode.from_json: ModeParameter(FullBlock.from_json_dict, FullBlock.to_json_dict),
         },
     ),
+    Data.header_block: BenchmarkParameter(
+        HeaderBlock,
+        rand_header_block,
+        {
+            Mode.creation: None,
+            Mode.to_bytes: ModeParameter(to_bytes),
+            Mode.from_bytes: ModeParameter(HeaderBlock.from_bytes, to_bytes),
+            Mode.to_json: ModeParameter(HeaderBlock.to_json_dict),
+            Mode.from_json: ModeParameter(HeaderBlock.from_json_dict, HeaderBlock.to_json_dict),
+        },
+    ),
+    Data.block_record: BenchmarkParameter(
+        BlockRecord,
+        rand_block_record,
+        {
+            Mode.creation: None,
+            Mode.to_bytes: ModeParameter(to_bytes),
+            Mode.from_bytes: ModeParameter(BlockRecord.from_bytes, to_bytes),
+            Mode.to_json: ModeParameter(BlockRecord.to_json_dict),
+            Mode.from_json: ModeParameter(BlockRecord.from_json_dict, BlockRecord.to_json_dict),
+        },
+    ),
 }
 
 
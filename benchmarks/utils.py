@@ -10,6 +10,7 @@ import aiosqlite
 import click
 from blspy import AugSchemeMPL, G1Element, G2Element
 
+from chia.consensus.block_record import BlockRecord
 from chia.consensus.coinbase import create_farmer_coin, create_pool_coin
 from chia.consensus.default_constants import DEFAULT_CONSTANTS
 from chia.types.blockchain_format.classgroup import ClassgroupElement
@@ -22,7 +23,9 @@ from chia.types.blockchain_format.reward_chain_block import RewardChainBlock
 from chia.types.blockchain_format.sized_bytes import bytes32, bytes100
 from chia.types.blockchain_format.vdf import VDFInfo, VDFProof
 from chia.types.full_block import FullBlock
+from chia.types.header_block import HeaderBlock
 from chia.util.db_wrapper import DBWrapper2
+from chia.util.generator_tools import get_block_header
 from chia.util.ints import uint8, uint32, uint64, uint128
 
 # farmer puzzle hash
@@ -173,6 +176,44 @@ def rand_full_block() -> FullBlock:
     return full_block
 
 
+def rand_header_block() -> HeaderBlock:
+    return get_block_header(rand_full_block(), [], [rand_hash() for _ in range(10)])
+
+
+def rand_block_record() -> BlockRecord:
+    farmer_coin, pool_coin = rewards(uint32(0))
+
+    block_record = BlockRecord(
+        rand_hash(),
+        rand_hash(),
+        uint32(2),
+        uint128(3),
+        uint128(4),
+        uint8(5),
+        rand_class_group_element(),
+        rand_class_group_element(),
+        rand_hash(),
+        rand_hash(),
+        uint64(6),
+        rand_hash(),
+        rand_hash(),
+        uint64(7),
+        uint8(8),
+        False,
+        uint32(1),
+        uint64(9),
+        rand_hash(),
+        uint64(10),
+        [farmer_coin, pool_coin],
+        [rand_hash()],
+        [rand_hash()],
+        [rand_hash()],
+        None,
+    )
+
+    return block_record
+
+
 async def setup_db(name: str, db_version: int) -> DBWrapper2:
     db_filename = Path(name)
     try:
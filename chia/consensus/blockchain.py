@@ -296,6 +296,10 @@ class Blockchain(BlockchainInterface):
                 )
                 raise
 
+        if state_change_summary is not None:
+            # generators of the old main chain may have been cached while the reorg wasn't committed yet
+            self.block_store.rollback_generator_cache(state_change_summary.fork_height)
+
         # This is done outside the try-except in case it fails, since we do not want to revert anything if it does
         await self.__height_map.maybe_flush()
 
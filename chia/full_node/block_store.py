@@ -13,14 +13,20 @@ from chia.util.db_wrapper import DBWrapper2
 from chia.util.ints import uint32
 from chia.util.lru_cache import LRUCache
 from chia.util.full_block_utils import generator_from_block
+from chia.util.streamable_view import StreamableView
 
 log = logging.getLogger(__name__)
 
 
+# enough to hold the generators of a block with a full generator ref list
+GENERATOR_CACHE_SIZE = 512
+
+
 class BlockStore:
     block_cache: LRUCache
     db_wrapper: DBWrapper2
     ses_challenge_cache: LRUCache
+    generator_cache: LRUCache
 
     @classmethod
     async def create(cls, db_wrapper: DBWrapper2):
@@ -106,6 +112,12 @@ class BlockStore:
 
         self.block_cache = LRUCache(1000)
         self.ses_challenge_cache = LRUCache(50)
+        # Generators of main chain blocks, by height. Blocks reference the generators of previous blocks, and the
+        # same (popular) ones over and over. Entries above the fork point are removed when rolling back
+        self.generator_cache = LRUCache(GENERATOR_CACHE_SIZE)
+        # bumped whenever the main chain changes, so generators read from the
+        # database concurrently with a reorg are not added to the cache
+        self.generator_cache_generation = 0
         return self
 
     def maybe_from_hex(self, field: Any) -> bytes:
@@ -129,7 +141,13 @@ class BlockStore:
         else:
             return FullBlock.from_bytes(block_bytes)
 
+    def rollback_generator_cache(self, height: int) -> None:
+        self.generator_cache_generation += 1
+        for cached_height in [h for h in self.generator_cache.cache.keys() if h > height]:
+            self.generator_cache.remove(cached_height)
+
     async def rollback(self, height: int) -> None:
+        self.rollback_generator_cache(height)
         if self.db_wrapper.db_version == 2:
             async with self.db_wrapper.write_db() as conn:
                 await conn.execute(
@@ -256,6 +274,9 @@ class BlockStore:
             # this is best effort. When rolling back, we may not have added the
             # block to the cache yet
             pass
+        # the main chain changes made while adding the block are undone too, we
+        # don't know which heights were affected
+        self.rollback_generator_cache(-1)
 
     async def get_full_block(self, header_hash: bytes32) -> Optional[FullBlock]:
         cached = self.block_cache.get(header_hash)
@@ -293,6 +314,32 @@ class BlockStore:
 
         return None
 
+    async def get_full_block_view(self, header_hash: bytes32) -> Optional[StreamableView[FullBlock]]:
+        """
+        Returns a view of the serialized block, which only decodes the fields that are accessed. The block isn't
+        added to the block cache.
+        """
+        block_bytes = await self.get_full_block_bytes(header_hash)
+        if block_bytes is None:
+            return None
+        return StreamableView(FullBlock, block_bytes)
+
+    async def get_full_block_views_at(self, heights: List[uint32]) -> List[StreamableView[FullBlock]]:
+        if len(heights) == 0:
+            return []
+
+        heights_db = tuple(heights)
+        formatted_str = f'SELECT block from full_blocks WHERE height in ({"?," * (len(heights_db) - 1)}?)'
+        async with self.db_wrapper.read_db() as conn:
+            async with conn.execute(formatted_str, heights_db) as cursor:
+                ret: List[StreamableView[FullBlock]] = []
+                for row in await cursor.fetchall():
+                    if self.db_wrapper.db_version == 2:
+                        ret.append(StreamableView(FullBlock, zstd.decompress(row[0])))
+                    else:
+                        ret.append(StreamableView(FullBlock, row[0]))
+                return ret
+
     async def get_full_blocks_at(self, heights: List[uint32]) -> List[FullBlock]:
         if len(heights) == 0:
             return []
@@ -341,7 +388,15 @@ class BlockStore:
             return []
 
         generators: Dict[uint32, SerializedProgram] = {}
-        heights_db = tuple(heights)
+        for h in heights:
+            cached = self.generator_cache.get(h)
+            if cached is not None:
+                generators[h] = cached
+        if len(generators) == len(set(heights)):
+            return [generators[h] for h in heights]
+
+        heights_db = tuple(h for h in heights if h not in generators)
+        generation = self.generator_cache_generation
         formatted_str = (
             f"SELECT block, height from full_blocks "
             f'WHERE in_main_chain=1 AND height in ({"?," * (len(heights_db) - 1)}?)'
@@ -363,6 +418,8 @@ class BlockStore:
                     if gen is None:
                         raise ValueError(Err.GENERATOR_REF_HAS_NO_GENERATOR)
                     generators[uint32(row[1])] = gen
+                    if generation == self.generator_cache_generation:
+                        self.generator_cache.put(uint32(row[1]), gen)
 
         return [generators[h] for h in heights]
 
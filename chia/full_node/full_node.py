@@ -32,9 +32,13 @@ from chia.full_node.bundle_tools import detect_potential_template_generator
 from chia.full_node.coin_store import CoinStore
 from chia.full_node.full_node_store import FullNodeStore, FullNodeStorePeakResult
 from chia.full_node.hint_store import HintStore
+from chia.full_node.mempool_check_conditions import get_puzzle_and_solution_for_coin
 from chia.full_node.mempool_manager import MempoolManager
+from chia.full_node.mempool_snapshot import MempoolSnapshot, read_mempool_snapshot, write_mempool_snapshot
+from chia.full_node.puzzle_solution_store import PuzzleSolutionStore, get_puzzle_solution_offsets
 from chia.full_node.signage_point import SignagePoint
 from chia.full_node.sync_store import SyncStore
+from chia.full_node.transaction_queue import TransactionQueue
 from chia.full_node.weight_proof import WeightProofHandler
 from chia.protocols import farmer_protocol, full_node_protocol, timelord_protocol, wallet_protocol
 from chia.protocols.full_node_protocol import (
@@ -51,6 +55,7 @@ from chia.server.peer_store_resolver import PeerStoreResolver
 from chia.server.server import ChiaServer
 from chia.types.blockchain_format.classgroup import ClassgroupElement
 from chia.types.blockchain_format.pool_target import PoolTarget
+from chia.types.blockchain_format.program import Program, SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.blockchain_format.vdf import CompressibleVDFField, VDFInfo, VDFProof
@@ -94,6 +99,7 @@ class FullNode:
     full_node_peers: Optional[FullNodePeers]
     sync_store: Any
     coin_store: CoinStore
+    puzzle_solution_store: Optional[PuzzleSolutionStore]
     mempool_manager: MempoolManager
     _sync_task: Optional[asyncio.Task]
     _init_weight_proof: Optional[asyncio.Task] = None
@@ -115,6 +121,7 @@ class FullNode:
     _blockchain_lock_high_priority: LockClient
     _blockchain_lock_low_priority: LockClient
     _transaction_queue_task: Optional[asyncio.Task]
+    _restore_mempool_task: Optional[asyncio.Task]
 
     def __init__(
         self,
@@ -158,6 +165,14 @@ class FullNode:
         self.peer_sub_counter: Dict[bytes32, int] = {}  # Peer ID: int (subscription count)
         mkdir(self.db_path.parent)
         self._transaction_queue_task = None
+        self._restore_mempool_task = None
+        self.mempool_snapshot_path: Optional[Path] = None
+        if config.get("persist_mempool", True):
+            self.mempool_snapshot_path = self.db_path.parent / f"mempool_{config['selected_network']}.dat"
+        self.puzzle_solution_index: str = config.get("puzzle_solution_index", "off")
+        if self.puzzle_solution_index not in ["off", "lazy", "eager"]:
+            raise ValueError(f"Invalid puzzle_solution_index: {self.puzzle_solution_index}")
+        self.puzzle_solution_store = None
 
     def _set_state_changed_callback(self, callback: Callable):
         self.state_changed_callback = callback
@@ -222,6 +237,8 @@ class FullNode:
         self.sync_store = await SyncStore.create()
         self.hint_store = await HintStore.create(self.db_wrapper)
         self.coin_store = await CoinStore.create(self.db_wrapper)
+        if self.puzzle_solution_index != "off":
+            self.puzzle_solution_store = await PuzzleSolutionStore.create(self.db_wrapper)
         self.log.info("Initializing blockchain from disk")
         start_time = time.time()
         reserved_cores = self.config.get("reserved_cores", 0)
@@ -253,7 +270,11 @@ class FullNode:
         self._blockchain_lock_low_priority = LockClient(2, self._blockchain_lock_queue)
 
         # Transactions go into this queue from the server, and get sent to respond_transaction
-        self.transaction_queue = asyncio.PriorityQueue(10000)
+        self.transaction_queue = TransactionQueue(
+            self.config.get("max_transaction_queue_size", 10000),
+            self.config.get("max_transaction_queue_size_per_peer", 1000),
+            self.log,
+        )
         self._transaction_queue_task = asyncio.create_task(self._handle_transactions())
         self.transaction_responses: List[Tuple[bytes32, MempoolInclusionStatus, Optional[Err]]] = []
 
@@ -284,6 +305,8 @@ class FullNode:
             async with self._blockchain_lock_high_priority:
                 pending_tx = await self.mempool_manager.new_peak(self.blockchain.get_peak(), None)
             assert len(pending_tx) == 0  # no pending transactions when starting up
+            if self.mempool_snapshot_path is not None:
+                self._restore_mempool_task = asyncio.create_task(self._restore_mempool(self.mempool_snapshot_path))
 
         peak: Optional[BlockRecord] = self.blockchain.get_peak()
         if peak is not None:
@@ -309,6 +332,37 @@ class FullNode:
         if self.full_node_peers is not None:
             asyncio.create_task(self.full_node_peers.start())
 
+    async def _restore_mempool(self, snapshot_path: Path) -> None:
+        """
+        Restores the mempool written at the last shutdown. Items are re-validated against the current peak before being
+        added, so the ones that got confirmed or became invalid in the meantime are dropped.
+        """
+        try:
+            snapshot: Optional[MempoolSnapshot] = await read_mempool_snapshot(snapshot_path)
+            if snapshot is None:
+                return None
+            start_time = time.time()
+            assert self.mempool_manager.peak is not None
+            if snapshot.peak_hash != self.mempool_manager.peak.header_hash:
+                self.log.info("The peak changed since the mempool snapshot was written")
+            restored = await self.mempool_manager.pre_validate_restored_items(snapshot.items)
+            added = 0
+            for spend_bundle, npc_result, spend_name in restored:
+                async with self._blockchain_lock_low_priority:
+                    if self.mempool_manager.get_spendbundle(spend_name) is not None:
+                        continue
+                    _, status, _ = await self.mempool_manager.add_spendbundle(spend_bundle, npc_result, spend_name)
+                if status == MempoolInclusionStatus.SUCCESS:
+                    self.mempool_manager.add_and_maybe_pop_seen(spend_name)
+                    added += 1
+            self.log.info(
+                f"Restored {added} of {len(snapshot.items)} mempool items in {time.time() - start_time:0.2f} seconds"
+            )
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.log.exception("Failed to restore the mempool")
+
     async def _handle_one_transaction(self, entry: TransactionQueueEntry):
         peer = entry.peer
         try:
@@ -327,13 +381,27 @@ class FullNode:
         finally:
             self.respond_transaction_semaphore.release()
 
+    async def wait_for_transaction_response(
+        self, spend_name: bytes32, timeout: float = 45
+    ) -> Tuple[Optional[MempoolInclusionStatus], Optional[Err]]:
+        """
+        Waits for a queued transaction to be handled. Returns (None, None) if it wasn't handled before the timeout.
+        """
+        sleep_time = 0.01
+        for i in range(int(timeout / sleep_time)):
+            await asyncio.sleep(sleep_time)
+            for potential_name, potential_status, potential_error in self.transaction_responses:
+                if spend_name == potential_name:
+                    return potential_status, potential_error
+        return None, None
+
     async def _handle_transactions(self):
         try:
             while not self._shut_down:
                 # We use a semaphore to make sure we don't send more than 200 concurrent calls of respond_transaction.
                 # However, doing them one at a time would be slow, because they get sent to other processes.
                 await self.respond_transaction_semaphore.acquire()
-                item: TransactionQueueEntry = (await self.transaction_queue.get())[1]
+                item: TransactionQueueEntry = await self.transaction_queue.pop()
                 asyncio.create_task(self._handle_one_transaction(item))
         except asyncio.CancelledError:
             raise
@@ -553,6 +621,14 @@ class FullNode:
         except Exception as e:
             self.log.warning(f"Exception UI refresh task: {e}")
 
+        # How late the peer told us about the peak compared to the first peer that did, for the peaks announced
+        # while it was connected
+        first_seen = self.sync_store.get_peak_first_seen(request.header_hash)
+        if first_seen is None:
+            peer.performance.new_peak_seen(0.0)
+        elif first_seen >= peer.creation_time:
+            peer.performance.new_peak_seen(time.time() - first_seen)
+
         # Store this peak/peer combination in case we want to sync to it, and to keep track of peers
         self.sync_store.peer_has_block(request.header_hash, peer.peer_node_id, request.weight, request.height, True)
 
@@ -784,6 +860,8 @@ class FullNode:
             self.uncompact_task.cancel()
         if self._transaction_queue_task is not None:
             self._transaction_queue_task.cancel()
+        if self._restore_mempool_task is not None:
+            self._restore_mempool_task.cancel()
         if hasattr(self, "_blockchain_lock_queue"):
             self._blockchain_lock_queue.close()
         cancel_task_safe(task=self._sync_task, log=self.log)
@@ -791,6 +869,14 @@ class FullNode:
     async def _await_closed(self):
         for task_id, task in list(self.full_node_store.tx_fetch_tasks.items()):
             cancel_task_safe(task, self.log)
+        if (
+            self.mempool_snapshot_path is not None
+            and hasattr(self, "mempool_manager")
+            and self.mempool_manager.peak is not None
+        ):
+            await write_mempool_snapshot(
+                self.mempool_snapshot_path, self.mempool_manager.mempool, self.mempool_manager.peak.header_hash
+            )
         await self.db_wrapper.close()
         if self._init_weight_proof is not None:
             await asyncio.wait([self._init_weight_proof])
@@ -1009,6 +1095,12 @@ class FullNode:
                     )
                     await self.hint_store.add_hints(hints_to_add)
                     await self.update_wallets(state_change_summary, hints_to_add, lookup_coin_ids)
+                    if self.puzzle_solution_index == "eager":
+                        for block in blocks:
+                            if block.transactions_generator is not None:
+                                block_generator = await self.blockchain.get_block_generator(block)
+                                assert block_generator is not None
+                                await self.index_puzzles_and_solutions(block, block_generator)
                 await self.send_peak_to_wallets()
                 self.blockchain.clean_block_record(end_height - self.constants.BLOCKS_CACHE_SIZE)
 
@@ -1087,6 +1179,45 @@ class FullNode:
             msg = make_msg(ProtocolMessageTypes.coin_state_update, state)
             await ws_peer.send_message(msg)
 
+    async def index_puzzles_and_solutions(self, block: FullBlock, block_generator: BlockGenerator) -> None:
+        assert self.puzzle_solution_store is not None
+        try:
+            offsets = get_puzzle_solution_offsets(block_generator, self.constants.MAX_BLOCK_COST_CLVM)
+        except Exception as e:
+            # the block is still marked as indexed, lookups fall back to running the generator
+            self.log.error(f"Failed to index puzzles and solutions of block at height {block.height}: {e}")
+            offsets = []
+        await self.puzzle_solution_store.add_block(block.header_hash, block.height, offsets)
+
+    async def get_puzzle_and_solution(
+        self, coin_name: bytes32, block: FullBlock
+    ) -> Tuple[Optional[Exception], Optional[SerializedProgram], Optional[SerializedProgram]]:
+        """
+        Returns the puzzle and solution of a coin spent in the given block. With the puzzle solution index enabled,
+        blocks are indexed the first time one of their spends is requested, and subsequent requests don't run the
+        generator.
+        """
+        block_generator: Optional[BlockGenerator] = await self.blockchain.get_block_generator(block)
+        assert block_generator is not None
+        if self.puzzle_solution_store is not None:
+            if not await self.puzzle_solution_store.is_block_indexed(block.header_hash):
+                await self.index_puzzles_and_solutions(block, block_generator)
+            offsets = await self.puzzle_solution_store.get_offsets(coin_name, block.header_hash)
+            if offsets is not None:
+                puzzle, solution = offsets.get_puzzle_and_solution(block_generator)
+                return None, puzzle, solution
+
+        error, puzzle, solution = get_puzzle_and_solution_for_coin(
+            block_generator, coin_name, self.constants.MAX_BLOCK_COST_CLVM
+        )
+        if error is not None:
+            return error, None, None
+        return (
+            None,
+            SerializedProgram.from_program(Program.to(puzzle)),
+            SerializedProgram.from_program(Program.to(solution)),
+        )
+
     async def receive_block_batch(
         self,
         all_blocks: List[FullBlock],
@@ -1310,6 +1441,9 @@ class FullNode:
         )
         await self.hint_store.add_hints(hints_to_add)
 
+        if self.puzzle_solution_store is not None and state_change_summary.fork_height < record.height - 1:
+            await self.puzzle_solution_store.rollback(state_change_summary.fork_height)
+
         sub_slots = await self.blockchain.get_sp_and_ip_sub_slots(record.header_hash)
         assert sub_slots is not None
 
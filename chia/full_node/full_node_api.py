@@ -14,7 +14,6 @@ from chia.consensus.block_record import BlockRecord
 from chia.consensus.pot_iterations import calculate_ip_iters, calculate_iterations_quality, calculate_sp_iters
 from chia.full_node.bundle_tools import best_solution_generator_from_template, simple_solution_generator
 from chia.full_node.full_node import FullNode
-from chia.full_node.mempool_check_conditions import get_puzzle_and_solution_for_coin
 from chia.full_node.signage_point import SignagePoint
 from chia.protocols import farmer_protocol, full_node_protocol, introducer_protocol, timelord_protocol, wallet_protocol
 from chia.protocols.full_node_protocol import RejectBlock, RejectBlocks
@@ -29,7 +28,6 @@ from chia.protocols.wallet_protocol import (
 from chia.server.outbound_message import Message, make_msg
 from chia.types.blockchain_format.coin import Coin, hash_coin_ids
 from chia.types.blockchain_format.pool_target import PoolTarget
-from chia.types.blockchain_format.program import Program
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.coin_record import CoinRecord
@@ -46,6 +44,7 @@ from chia.util.generator_tools import get_block_header
 from chia.util.hash import std_hash
 from chia.util.ints import uint8, uint32, uint64, uint128
 from chia.util.merkle_set import MerkleSet
+from chia.util.streamable_view import StreamableView
 
 
 class FullNodeAPI:
@@ -155,6 +154,9 @@ class FullNodeAPI:
                     return None
 
             self.full_node.full_node_store.pending_tx_request[transaction.transaction_id] = peer.peer_node_id
+            self.full_node.full_node_store.pending_tx_fee_per_cost[transaction.transaction_id] = (
+                transaction.fees / transaction.cost
+            )
             new_set = set()
             new_set.add(peer.peer_node_id)
             self.full_node.full_node_store.peers_with_tx[transaction.transaction_id] = new_set
@@ -193,6 +195,7 @@ class FullNodeAPI:
                         full_node.full_node_store.peers_with_tx.pop(transaction_id)
                     if transaction_id in full_node.full_node_store.pending_tx_request:
                         full_node.full_node_store.pending_tx_request.pop(transaction_id)
+                    full_node.full_node_store.pending_tx_fee_per_cost.pop(transaction_id, None)
                     if task_id in full_node.full_node_store.tx_fetch_tasks:
                         full_node.full_node_store.tx_fetch_tasks.pop(task_id)
 
@@ -240,17 +243,15 @@ class FullNodeAPI:
             self.full_node.full_node_store.pending_tx_request.pop(spend_name)
         if spend_name in self.full_node.full_node_store.peers_with_tx:
             self.full_node.full_node_store.peers_with_tx.pop(spend_name)
+        fee_per_cost: float = self.full_node.full_node_store.pending_tx_fee_per_cost.pop(spend_name, 0)
 
         if self.full_node.transaction_queue.qsize() % 100 == 0 and not self.full_node.transaction_queue.empty():
-            self.full_node.log.debug(f"respond_transaction Waiters: {self.full_node.transaction_queue.qsize()}")
+            self.full_node.log.debug(f"respond_transaction Waiters: {self.full_node.transaction_queue.get_info()}")
 
-        if self.full_node.transaction_queue.full():
+        if not self.full_node.transaction_queue.put(
+            TransactionQueueEntry(tx.transaction, tx_bytes, spend_name, peer, test), fee_per_cost
+        ):
             self.full_node.dropped_tx.add(spend_name)
-            return None
-        # Higher fee means priority is a smaller number, which means it will be handled earlier
-        await self.full_node.transaction_queue.put(
-            (0, TransactionQueueEntry(tx.transaction, tx_bytes, spend_name, peer, test))
-        )
         return None
 
     @api_request
@@ -310,11 +311,12 @@ class FullNodeAPI:
         if header_hash is None:
             return make_msg(ProtocolMessageTypes.reject_block, RejectBlock(request.height))
 
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash)
+        # the block is served as stored, a RespondBlock is streamed the same as its block
+        block: Optional[StreamableView[FullBlock]] = await self.full_node.block_store.get_full_block_view(header_hash)
         if block is not None:
-            if not request.include_transaction_block and block.transactions_generator is not None:
-                block = dataclasses.replace(block, transactions_generator=None)
-            return make_msg(ProtocolMessageTypes.respond_block, full_node_protocol.RespondBlock(block))
+            if not request.include_transaction_block and block.field_bytes("transactions_generator")[0] != 0:
+                block = block.replace(transactions_generator=None)
+            return make_msg(ProtocolMessageTypes.respond_block, block)
         return make_msg(ProtocolMessageTypes.reject_block, RejectBlock(request.height))
 
     @api_request
@@ -331,22 +333,26 @@ class FullNodeAPI:
                 return msg
 
         if not request.include_transaction_block:
-            blocks: List[FullBlock] = []
+            blocks_without_generator: List[bytes] = []
             for i in range(request.start_height, request.end_height + 1):
                 header_hash_i: Optional[bytes32] = self.full_node.blockchain.height_to_hash(uint32(i))
                 if header_hash_i is None:
                     reject = RejectBlocks(request.start_height, request.end_height)
                     return make_msg(ProtocolMessageTypes.reject_blocks, reject)
 
-                block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash_i)
+                block: Optional[StreamableView[FullBlock]] = await self.full_node.block_store.get_full_block_view(
+                    header_hash_i
+                )
                 if block is None:
                     reject = RejectBlocks(request.start_height, request.end_height)
                     return make_msg(ProtocolMessageTypes.reject_blocks, reject)
-                block = dataclasses.replace(block, transactions_generator=None)
-                blocks.append(block)
+                blocks_without_generator.append(bytes(block.replace(transactions_generator=None)))
             msg = make_msg(
                 ProtocolMessageTypes.respond_blocks,
-                full_node_protocol.RespondBlocks(request.start_height, request.end_height, blocks),
+                bytes(uint32(request.start_height))
+                + bytes(uint32(request.end_height))
+                + len(blocks_without_generator).to_bytes(4, "big", signed=False)
+                + b"".join(blocks_without_generator),
             )
         else:
             blocks_bytes: List[bytes] = []
@@ -1150,11 +1156,12 @@ class FullNodeAPI:
             response = wallet_protocol.RespondAdditions(block.height, block.header_hash, coins_map, None)
         else:
             # Create addition Merkle set
-            addition_merkle_set = MerkleSet()
             # Addition Merkle set contains puzzlehash and hash of all coins with that puzzlehash
+            leafs: List[bytes32] = []
             for puzzle, coins in puzzlehash_coins_map.items():
-                addition_merkle_set.add_already_hashed(puzzle)
-                addition_merkle_set.add_already_hashed(hash_coin_ids([c.name() for c in coins]))
+                leafs.append(puzzle)
+                leafs.append(hash_coin_ids([c.name() for c in coins]))
+            addition_merkle_set = MerkleSet.from_already_hashed(leafs)
 
             assert addition_merkle_set.get_root() == block.foliage_transaction_block.additions_root
             for puzzle_hash in request.puzzle_hashes:
@@ -1220,9 +1227,7 @@ class FullNodeAPI:
             response = wallet_protocol.RespondRemovals(block.height, block.header_hash, coins_map, None)
         else:
             assert block.transactions_generator
-            removal_merkle_set = MerkleSet()
-            for removed_name, removed_coin in all_removals_dict.items():
-                removal_merkle_set.add_already_hashed(removed_name)
+            removal_merkle_set = MerkleSet.from_already_hashed(all_removals_dict.keys())
             assert removal_merkle_set.get_root() == block.foliage_transaction_block.removals_root
             for coin_name in request.coin_names:
                 result, proof = removal_merkle_set.is_included_already_hashed(coin_name)
@@ -1239,24 +1244,19 @@ class FullNodeAPI:
         msg = make_msg(ProtocolMessageTypes.respond_removals, response)
         return msg
 
+    @peer_required
     @api_request
-    async def send_transaction(self, request: wallet_protocol.SendTransaction, *, test=False) -> Optional[Message]:
+    async def send_transaction(
+        self, request: wallet_protocol.SendTransaction, peer: Optional[ws.WSChiaConnection] = None, *, test=False
+    ) -> Optional[Message]:
         spend_name = request.transaction.name()
-        await self.full_node.transaction_queue.put(
-            (0, TransactionQueueEntry(request.transaction, None, spend_name, None, test))
-        )
+        # Queued with the wallet's connection, so a wallet gets the same share of the queue as any other peer
+        if not self.full_node.transaction_queue.put(
+            TransactionQueueEntry(request.transaction, None, spend_name, peer, test)
+        ):
+            self.full_node.dropped_tx.add(spend_name)
         # Waits for the transaction to go into the mempool, times out after 45 seconds.
-        status, error = None, None
-        sleep_time = 0.01
-        for i in range(int(45 / sleep_time)):
-            await asyncio.sleep(sleep_time)
-            for potential_name, potential_status, potential_error in self.full_node.transaction_responses:
-                if spend_name == potential_name:
-                    status = potential_status
-                    error = potential_error
-                    break
-            if status is not None:
-                break
+        status, error = await self.full_node.wait_for_transaction_response(spend_name)
         if status is None:
             response = wallet_protocol.TransactionAck(spend_name, uint8(MempoolInclusionStatus.PENDING), None)
         else:
@@ -1293,17 +1293,14 @@ class FullNodeAPI:
         if block is None or block.transactions_generator is None:
             return reject_msg
 
-        block_generator: Optional[BlockGenerator] = await self.full_node.blockchain.get_block_generator(block)
-        assert block_generator is not None
-        error, puzzle, solution = get_puzzle_and_solution_for_coin(
-            block_generator, coin_name, self.full_node.constants.MAX_BLOCK_COST_CLVM
-        )
+        error, puzzle, solution = await self.full_node.get_puzzle_and_solution(coin_name, block)
 
         if error is not None:
             return reject_msg
 
-        pz = Program.to(puzzle)
-        sol = Program.to(solution)
+        assert puzzle is not None and solution is not None
+        pz = puzzle.to_program()
+        sol = solution.to_program()
 
         wrapper = PuzzleSolutionResponse(coin_name, height, pz, sol)
         response = wallet_protocol.RespondPuzzleSolution(wrapper)
@@ -80,6 +80,7 @@ class FullNodeStore:
 
     previous_generator: Optional[CompressorArg]
     pending_tx_request: Dict[bytes32, bytes32]  # tx_id: peer_id
+    pending_tx_fee_per_cost: Dict[bytes32, float]  # tx_id: fee per cost declared by the peer
     peers_with_tx: Dict[bytes32, Set[bytes32]]  # tx_id: Set[peer_ids}
     tx_fetch_tasks: Dict[bytes32, asyncio.Task]  # Task id: task
     serialized_wp_message: Optional[Message]
@@ -103,6 +104,7 @@ class FullNodeStore:
         self.clear_slots()
         self.initialize_genesis_sub_slot()
         self.pending_tx_request = {}
+        self.pending_tx_fee_per_cost = {}
         self.peers_with_tx = {}
         self.tx_fetch_tasks = {}
         self.serialized_wp_message = None
@@ -15,6 +15,7 @@ DECOMPRESS_PUZZLE = load_clvm("decompress_puzzle.clvm", package_or_requirement="
 DECOMPRESS_CSE_WITH_PREFIX = load_clvm(
     "decompress_coin_spend_entry_with_prefix.clvm", package_or_requirement="chia.wallet.puzzles"
 )
+DESERIALIZE_MOD = load_clvm("chialisp_deserialisation.clvm", package_or_requirement="chia.wallet.puzzles")
 log = logging.getLogger(__name__)
 
 
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 from sortedcontainers import SortedDict
 
@@ -15,19 +15,39 @@ class Mempool:
         self.removals: Dict[bytes32, MempoolItem] = {}
         self.max_size_in_cost: int = max_size_in_cost
         self.total_mempool_cost: int = 0
-
-    def get_min_fee_rate(self, cost: int) -> float:
+        # Items can spend coins created by other items in the mempool (chained spends). These map an item's name to
+        # the names of the items it spends coins from, and to the names of the items that spend its coins.
+        self.parents: Dict[bytes32, Set[bytes32]] = {}
+        self.children: Dict[bytes32, Set[bytes32]] = {}
+        # The fee per cost of an item together with all its unconfirmed ancestors, since they can only be included in
+        # a block together. This is the key the item is sorted by in sorted_spends.
+        self.package_fee_per_cost: Dict[bytes32, float] = {}
+        # The highest package fee per cost of an item and its descendants. Kicking out an item also kicks out its
+        # descendants, so a parent is only kicked out when the child paying for it would be. This is the key the item
+        # is sorted by in sorted_evictions, the order in which items are kicked out when the mempool is full.
+        self.eviction_fee_per_cost: Dict[bytes32, float] = {}
+        self.sorted_evictions: SortedDict = SortedDict()
+
+    def get_min_fee_rate(self, cost: int, ancestor_names: Optional[Set[bytes32]] = None) -> float:
         """
-        Gets the minimum fpc rate that a transaction with specified cost will need in order to get included.
+        Gets the minimum fpc rate that a transaction with specified cost will need in order to get included. The
+        ancestors of the transaction are skipped, since they can't be kicked out for it.
         """
 
         if self.at_full_capacity(cost):
             current_cost = self.total_mempool_cost
+            skipped: Set[bytes32] = set() if ancestor_names is None else set(ancestor_names)
 
-            # Iterates through all spends in increasing fee per cost
-            for fee_per_cost, spends_with_fpc in self.sorted_spends.items():
+            # Iterates through all spends in the order add_to_pool kicks them out
+            for fee_per_cost, spends_with_fpc in self.sorted_evictions.items():
                 for spend_name, item in spends_with_fpc.items():
-                    current_cost -= item.cost
+                    if spend_name in skipped:
+                        continue
+                    # Kicking out an item also kicks out its descendants
+                    for removed in [item] + self.get_descendants(spend_name):
+                        if removed.name not in skipped:
+                            skipped.add(removed.name)
+                            current_cost -= removed.cost
                     # Removing one at a time, until our transaction of size cost fits
                     if current_cost + cost <= self.max_size_in_cost:
                         return fee_per_cost
@@ -37,10 +57,86 @@ class Mempool:
         else:
             return 0
 
+    def get_ancestors(self, names: Set[bytes32]) -> List[MempoolItem]:
+        """
+        Returns the items the given items depend on, directly or indirectly, not including the given items. Parents
+        always come before their children in the returned list.
+        """
+        ancestors: List[MempoolItem] = []
+        visited: Set[bytes32] = set(names)
+
+        def visit(name: bytes32) -> None:
+            for parent_name in self.parents.get(name, set()):
+                if parent_name not in visited:
+                    visited.add(parent_name)
+                    visit(parent_name)
+                    ancestors.append(self.spends[parent_name])
+
+        for name in names:
+            visit(name)
+        return ancestors
+
+    def get_descendants(self, name: bytes32) -> List[MempoolItem]:
+        """
+        Returns the items that depend on the given item, directly or indirectly, not including the item itself.
+        """
+        descendants: List[MempoolItem] = []
+        visited: Set[bytes32] = {name}
+        to_visit: List[bytes32] = [name]
+        while len(to_visit) > 0:
+            for child_name in self.children.get(to_visit.pop(), set()):
+                if child_name not in visited:
+                    visited.add(child_name)
+                    to_visit.append(child_name)
+                    descendants.append(self.spends[child_name])
+        return descendants
+
+    def _compute_package_fee_per_cost(self, item: MempoolItem) -> float:
+        ancestors = self.get_ancestors({item.name})
+        fee = item.fee + sum(ancestor.fee for ancestor in ancestors)
+        cost = item.cost + sum(ancestor.cost for ancestor in ancestors)
+        return int(fee) / int(cost)
+
+    def _add_to_sorted_spends(self, item: MempoolItem) -> None:
+        fee_per_cost = self._compute_package_fee_per_cost(item)
+        self.package_fee_per_cost[item.name] = fee_per_cost
+        # sorted_spends is Dict[float, Dict[bytes32, MempoolItem]]
+        if fee_per_cost not in self.sorted_spends:
+            self.sorted_spends[fee_per_cost] = {}
+        self.sorted_spends[fee_per_cost][item.name] = item
+
+    def _update_eviction_fee_per_cost(self, names: Set[bytes32]) -> None:
+        for name in names:
+            old_fee_per_cost = self.eviction_fee_per_cost.pop(name, None)
+            if old_fee_per_cost is not None:
+                del self.sorted_evictions[old_fee_per_cost][name]
+                if len(self.sorted_evictions[old_fee_per_cost]) == 0:
+                    del self.sorted_evictions[old_fee_per_cost]
+            if name not in self.spends:
+                continue
+            fee_per_cost = max(
+                [self.package_fee_per_cost[name]]
+                + [self.package_fee_per_cost[descendant.name] for descendant in self.get_descendants(name)]
+            )
+            self.eviction_fee_per_cost[name] = fee_per_cost
+            if fee_per_cost not in self.sorted_evictions:
+                self.sorted_evictions[fee_per_cost] = {}
+            self.sorted_evictions[fee_per_cost][name] = self.spends[name]
+
+    def _remove_from_sorted_spends(self, item: MempoolItem) -> None:
+        fee_per_cost = self.package_fee_per_cost.pop(item.name)
+        del self.sorted_spends[fee_per_cost][item.name]
+        dic = self.sorted_spends[fee_per_cost]
+        if len(dic.values()) == 0:
+            del self.sorted_spends[fee_per_cost]
+
     def remove_from_pool(self, item: MempoolItem):
         """
-        Removes an item from the mempool.
+        Removes an item from the mempool. Items spending its coins stay in the mempool, this is meant for items that
+        got included in a block (so their coins now exist). Use remove_with_descendants otherwise.
         """
+        descendants = self.get_descendants(item.name)
+        ancestors = self.get_ancestors({item.name})
         removals: List[Coin] = item.removals
         additions: List[Coin] = item.additions
         for rem in removals:
@@ -48,41 +144,84 @@ class Mempool:
         for add in additions:
             del self.additions[add.name()]
         del self.spends[item.name]
-        del self.sorted_spends[item.fee_per_cost][item.name]
-        dic = self.sorted_spends[item.fee_per_cost]
-        if len(dic.values()) == 0:
-            del self.sorted_spends[item.fee_per_cost]
+        self._remove_from_sorted_spends(item)
+        for parent_name in self.parents.pop(item.name, set()):
+            self.children[parent_name].discard(item.name)
+        for child_name in self.children.pop(item.name, set()):
+            self.parents[child_name].discard(item.name)
+        # The item is no longer part of the packages of its descendants
+        for descendant in descendants:
+            self._remove_from_sorted_spends(descendant)
+            self._add_to_sorted_spends(descendant)
+        # The packages of the descendants changed, which changes how they and their other ancestors are kicked out
+        descendant_names: Set[bytes32] = {descendant.name for descendant in descendants}
+        self._update_eviction_fee_per_cost(
+            {item.name}
+            | {ancestor.name for ancestor in ancestors}
+            | descendant_names
+            | {ancestor.name for ancestor in self.get_ancestors(descendant_names)}
+        )
         self.total_mempool_cost -= item.cost
         assert self.total_mempool_cost >= 0
 
+    def remove_with_descendants(self, item: MempoolItem) -> List[MempoolItem]:
+        """
+        Removes an item from the mempool, along with the items spending its coins (which can no longer be valid).
+        Returns all the removed items.
+        """
+        removed: List[MempoolItem] = [item] + self.get_descendants(item.name)
+        # Children first, so we don't needlessly update the package fee rates of the items being removed
+        for to_remove in reversed(removed):
+            self.remove_from_pool(to_remove)
+        return removed
+
     def add_to_pool(
         self,
         item: MempoolItem,
     ):
         """
         Adds an item to the mempool by kicking out transactions (if it doesn't fit), in order of increasing fee per cost
+        of the best package they are part of
         """
+        parent_names: Set[bytes32] = {
+            self.additions[coin.name()].name for coin in item.removals if coin.name() in self.additions
+        }
+        ancestor_names: Set[bytes32] = {ancestor.name for ancestor in self.get_ancestors(parent_names)} | parent_names
 
         while self.at_full_capacity(item.cost):
-            # Val is Dict[hash, MempoolItem]
-            fee_per_cost, val = self.sorted_spends.peekitem(index=0)
-            to_remove = list(val.values())[0]
-            self.remove_from_pool(to_remove)
+            # Val is Dict[hash, MempoolItem]. The ancestors of the new item can't be kicked out
+            to_remove: Optional[MempoolItem] = None
+            for val in self.sorted_evictions.values():
+                to_remove = next((i for i in val.values() if i.name not in ancestor_names), None)
+                if to_remove is not None:
+                    break
+            if to_remove is None:
+                # callers check fits_with_ancestors first
+                raise ValueError(f"Transaction {item.name} does not fit in mempool next to its ancestors")
+            self.remove_with_descendants(to_remove)
 
         self.spends[item.name] = item
 
-        # sorted_spends is Dict[float, Dict[bytes32, MempoolItem]]
-        if item.fee_per_cost not in self.sorted_spends:
-            self.sorted_spends[item.fee_per_cost] = {}
-
-        self.sorted_spends[item.fee_per_cost][item.name] = item
-
         for add in item.additions:
             self.additions[add.name()] = item
         for coin in item.removals:
             self.removals[coin.name()] = item
+        self.parents[item.name] = parent_names
+        self.children[item.name] = set()
+        for parent_name in parent_names:
+            self.children[parent_name].add(item.name)
+        self._add_to_sorted_spends(item)
+        self._update_eviction_fee_per_cost({item.name} | ancestor_names)
         self.total_mempool_cost += item.cost
 
+    def fits_with_ancestors(self, cost: int, ancestor_names: Set[bytes32]) -> bool:
+        """
+        Checks whether a transaction with size cost can fit in the mempool by kicking out other transactions. Its
+        ancestors can't be kicked out.
+        """
+
+        return sum(self.spends[name].cost for name in ancestor_names) + cost <= self.max_size_in_cost
+
     def at_full_capacity(self, cost: int) -> bool:
         """
         Checks whether the mempool is at full capacity and cannot accept a transaction with size cost.
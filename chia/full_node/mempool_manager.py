@@ -6,8 +6,8 @@ from multiprocessing.context import BaseContext
 import time
 from concurrent.futures.process import ProcessPoolExecutor
 from chia.util.inline_executor import InlineExecutor
-from typing import Dict, List, Optional, Set, Tuple
-from blspy import GTElement
+from typing import Dict, List, Optional, OrderedDict, Set, Tuple
+from blspy import G2Element, GTElement
 from chiabip158 import PyBIP158
 
 from chia.util import cached_bls
@@ -18,6 +18,7 @@ from chia.full_node.bundle_tools import simple_solution_generator
 from chia.full_node.coin_store import CoinStore
 from chia.full_node.mempool import Mempool
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
+from chia.full_node.mempool_snapshot import MempoolSnapshotItem
 from chia.full_node.pending_tx_cache import PendingTxCache
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.program import SerializedProgram
@@ -38,6 +39,12 @@ from chia.full_node.mempool_check_conditions import mempool_check_time_locks
 log = logging.getLogger(__name__)
 
 
+def _init_worker(process_title: str, shared_pairing_cache_name: Optional[str]) -> None:
+    setproctitle(process_title)
+    if shared_pairing_cache_name is not None:
+        cached_bls.attach_shared_cache(shared_pairing_cache_name)
+
+
 def validate_clvm_and_signature(
     spend_bundle_bytes: bytes, max_cost: int, cost_per_byte: int, additional_data: bytes
 ) -> Tuple[Optional[Err], bytes, Dict[bytes, bytes]]:
@@ -46,35 +53,75 @@ def validate_clvm_and_signature(
     in order to validate the heavy parts of a transction in a different thread. Returns an optional error,
     the NPCResult and a cache of the new pairings validated (if not error)
     """
-    try:
-        bundle: SpendBundle = SpendBundle.from_bytes(spend_bundle_bytes)
-        program = simple_solution_generator(bundle)
-        # npc contains names of the coins removed, puzzle_hashes and their spend conditions
-        result: NPCResult = get_name_puzzle_conditions(
-            program, max_cost, cost_per_byte=cost_per_byte, mempool_mode=True
-        )
-
-        if result.error is not None:
-            return Err(result.error), b"", {}
+    results, new_cache_entries = validate_clvm_and_signature_batch(
+        [spend_bundle_bytes], max_cost, cost_per_byte, additional_data
+    )
+    err, result_bytes = results[0]
+    if err is not None:
+        return err, b"", {}
+    return None, result_bytes, new_cache_entries
+
+
+def validate_clvm_and_signature_batch(
+    spend_bundles_bytes: List[bytes], max_cost: int, cost_per_byte: int, additional_data: bytes
+) -> Tuple[List[Tuple[Optional[Err], bytes]], Dict[bytes, bytes]]:
+    """
+    Same as validate_clvm_and_signature, for several spend bundles. Their aggregate signatures are verified together,
+    which saves most of the pairings of the signatures. Returns an optional error and the NPCResult of each spend
+    bundle, in the same order, and the new pairings validated.
+    """
+    results: List[Tuple[Optional[Err], bytes]] = []
+    # index in results, pks, msgs and signature of the bundles passing CLVM validation
+    to_verify: List[Tuple[int, List[bytes48], List[bytes], G2Element]] = []
+    for spend_bundle_bytes in spend_bundles_bytes:
+        try:
+            bundle: SpendBundle = SpendBundle.from_bytes(spend_bundle_bytes)
+            program = simple_solution_generator(bundle)
+            # npc contains names of the coins removed, puzzle_hashes and their spend conditions
+            result: NPCResult = get_name_puzzle_conditions(
+                program, max_cost, cost_per_byte=cost_per_byte, mempool_mode=True
+            )
 
-        pks: List[bytes48] = []
-        msgs: List[bytes] = []
-        assert result.conds is not None
-        pks, msgs = pkm_pairs(result.conds, additional_data)
+            if result.error is not None:
+                results.append((Err(result.error), b""))
+                continue
+
+            pks: List[bytes48] = []
+            msgs: List[bytes] = []
+            assert result.conds is not None
+            pks, msgs = pkm_pairs(result.conds, additional_data)
+            to_verify.append((len(results), pks, msgs, bundle.aggregated_signature))
+            results.append((None, bytes(result)))
+        except ValidationError as e:
+            results.append((e.code, b""))
+        except Exception:
+            results.append((Err.UNKNOWN, b""))
+
+    # Verify aggregated signatures
+    cache: LRUCache = LRUCache(10000)
+    errors: List[Optional[Err]] = []
+    try:
+        valid = cached_bls.batch_aggregate_verify([(pks, msgs, sig) for _, pks, msgs, sig in to_verify], cache)
+        errors = [None if is_valid else Err.BAD_AGGREGATE_SIGNATURE for is_valid in valid]
+    except Exception:
+        # Some bundle has an invalid public key, it must not fail the others
+        errors = []
+        for _, pks, msgs, sig in to_verify:
+            try:
+                is_valid = cached_bls.aggregate_verify(pks, msgs, sig, True, cache)
+                errors.append(None if is_valid else Err.BAD_AGGREGATE_SIGNATURE)
+            except Exception:
+                errors.append(Err.UNKNOWN)
+    for (index, _, _, _), err in zip(to_verify, errors):
+        if err is not None:
+            results[index] = (err, b"")
 
-        # Verify aggregated signature
-        cache: LRUCache = LRUCache(10000)
-        if not cached_bls.aggregate_verify(pks, msgs, bundle.aggregated_signature, True, cache):
-            return Err.BAD_AGGREGATE_SIGNATURE, b"", {}
-        new_cache_entries: Dict[bytes, bytes] = {}
+    new_cache_entries: Dict[bytes, bytes] = {}
+    # With a shared pairing cache, the new pairings are already available to the parent process
+    if cached_bls.SHARED_CACHE is None:
         for k, v in cache.cache.items():
             new_cache_entries[k] = bytes(v)
-    except ValidationError as e:
-        return e.code, b"", {}
-    except Exception:
-        return Err.UNKNOWN, b"", {}
-
-    return None, bytes(result), new_cache_entries
+    return results, new_cache_entries
 
 
 class MempoolManager:
@@ -90,8 +137,8 @@ class MempoolManager:
     ):
         self.constants: ConsensusConstants = consensus_constants
 
-        # Keep track of seen spend_bundles
-        self.seen_bundle_hashes: Dict[bytes32, bytes32] = {}
+        # Keep track of seen spend_bundles, in insertion order so the oldest one can be evicted in constant time
+        self.seen_bundle_hashes: OrderedDict[bytes32, bytes32] = collections.OrderedDict()
 
         self.coin_store = coin_store
         self.lock = asyncio.Lock()
@@ -107,14 +154,33 @@ class MempoolManager:
         # Transactions that were unable to enter mempool, used for retry. (they were invalid)
         self.potential_cache = PendingTxCache(self.constants.MAX_BLOCK_COST_CLVM * 1)
         self.seen_cache_size = 10000
+
+        # Maximum number of unconfirmed mempool items a spend bundle can depend on (by spending their coins)
+        self.max_mempool_ancestors = 25
+
+        # Serialized NPCResults of spend bundles that passed CLVM and signature validation, keyed by spend bundle name.
+        # The same bundle is often received from several peers (or resubmitted) before it's confirmed, and the result
+        # of validate_clvm_and_signature does not depend on the peak, so we can skip the process pool round trip.
+        self.validation_cache_size = 1000
+        self.validation_cache: LRUCache = LRUCache(self.validation_cache_size)
+
+        # Spend bundles arriving close together are validated in batches, so their signatures can be verified together
+        # (see validate_clvm_and_signature_batch). A batch is sent to the pool when it's full, or when its first bundle
+        # has waited validation_batch_latency seconds.
+        self.validation_batch_size = 20
+        self.validation_batch_latency = 0.005
+        self._validation_batch: List[Tuple[bytes, asyncio.Future]] = []
+        self._validation_batch_timer: Optional[asyncio.TimerHandle] = None
+        # The batches being validated, by the task validating them
+        self._validation_batch_tasks: Dict[asyncio.Task, List[Tuple[bytes, asyncio.Future]]] = {}
         if single_threaded:
             self.pool = InlineExecutor()
         else:
             self.pool = ProcessPoolExecutor(
                 max_workers=2,
                 mp_context=multiprocessing_context,
-                initializer=setproctitle,
-                initargs=(f"{getproctitle()}_worker",),
+                initializer=_init_worker,
+                initargs=(f"{getproctitle()}_worker", cached_bls.create_shared_cache()),
             )
 
         # The mempool will correspond to a certain peak
@@ -122,6 +188,18 @@ class MempoolManager:
         self.mempool: Mempool = Mempool(self.mempool_max_total_cost)
 
     def shut_down(self):
+        if self._validation_batch_timer is not None:
+            self._validation_batch_timer.cancel()
+            self._validation_batch_timer = None
+        # Nothing will be validated anymore, so the callers waiting for a result are cancelled
+        batches = [self._validation_batch] + list(self._validation_batch_tasks.values())
+        self._validation_batch = []
+        for task in list(self._validation_batch_tasks.keys()):
+            task.cancel()
+        self._validation_batch_tasks.clear()
+        for batch in batches:
+            for _, future in batch:
+                future.cancel()
         self.pool.shutdown(wait=True)
 
     async def create_bundle_from_mempool(
@@ -139,22 +217,35 @@ class MempoolManager:
         spend_bundles: List[SpendBundle] = []
         removals = []
         additions = []
+        included: Set[bytes32] = set()
         broke_from_inner_loop = False
         log.info(f"Starting to make block, max cost: {self.constants.MAX_BLOCK_COST_CLVM}")
+        # Items are sorted by the fee per cost of their package (the item and its unconfirmed ancestors), and an item
+        # is always included together with its ancestors
         for dic in reversed(self.mempool.sorted_spends.values()):
             if broke_from_inner_loop:
                 break
             for item in dic.values():
-                log.info(f"Cumulative cost: {cost_sum}, fee per cost: {item.fee / item.cost}")
+                if item.name in included:
+                    continue
+                package: List[MempoolItem] = [
+                    ancestor for ancestor in self.mempool.get_ancestors({item.name}) if ancestor.name not in included
+                ]
+                package.append(item)
+                package_cost = sum(package_item.cost for package_item in package)
+                package_fee = sum(package_item.fee for package_item in package)
+                log.info(f"Cumulative cost: {cost_sum}, fee per cost: {package_fee / package_cost}")
                 if (
-                    item.cost + cost_sum <= self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM
-                    and item.fee + fee_sum <= self.constants.MAX_COIN_AMOUNT
+                    package_cost + cost_sum <= self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM
+                    and package_fee + fee_sum <= self.constants.MAX_COIN_AMOUNT
                 ):
-                    spend_bundles.append(item.spend_bundle)
-                    cost_sum += item.cost
-                    fee_sum += item.fee
-                    removals.extend(item.removals)
-                    additions.extend(item.additions)
+                    for package_item in package:
+                        spend_bundles.append(package_item.spend_bundle)
+                        removals.extend(package_item.removals)
+                        additions.extend(package_item.additions)
+                        included.add(package_item.name)
+                    cost_sum += package_cost
+                    fee_sum += package_fee
                 else:
                     broke_from_inner_loop = True
                     break
@@ -196,8 +287,7 @@ class MempoolManager:
     def add_and_maybe_pop_seen(self, spend_name: bytes32):
         self.seen_bundle_hashes[spend_name] = spend_name
         while len(self.seen_bundle_hashes) > self.seen_cache_size:
-            first_in = list(self.seen_bundle_hashes.keys())[0]
-            self.seen_bundle_hashes.pop(first_in)
+            self.seen_bundle_hashes.popitem(last=False)
 
     def seen(self, bundle_hash: bytes32) -> bool:
         """Return true if we saw this spendbundle recently"""
@@ -221,6 +311,15 @@ class MempoolManager:
     ) -> bool:
         conflicting_fees = 0
         conflicting_cost = 0
+        # The items spending coins of the conflicting items would be kicked out as well
+        descendants: Dict[bytes32, MempoolItem] = {}
+        for item in conflicting_items.values():
+            for descendant in self.mempool.get_descendants(item.name):
+                if descendant.name not in conflicting_items:
+                    descendants[descendant.name] = descendant
+        for item in descendants.values():
+            conflicting_fees += item.fee
+            conflicting_cost += item.cost
         for item in conflicting_items.values():
             conflicting_fees += item.fee
             conflicting_cost += item.cost
@@ -261,27 +360,107 @@ class MempoolManager:
         This runs in another process so we don't block the main thread
         """
         start_time = time.time()
+        previous_result_bytes: Optional[bytes] = self.validation_cache.get(spend_name)
+        if previous_result_bytes is not None:
+            log.debug(f"pre_validate_spendbundle using cached validation result for {spend_name}")
+            return NPCResult.from_bytes(previous_result_bytes)
+
         if new_spend_bytes is None:
             new_spend_bytes = bytes(new_spend)
 
-        err, cached_result_bytes, new_cache_entries = await asyncio.get_running_loop().run_in_executor(
-            self.pool,
-            validate_clvm_and_signature,
-            new_spend_bytes,
-            int(self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM),
-            self.constants.COST_PER_BYTE,
-            self.constants.AGG_SIG_ME_ADDITIONAL_DATA,
-        )
+        err, cached_result_bytes = await self._validate_in_batch(new_spend_bytes)
 
         if err is not None:
             raise ValidationError(err)
-        for cache_entry_key, cached_entry_value in new_cache_entries.items():
-            LOCAL_CACHE.put(cache_entry_key, GTElement.from_bytes(cached_entry_value))
+        self.validation_cache.put(spend_name, cached_result_bytes)
         ret = NPCResult.from_bytes(cached_result_bytes)
         end_time = time.time()
         log.debug(f"pre_validate_spendbundle took {end_time - start_time:0.4f} seconds for {spend_name}")
         return ret
 
+    async def _validate_in_batch(self, spend_bundle_bytes: bytes) -> Tuple[Optional[Err], bytes]:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._validation_batch.append((spend_bundle_bytes, future))
+        if len(self._validation_batch) >= self.validation_batch_size:
+            self._flush_validation_batch()
+        elif self._validation_batch_timer is None:
+            self._validation_batch_timer = asyncio.get_running_loop().call_later(
+                self.validation_batch_latency, self._flush_validation_batch
+            )
+        return await future
+
+    def _flush_validation_batch(self) -> None:
+        if self._validation_batch_timer is not None:
+            self._validation_batch_timer.cancel()
+            self._validation_batch_timer = None
+        batch = self._validation_batch
+        self._validation_batch = []
+        if len(batch) == 0:
+            return
+        task = asyncio.create_task(self._validate_batch(batch))
+        self._validation_batch_tasks[task] = batch
+        task.add_done_callback(lambda t: self._validation_batch_tasks.pop(t, None))
+
+    async def _validate_batch(self, batch: List[Tuple[bytes, asyncio.Future]]) -> None:
+        start_time = time.time()
+        try:
+            results, new_cache_entries = await asyncio.get_running_loop().run_in_executor(
+                self.pool,
+                validate_clvm_and_signature_batch,
+                [spend_bundle_bytes for spend_bundle_bytes, _ in batch],
+                int(self.limit_factor * self.constants.MAX_BLOCK_COST_CLVM),
+                self.constants.COST_PER_BYTE,
+                self.constants.AGG_SIG_ME_ADDITIONAL_DATA,
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for cache_entry_key, cached_entry_value in new_cache_entries.items():
+            LOCAL_CACHE.put(cache_entry_key, GTElement.from_bytes(cached_entry_value))
+        # The futures of cancelled callers are done already
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        log.debug(f"Validated a batch of {len(batch)} spend bundles in {time.time() - start_time:0.4f} seconds")
+
+    async def pre_validate_restored_items(
+        self, items: List[MempoolSnapshotItem]
+    ) -> List[Tuple[SpendBundle, NPCResult, bytes32]]:
+        """
+        Validates spend bundles restored from a mempool snapshot. The persisted NPCResults are used to drop the bundles
+        that spend coins which got spent while the node was down, the remaining ones are re-validated concurrently in
+        the process pool, even if the peak didn't change: the snapshot file is never trusted. Returns the ones that
+        are valid, ready to be passed to add_spendbundle.
+        """
+        removal_names: Set[bytes32] = set()
+        for item in items:
+            if item.npc_result.conds is not None:
+                removal_names.update(bytes32(spend.coin_id) for spend in item.npc_result.conds.spends)
+        spent_names: Set[bytes32] = {
+            record.name for record in await self.coin_store.get_coin_records(list(removal_names)) if record.spent
+        }
+
+        async def validate(item: MempoolSnapshotItem) -> Optional[Tuple[SpendBundle, NPCResult, bytes32]]:
+            spend_name = item.spend_bundle.name()
+            try:
+                npc_result = await self.pre_validate_spendbundle(item.spend_bundle, None, spend_name)
+            except ValidationError as e:
+                log.info(f"Dropping restored mempool item {spend_name}, error: {e.code}")
+                return None
+            return item.spend_bundle, npc_result, spend_name
+
+        candidates: List[MempoolSnapshotItem] = [
+            item
+            for item in items
+            if item.npc_result.conds is not None
+            and all(bytes32(spend.coin_id) not in spent_names for spend in item.npc_result.conds.spends)
+        ]
+        results = await asyncio.gather(*[validate(item) for item in candidates])
+        return [result for result in results if result is not None]
+
     async def add_spendbundle(
         self,
         new_spend: SpendBundle,
@@ -357,17 +536,27 @@ class MempoolManager:
 
         removal_record_dict: Dict[bytes32, CoinRecord] = {}
         removal_amount: int = 0
+        # Mempool items whose additions this spend bundle spends
+        parent_names: Set[bytes32] = set()
         for name in removal_names:
             removal_record = await self.coin_store.get_coin_record(name)
-            if removal_record is None and name not in additions_dict:
+            if removal_record is None and name not in additions_dict and name not in self.mempool.additions:
                 return None, MempoolInclusionStatus.FAILED, Err.UNKNOWN_UNSPENT
-            elif name in additions_dict:
-                removal_coin = additions_dict[name]
+            elif removal_record is None or name in additions_dict:
+                if name in additions_dict:
+                    removal_coin = additions_dict[name]
+                else:
+                    # A coin created by another spend bundle in the mempool
+                    parent_item: MempoolItem = self.mempool.additions[name]
+                    parent_names.add(parent_item.name)
+                    removal_coin = next(coin for coin in parent_item.additions if coin.name() == name)
                 # The timestamp and block-height of this coin being spent needs
                 # to be consistent with what we use to check time-lock
                 # conditions (below). All spends (including ephemeral coins) are
                 # spent simultaneously. Ephemeral coins with an
                 # ASSERT_SECONDS_RELATIVE 0 condition are still OK to spend in
+                # the same block. Coins created by other mempool items are
+                # treated the same way, since at best they will be created in
                 # the same block.
                 assert self.peak.timestamp is not None
                 removal_record = CoinRecord(
@@ -384,6 +573,10 @@ class MempoolManager:
 
         removals: List[Coin] = [record.coin for record in removal_record_dict.values()]
 
+        ancestor_names: Set[bytes32] = parent_names | {item.name for item in self.mempool.get_ancestors(parent_names)}
+        if len(ancestor_names) > self.max_mempool_ancestors:
+            return None, MempoolInclusionStatus.FAILED, Err.MEMPOOL_CHAIN_TOO_LONG
+
         if addition_amount > removal_amount:
             return None, MempoolInclusionStatus.FAILED, Err.MINTING_COIN
 
@@ -403,9 +596,11 @@ class MempoolManager:
         fees_per_cost: float = fees / cost
         # If pool is at capacity check the fee, if not then accept even without the fee
         if self.mempool.at_full_capacity(cost):
+            if not self.mempool.fits_with_ancestors(cost, ancestor_names):
+                return None, MempoolInclusionStatus.FAILED, Err.MEMPOOL_IS_FULL
             if fees_per_cost < self.nonzero_fee_minimum_fpc:
                 return None, MempoolInclusionStatus.FAILED, Err.INVALID_FEE_TOO_CLOSE_TO_ZERO
-            if fees_per_cost <= self.mempool.get_min_fee_rate(cost):
+            if fees_per_cost <= self.mempool.get_min_fee_rate(cost, ancestor_names):
                 return None, MempoolInclusionStatus.FAILED, Err.INVALID_FEE_LOW_FEE
         # Check removals against UnspentDB + DiffStore + Mempool + SpendBundle
         # Use this information later when constructing a block
@@ -415,6 +610,9 @@ class MempoolManager:
         if fail_reason is Err.MEMPOOL_CONFLICT:
             for conflicting in conflicts:
                 sb: MempoolItem = self.mempool.removals[conflicting.name()]
+                if sb.name in ancestor_names:
+                    # Replacing an item we depend on would remove the coins we spend
+                    return None, MempoolInclusionStatus.FAILED, Err.MEMPOOL_CONFLICT
                 conflicting_pool_items[sb.name] = sb
             if not self.can_replace(conflicting_pool_items, removal_record_dict, fees, fees_per_cost):
                 potential = MempoolItem(
@@ -461,11 +659,16 @@ class MempoolManager:
             else:
                 return None, MempoolInclusionStatus.FAILED, error
 
-        # Remove all conflicting Coins and SpendBundles
+        # Remove all conflicting Coins and SpendBundles, along with the ones spending their coins
         if fail_reason:
             mempool_item: MempoolItem
             for mempool_item in conflicting_pool_items.values():
-                self.mempool.remove_from_pool(mempool_item)
+                if mempool_item.name not in self.mempool.spends:
+                    # already removed as a descendant of another conflicting item
+                    continue
+                for removed_item in self.mempool.remove_with_descendants(mempool_item):
+                    if removed_item.name not in conflicting_pool_items:
+                        self.remove_seen(removed_item.name)
 
         new_item = MempoolItem(new_spend, uint64(fees), npc_result, cost, spend_name, additions, removals, program)
         self.mempool.add_to_pool(new_item)
@@ -534,11 +737,18 @@ class MempoolManager:
         if use_optimization and last_npc_result is not None:
             # We don't reinitialize a mempool, just kick removed items
             if last_npc_result.conds is not None:
+                block_additions: Set[bytes32] = {coin.name() for coin in additions_for_npc(last_npc_result)}
                 for spend in last_npc_result.conds.spends:
                     if spend.coin_id in self.mempool.removals:
                         item = self.mempool.removals[bytes32(spend.coin_id)]
-                        self.mempool.remove_from_pool(item)
-                        self.remove_seen(item.spend_bundle_name)
+                        if all(coin.name() in block_additions for coin in item.additions):
+                            # The item was included in the block, the items spending its coins are still valid
+                            self.mempool.remove_from_pool(item)
+                            self.remove_seen(item.spend_bundle_name)
+                        else:
+                            # A conflicting spend was included, the coins the descendants spend will never exist
+                            for removed_item in self.mempool.remove_with_descendants(item):
+                                self.remove_seen(removed_item.spend_bundle_name)
         else:
             old_pool = self.mempool
             self.mempool = Mempool(self.mempool_max_total_cost)
@@ -0,0 +1,62 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import aiofiles
+
+from chia.consensus.cost_calculator import NPCResult
+from chia.full_node.mempool import Mempool
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.spend_bundle import SpendBundle
+from chia.util.files import write_file_async
+from chia.util.streamable import Streamable, streamable
+
+log = logging.getLogger(__name__)
+
+
+@streamable
+@dataclass(frozen=True)
+class MempoolSnapshotItem(Streamable):
+    spend_bundle: SpendBundle
+    npc_result: NPCResult
+
+
+@streamable
+@dataclass(frozen=True)
+class MempoolSnapshot(Streamable):
+    """
+    The content of the mempool, written to disk when the full node shuts down so it can be restored on startup.
+    """
+
+    peak_hash: bytes32
+    items: List[MempoolSnapshotItem]
+
+
+async def write_mempool_snapshot(snapshot_path: Path, mempool: Mempool, peak_hash: bytes32) -> None:
+    # in the order they were added, so items spending coins of other items are restored after them
+    items: List[MempoolSnapshotItem] = [
+        MempoolSnapshotItem(item.spend_bundle, item.npc_result) for item in mempool.spends.values()
+    ]
+    try:
+        await write_file_async(snapshot_path, bytes(MempoolSnapshot(peak_hash, items)))
+        log.info(f"Wrote {len(items)} mempool items to {snapshot_path}")
+    except Exception:
+        log.exception(f"Failed to write mempool snapshot to {snapshot_path}")
+
+
+async def read_mempool_snapshot(snapshot_path: Path) -> Optional[MempoolSnapshot]:
+    """
+    Reads and deletes the mempool snapshot. The snapshot is only valid for the shutdown that wrote it, so it's never
+    read twice.
+    """
+    if not snapshot_path.exists():
+        return None
+    try:
+        async with aiofiles.open(snapshot_path, "rb") as f:
+            snapshot = MempoolSnapshot.from_bytes(await f.read())
+    except Exception:
+        log.exception(f"Unable to read mempool snapshot from {snapshot_path}")
+        snapshot = None
+    snapshot_path.unlink()
+    return snapshot
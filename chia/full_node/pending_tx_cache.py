@@ -1,4 +1,5 @@
-from typing import Dict
+import collections
+from typing import Dict, OrderedDict
 
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.mempool_item import MempoolItem
@@ -7,12 +8,12 @@ from chia.types.mempool_item import MempoolItem
 class PendingTxCache:
     _cache_max_total_cost: int
     _cache_cost: int
-    _txs: Dict[bytes32, MempoolItem]
+    _txs: OrderedDict[bytes32, MempoolItem]
 
     def __init__(self, cost_limit: int):
         self._cache_max_total_cost = cost_limit
         self._cache_cost = 0
-        self._txs = {}
+        self._txs = collections.OrderedDict()
 
     def add(self, item: MempoolItem):
         """
@@ -26,13 +27,12 @@ class PendingTxCache:
         self._cache_cost += item.cost
 
         while self._cache_cost > self._cache_max_total_cost:
-            first_in = list(self._txs.keys())[0]
-            self._cache_cost -= self._txs[first_in].cost
-            self._txs.pop(first_in)
+            _, first_in = self._txs.popitem(last=False)
+            self._cache_cost -= first_in.cost
 
     def drain(self) -> Dict[bytes32, MempoolItem]:
         ret = self._txs
-        self._txs = {}
+        self._txs = collections.OrderedDict()
         self._cache_cost = 0
         return ret
 
@@ -0,0 +1,158 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from chia.full_node.generator import DESERIALIZE_MOD, create_generator_args
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.program import SerializedProgram
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.generator_types import BlockGenerator
+from chia.util.db_wrapper import DBWrapper2
+from chia.util.ints import uint32, uint64
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PuzzleSolutionOffsets:
+    """
+    Where the serialized puzzle and solution of a coin spend are found. The sources are indices into the generator
+    of the block followed by the generators it references (compressed generators take puzzles from those).
+    """
+
+    coin_id: bytes32
+    puzzle_source: int
+    puzzle_start: int
+    puzzle_end: int
+    solution_source: int
+    solution_start: int
+    solution_end: int
+
+    def get_puzzle_and_solution(self, generator: BlockGenerator) -> Tuple[SerializedProgram, SerializedProgram]:
+        sources = [generator.program] + generator.generator_refs
+        puzzle = bytes(sources[self.puzzle_source])[self.puzzle_start : self.puzzle_end]
+        solution = bytes(sources[self.solution_source])[self.solution_start : self.solution_end]
+        return SerializedProgram.from_bytes(puzzle), SerializedProgram.from_bytes(solution)
+
+
+def get_puzzle_solution_offsets(generator: BlockGenerator, max_cost: int) -> List[PuzzleSolutionOffsets]:
+    """
+    Runs the generator and looks up the serialized puzzle and solution of every coin spend in the serialized
+    generators. Any occurrence of the same bytes is the same program, so it doesn't matter which one is found. Spends
+    whose puzzle or solution don't appear verbatim in any generator are left out.
+    """
+    sources: List[bytes] = [bytes(generator.program)] + [bytes(g) for g in generator.generator_refs]
+    # spends tend to appear in the same order as in the generator, so each
+    # search resumes where the previous one ended
+    positions: List[int] = [0] * len(sources)
+
+    def find(blob: bytes) -> Optional[Tuple[int, int, int]]:
+        for source, buf in enumerate(sources):
+            start = buf.find(blob, positions[source])
+            if start == -1:
+                start = buf.find(blob)
+            if start != -1:
+                positions[source] = start + len(blob)
+                return source, start, start + len(blob)
+        return None
+
+    _, result = generator.program.run_with_cost(
+        max_cost, DESERIALIZE_MOD, create_generator_args(generator.generator_refs).first()
+    )
+    ret: List[PuzzleSolutionOffsets] = []
+    for spend in result.first().as_iter():
+        parent, puzzle, amount, solution = spend.as_iter()
+        coin_id = Coin(bytes32(parent.atom), puzzle.get_tree_hash(), uint64(amount.as_int())).name()
+        puzzle_location = find(bytes(puzzle))
+        solution_location = find(bytes(solution))
+        if puzzle_location is None or solution_location is None:
+            log.debug(f"puzzle or solution of {coin_id.hex()} not found in the generator")
+            continue
+        ret.append(PuzzleSolutionOffsets(coin_id, *puzzle_location, *solution_location))
+    return ret
+
+
+class PuzzleSolutionStore:
+    """
+    An optional index of where the puzzle and solution of each coin spend are found in the serialized generators of
+    a block, so they can be served to wallets without running the generator again. It's keyed by header hash, so
+    entries of blocks that are reorged out are never returned for the new block at the same height.
+    """
+
+    db_wrapper: DBWrapper2
+
+    @classmethod
+    async def create(cls, db_wrapper: DBWrapper2):
+        self = cls()
+        self.db_wrapper = db_wrapper
+
+        async with self.db_wrapper.write_db() as conn:
+            await conn.execute(
+                "CREATE TABLE IF NOT EXISTS puzzle_solutions("
+                "coin_id blob,"
+                "header_hash blob,"
+                "height bigint,"
+                "puzzle_source int,"
+                "puzzle_start int,"
+                "puzzle_end int,"
+                "solution_source int,"
+                "solution_start int,"
+                "solution_end int,"
+                "PRIMARY KEY(coin_id, header_hash))"
+            )
+            # the blocks that have been indexed, including the ones without any
+            # spends we could index
+            await conn.execute(
+                "CREATE TABLE IF NOT EXISTS puzzle_solution_blocks(header_hash blob PRIMARY KEY, height bigint)"
+            )
+            await conn.execute("CREATE INDEX IF NOT EXISTS puzzle_solution_height on puzzle_solutions(height)")
+        return self
+
+    async def is_block_indexed(self, header_hash: bytes32) -> bool:
+        async with self.db_wrapper.read_db() as conn:
+            async with conn.execute(
+                "SELECT 1 FROM puzzle_solution_blocks WHERE header_hash=?", (header_hash,)
+            ) as cursor:
+                return await cursor.fetchone() is not None
+
+    async def add_block(self, header_hash: bytes32, height: uint32, offsets: List[PuzzleSolutionOffsets]) -> None:
+        async with self.db_wrapper.write_db() as conn:
+            await conn.executemany(
+                "INSERT OR REPLACE INTO puzzle_solutions VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        o.coin_id,
+                        header_hash,
+                        height,
+                        o.puzzle_source,
+                        o.puzzle_start,
+                        o.puzzle_end,
+                        o.solution_source,
+                        o.solution_start,
+                        o.solution_end,
+                    )
+                    for o in offsets
+                ],
+            )
+            await conn.execute("INSERT OR REPLACE INTO puzzle_solution_blocks VALUES(?, ?)", (header_hash, height))
+
+    async def get_offsets(self, coin_id: bytes32, header_hash: bytes32) -> Optional[PuzzleSolutionOffsets]:
+        async with self.db_wrapper.read_db() as conn:
+            async with conn.execute(
+                "SELECT puzzle_source, puzzle_start, puzzle_end, solution_source, solution_start, solution_end "
+                "FROM puzzle_solutions WHERE coin_id=? AND header_hash=?",
+                (coin_id, header_hash),
+            ) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return PuzzleSolutionOffsets(coin_id, *row)
+
+    async def rollback(self, height: int) -> None:
+        """
+        Removes the entries of the blocks above the given height. They're never returned for the blocks replacing
+        them anyway, this only keeps the orphaned ones from piling up.
+        """
+        async with self.db_wrapper.write_db() as conn:
+            await conn.execute("DELETE FROM puzzle_solutions WHERE height>?", (height,))
+            await conn.execute("DELETE FROM puzzle_solution_blocks WHERE height>?", (height,))
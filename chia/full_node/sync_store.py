@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 from collections import OrderedDict as orderedDict
 from typing import Dict, List, Optional, OrderedDict, Set, Tuple
 
@@ -14,6 +15,7 @@ class SyncStore:
     sync_mode: bool
     long_sync: bool
     peak_to_peer: OrderedDict[bytes32, Set[bytes32]]  # Header hash : peer node id
+    peak_first_seen: Dict[bytes32, float]  # Header hash : when a peer first told us about it, for peak_to_peer
     peer_to_peak: Dict[bytes32, Tuple[bytes32, uint32, uint128]]  # peer node id : [header_hash, height, weight]
     sync_target_header_hash: Optional[bytes32]  # Peak hash we are syncing towards
     sync_target_height: Optional[uint32]  # Peak height we are syncing towards
@@ -31,6 +33,7 @@ class SyncStore:
         self.sync_target_height = None
         self.peak_fork_point = {}
         self.peak_to_peer = orderedDict()
+        self.peak_first_seen = {}
         self.peer_to_peak = {}
         self.peers_changed = asyncio.Event()
 
@@ -74,15 +77,23 @@ class SyncStore:
             self.peak_to_peer[header_hash].add(peer_id)
         else:
             self.peak_to_peer[header_hash] = {peer_id}
+            self.peak_first_seen[header_hash] = time.time()
             if len(self.peak_to_peer) > 256:  # nice power of two
                 item = self.peak_to_peer.popitem(last=False)  # Remove the oldest entry
                 # sync target hash is used throughout the sync process and should not be deleted.
                 if item[0] == self.sync_target_header_hash:
                     self.peak_to_peer[item[0]] = item[1]  # Put it back in if it was the sync target
-                    self.peak_to_peer.popitem(last=False)  # Remove the oldest entry again
+                    item = self.peak_to_peer.popitem(last=False)  # Remove the oldest entry again
+                self.peak_first_seen.pop(item[0], None)
         if new_peak:
             self.peer_to_peak[peer_id] = (header_hash, height, weight)
 
+    def get_peak_first_seen(self, header_hash: bytes32) -> Optional[float]:
+        """
+        Returns: when a peer first told us about the header hash, as a time.time() timestamp.
+        """
+        return self.peak_first_seen.get(header_hash)
+
     def get_peers_that_have_peak(self, header_hashes: List[bytes32]) -> Set[bytes32]:
         """
         Returns: peer ids of peers that have at least one of the header hashes.
@@ -133,6 +144,7 @@ class SyncStore:
         Clears the peak_to_peer info which can get quite large.
         """
         self.peak_to_peer = orderedDict()
+        self.peak_first_seen = {}
 
     def peer_disconnected(self, node_id: bytes32):
         if node_id in self.peer_to_peak:
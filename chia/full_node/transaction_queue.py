@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+
+from sortedcontainers import SortedList
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.transaction_queue_entry import TransactionQueueEntry
+
+
+class TransactionQueue:
+    """
+    Holds the transactions waiting to be validated and added to the mempool.
+
+    Locally submitted transactions (the ones without a peer, pushed through the RPC) are always handled first.
+    Transactions received from peers, full nodes and wallets alike, are kept in one queue per connection, ordered by the
+    fee per cost the peer declared in NewTransaction (wallets don't declare one), and the peers are served in round
+    robin. A peer that floods us can only fill up its own queue, so transactions from well-behaved peers are still
+    picked up after at most one transaction from each other peer. Since the declared fee only orders transactions
+    within the queue of the peer that declared it, lying about it doesn't help a peer.
+    """
+
+    def __init__(self, max_size: int, peer_max_size: int, log: logging.Logger):
+        self.max_size = max_size
+        self.peer_max_size = peer_max_size
+        self.log = log
+        self._local_queue: Deque[TransactionQueueEntry] = deque()
+        # peer_id: entries sorted by (priority, arrival). Lower priority values are handled first
+        self._peer_queues: Dict[bytes32, SortedList] = {}
+        # Round robin order of the peers that have a non-empty queue
+        self._peer_order: Deque[bytes32] = deque()
+        self._size = 0
+        self._counter = 0
+        self._item_added = asyncio.Event()
+        self.dropped: Counter = Counter()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def put(self, entry: TransactionQueueEntry, fee_per_cost: float = 0) -> bool:
+        """
+        Adds a transaction to the queue. Returns False if it was dropped. When the queue is full, a transaction from a
+        peer with a longer queue is evicted to make room, if there is one.
+        """
+        if entry.peer is None:
+            if len(self._local_queue) >= self.max_size:
+                self.dropped["local_queue_full"] += 1
+                return False
+            self._local_queue.append(entry)
+        else:
+            peer_id: bytes32 = entry.peer.peer_node_id
+            peer_queue: Optional[SortedList] = self._peer_queues.get(peer_id)
+            peer_queue_size = 0 if peer_queue is None else len(peer_queue)
+            if peer_queue_size >= self.peer_max_size:
+                self.dropped["peer_queue_full"] += 1
+                return False
+            if self._size >= self.max_size and not self._evict_from_longest_queue(peer_queue_size):
+                self.dropped["queue_full"] += 1
+                return False
+            if peer_queue is None:
+                peer_queue = SortedList()
+                self._peer_queues[peer_id] = peer_queue
+                self._peer_order.append(peer_id)
+            # Higher fee means priority is a smaller number, which means it will be handled earlier
+            self._counter += 1
+            peer_queue.add((-fee_per_cost, self._counter, entry))
+        self._size += 1
+        self._item_added.set()
+        return True
+
+    def _evict_from_longest_queue(self, peer_queue_size: int) -> bool:
+        longest_peer_id: Optional[bytes32] = None
+        longest_size = peer_queue_size + 1
+        for peer_id, peer_queue in self._peer_queues.items():
+            if len(peer_queue) > longest_size:
+                longest_peer_id = peer_id
+                longest_size = len(peer_queue)
+        if longest_peer_id is None:
+            return False
+        longest_queue = self._peer_queues[longest_peer_id]
+        longest_queue.pop(-1)
+        if len(longest_queue) == 0:
+            self._remove_peer(longest_peer_id)
+        self._size -= 1
+        self.dropped["evicted"] += 1
+        return True
+
+    def _remove_peer(self, peer_id: bytes32) -> None:
+        self._peer_queues.pop(peer_id)
+        self._peer_order.remove(peer_id)
+
+    async def pop(self) -> TransactionQueueEntry:
+        while self._size == 0:
+            self._item_added.clear()
+            await self._item_added.wait()
+        self._size -= 1
+        if len(self._local_queue) > 0:
+            return self._local_queue.popleft()
+        peer_id = self._peer_order.popleft()
+        peer_queue = self._peer_queues[peer_id]
+        _, _, entry = peer_queue.pop(0)
+        if len(peer_queue) == 0:
+            self._peer_queues.pop(peer_id)
+        else:
+            self._peer_order.append(peer_id)
+        return entry
+
+    def get_info(self) -> Dict:
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "local_size": len(self._local_queue),
+            "peer_count": len(self._peer_queues),
+            "largest_peer_queue": max((len(q) for q in self._peer_queues.values()), default=0),
+            "dropped": dict(self.dropped),
+        }
@@ -17,6 +17,9 @@ Note: When changing this file, also change protocol_message_types.py
 # These are passed in as uint16 into the Handshake
 class Capability(IntEnum):
     BASE = 1  # Base capability just means it supports the chia protocol at mainnet
+    # Messages above a size threshold can be sent compressed with zstd (see chia/server/compression.py). It's far
+    # from the ids assigned in sequence upstream (2 is BLOCK_HEADERS there), so no other peer means something else.
+    ZSTD_COMPRESSION = 0x7A01
 
 
 @streamable
@@ -3,19 +3,18 @@ from typing import Any, Callable, Dict, List, Optional
 from chia.consensus.block_record import BlockRecord
 from chia.consensus.pos_quality import UI_ACTUAL_SPACE_CONSTANT_FACTOR
 from chia.full_node.full_node import FullNode
-from chia.full_node.mempool_check_conditions import get_puzzle_and_solution_for_coin
-from chia.types.blockchain_format.program import Program, SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.coin_record import CoinRecord
 from chia.types.coin_spend import CoinSpend
 from chia.types.full_block import FullBlock
-from chia.types.generator_types import BlockGenerator
 from chia.types.mempool_inclusion_status import MempoolInclusionStatus
 from chia.types.spend_bundle import SpendBundle
+from chia.types.transaction_queue_entry import TransactionQueueEntry
 from chia.types.unfinished_header_block import UnfinishedHeaderBlock
 from chia.util.byte_types import hexstr_to_bytes
 from chia.util.ints import uint32, uint64, uint128
 from chia.util.log_exceptions import log_exceptions
+from chia.util.streamable_view import StreamableView
 from chia.util.ws_message import WsRpcMessage, create_payload_dict
 
 
@@ -61,6 +60,7 @@ class FullNodeRpcApi:
             "/get_all_mempool_tx_ids": self.get_all_mempool_tx_ids,
             "/get_all_mempool_items": self.get_all_mempool_items,
             "/get_mempool_item_by_tx_id": self.get_mempool_item_by_tx_id,
+            "/get_transaction_queue_info": self.get_transaction_queue_info,
         }
 
     async def _state_changed(self, change: str, change_data: Dict[str, Any] = None) -> List[WsRpcMessage]:
@@ -312,7 +312,7 @@ class FullNodeRpcApi:
             raise ValueError("No header_hash in request")
         header_hash = bytes32.from_hexstr(request["header_hash"])
 
-        block: Optional[FullBlock] = await self.service.block_store.get_full_block(header_hash)
+        block: Optional[StreamableView[FullBlock]] = await self.service.block_store.get_full_block_view(header_hash)
         if block is None:
             raise ValueError(f"Block {header_hash.hex()} not found")
 
@@ -335,7 +335,8 @@ class FullNodeRpcApi:
         block_range = []
         for a in range(start, end):
             block_range.append(uint32(a))
-        blocks: List[FullBlock] = await self.service.block_store.get_full_blocks_at(block_range)
+        # only the foliage and the reward chain block of the blocks that are left out are decoded
+        blocks: List[StreamableView[FullBlock]] = await self.service.block_store.get_full_block_views_at(block_range)
         json_blocks = []
         for block in blocks:
             hh: bytes32 = block.header_hash
@@ -631,8 +632,14 @@ class FullNodeRpcApi:
             status = MempoolInclusionStatus.SUCCESS
             error = None
         else:
-            status, error = await self.service.respond_transaction(spend_bundle, spend_name)
-            if status != MempoolInclusionStatus.SUCCESS:
+            # Local transactions are handled before the ones from peers
+            entry = TransactionQueueEntry(spend_bundle, None, spend_name, None, False)
+            if not self.service.transaction_queue.put(entry):
+                raise ValueError(f"Failed to include transaction {spend_name}, the transaction queue is full")
+            status, error = await self.service.wait_for_transaction_response(spend_name)
+            if status is None:
+                status = MempoolInclusionStatus.PENDING
+            elif status != MempoolInclusionStatus.SUCCESS:
                 if self.service.mempool_manager.get_spendbundle(spend_name) is not None:
                     # Already in mempool
                     status = MempoolInclusionStatus.SUCCESS
@@ -659,16 +666,11 @@ class FullNodeRpcApi:
         if block is None or block.transactions_generator is None:
             raise ValueError("Invalid block or block generator")
 
-        block_generator: Optional[BlockGenerator] = await self.service.blockchain.get_block_generator(block)
-        assert block_generator is not None
-        error, puzzle, solution = get_puzzle_and_solution_for_coin(
-            block_generator, coin_name, self.service.constants.MAX_BLOCK_COST_CLVM
-        )
+        error, puzzle_ser, solution_ser = await self.service.get_puzzle_and_solution(coin_name, block)
         if error is not None:
             raise ValueError(f"Error: {error}")
 
-        puzzle_ser: SerializedProgram = SerializedProgram.from_program(Program.to(puzzle))
-        solution_ser: SerializedProgram = SerializedProgram.from_program(Program.to(solution))
+        assert puzzle_ser is not None and solution_ser is not None
         return {"coin_solution": CoinSpend(coin_record.coin, puzzle_ser, solution_ser)}
 
     async def get_additions_and_removals(self, request: Dict) -> Optional[Dict]:
@@ -711,3 +713,6 @@ class FullNodeRpcApi:
             raise ValueError(f"Tx id 0x{tx_id.hex()} not in the mempool")
 
         return {"mempool_item": item}
+
+    async def get_transaction_queue_info(self, request: Dict) -> Optional[Dict]:
+        return {"transaction_queue": self.service.transaction_queue.get_info()}
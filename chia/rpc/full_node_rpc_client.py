@@ -228,6 +228,10 @@ class FullNodeRpcClient(RpcClient):
         except Exception:
             return None
 
+    async def get_transaction_queue_info(self) -> Dict:
+        response = await self.fetch("get_transaction_queue_info", {})
+        return response["transaction_queue"]
+
     async def get_recent_signage_point_or_eos(
         self, sp_hash: Optional[bytes32], challenge_hash: Optional[bytes32]
     ) -> Optional[Any]:
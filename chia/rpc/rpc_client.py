@@ -58,6 +58,21 @@ class RpcClient:
             connection["node_id"] = hexstr_to_bytes(connection["node_id"])
         return response["connections"]
 
+    async def get_message_metrics(self) -> Dict:
+        response = await self.fetch("get_message_metrics", {})
+        return response["message_metrics"]
+
+    async def get_loop_lag(self) -> Dict:
+        response = await self.fetch("get_loop_lag", {})
+        return response["loop_lag"]
+
+    async def set_loop_lag_monitor(self, enabled: bool, threshold: Optional[float] = None) -> Dict:
+        request: Dict[str, Any] = {"enabled": enabled}
+        if threshold is not None:
+            request["threshold"] = threshold
+        response = await self.fetch("set_loop_lag_monitor", request)
+        return response["loop_lag"]
+
     async def open_connection(self, host: str, port: int) -> Dict:
         return await self.fetch("open_connection", {"host": host, "port": int(port)})
 
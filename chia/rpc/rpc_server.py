@@ -14,6 +14,7 @@ from chia.types.peer_info import PeerInfo
 from chia.util.byte_types import hexstr_to_bytes
 from chia.util.ints import uint16
 from chia.util.json_util import dict_to_json_str
+from chia.util.loop_monitor import LoopLagMonitor
 from chia.util.ws_message import create_payload, create_payload_dict, format_response, pong
 
 log = logging.getLogger(__name__)
@@ -25,8 +26,17 @@ class RpcServer:
     Implementation of RPC server.
     """
 
-    def __init__(self, rpc_api: Any, service_name: str, stop_cb: Callable, root_path, net_config):
+    def __init__(
+        self,
+        rpc_api: Any,
+        service_name: str,
+        stop_cb: Callable,
+        root_path,
+        net_config,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+    ):
         self.rpc_api = rpc_api
+        self.loop_monitor = loop_monitor
         self.stop_cb: Callable = stop_cb
         self.log = log
         self.shut_down = False
@@ -90,6 +100,9 @@ class RpcServer:
         return {
             **self.rpc_api.get_routes(),
             "/get_connections": self.get_connections,
+            "/get_message_metrics": self.get_message_metrics,
+            "/get_loop_lag": self.get_loop_lag,
+            "/set_loop_lag_monitor": self.set_loop_lag_monitor,
             "/open_connection": self.open_connection,
             "/close_connection": self.close_connection,
             "/stop_node": self.stop_node,
@@ -138,6 +151,8 @@ class RpcServer:
                     "peak_height": peak_height,
                     "peak_weight": peak_weight,
                     "peak_hash": peak_hash,
+                    "outbound_queue": con.outgoing_queue.get_metrics(),
+                    "performance": con.performance.get_metrics(),
                 }
                 con_info.append(con_dict)
         else:
@@ -154,11 +169,47 @@ class RpcServer:
                     "bytes_read": con.bytes_read,
                     "bytes_written": con.bytes_written,
                     "last_message_time": con.last_message_time,
+                    "outbound_queue": con.outgoing_queue.get_metrics(),
+                    "performance": con.performance.get_metrics(),
                 }
                 for con in connections
             ]
         return {"connections": con_info}
 
+    async def get_message_metrics(self, request: Dict) -> Dict:
+        if self.rpc_api.service.server is None:
+            raise ValueError("Global connections is not set")
+        return {"message_metrics": self.rpc_api.service.server.message_metrics.get_metrics()}
+
+    async def get_loop_lag(self, request: Dict) -> Dict:
+        if self.loop_monitor is None:
+            raise ValueError("Event loop lag monitor is not available")
+        return {"loop_lag": self.loop_monitor.get_stats()}
+
+    async def set_loop_lag_monitor(self, request: Dict) -> Dict:
+        """
+        Turns the event loop lag monitor on or off, and optionally changes the lag, in seconds, above which the stack
+        of the event loop is logged.
+        """
+        if self.loop_monitor is None:
+            raise ValueError("Event loop lag monitor is not available")
+        if "threshold" in request:
+            self.loop_monitor.threshold = float(request["threshold"])
+        if request["enabled"]:
+            self.loop_monitor.start()
+        else:
+            self.loop_monitor.stop()
+        return {"loop_lag": self.loop_monitor.get_stats()}
+
+    async def prometheus_metrics(self, request: web.Request) -> web.Response:
+        """
+        Serves the message metrics of the service in the Prometheus text format, on GET /metrics.
+        """
+        if self.rpc_api.service.server is None:
+            raise web.HTTPServiceUnavailable()
+        text = self.rpc_api.service.server.message_metrics.to_prometheus(self.service_name)
+        return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
     async def open_connection(self, request: Dict):
         host = request["host"]
         port = request["port"]
@@ -310,6 +361,7 @@ async def start_rpc_server(
     connect_to_daemon=True,
     max_request_body_size=None,
     name: str = "rpc_server",
+    loop_monitor: Optional[LoopLagMonitor] = None,
 ) -> Tuple[Callable[[], Awaitable[None]], uint16]:
     """
     Starts an HTTP server with the following RPC methods, to be used by local clients to
@@ -319,9 +371,10 @@ async def start_rpc_server(
         if max_request_body_size is None:
             max_request_body_size = 1024 ** 2
         app = web.Application(client_max_size=max_request_body_size)
-        rpc_server = RpcServer(rpc_api, rpc_api.service_name, stop_cb, root_path, net_config)
+        rpc_server = RpcServer(rpc_api, rpc_api.service_name, stop_cb, root_path, net_config, loop_monitor)
         rpc_server.rpc_api.service._set_state_changed_callback(rpc_server.state_changed)
         app.add_routes([web.post(route, wrap_http_handler(func)) for (route, func) in rpc_server.get_routes().items()])
+        app.add_routes([web.get("/metrics", rpc_server.prometheus_metrics)])
         if connect_to_daemon:
             daemon_connection = asyncio.create_task(rpc_server.connect_to_daemon(self_hostname, daemon_port))
         runner = web.AppRunner(app, access_log=None)
@@ -1,6 +1,7 @@
 import logging
 import math
 import time
+from array import array
 from asyncio import Lock
 from random import choice, randrange
 from secrets import randbits
@@ -24,6 +25,8 @@ HORIZON_DAYS = 30
 MAX_RETRIES = 3
 MIN_FAIL_DAYS = 7
 MAX_FAILURES = 10
+# The selection chance of an address after each failed attempt, it stops going down after 8 of them
+ATTEMPT_CHANCES = [pow(0.66, n) for n in range(9)]
 
 log = logging.getLogger(__name__)
 
@@ -152,26 +155,87 @@ class ExtendedPeerInfo:
 
         # deprioritize 66% after each failed attempt,
         # but at most 1/28th to avoid the search taking forever or overly penalizing outages.
-        chance *= pow(0.66, min(self.num_attempts, 8))
+        chance *= ATTEMPT_CHANCES[min(self.num_attempts, 8)]
         return chance
 
 
+class BucketTable:
+    """
+    The new or tried table: bucket_count buckets of BUCKET_SIZE node ids, stored in a flat array with -1 for the
+    empty positions. The positions in use and the positions of each node are indexed as they change, so picking a
+    random entry or finding the buckets of a node doesn't scan the table.
+    """
+
+    def __init__(self, bucket_count: int) -> None:
+        self.bucket_count = bucket_count
+        self.node_ids = array("q", [-1]) * (bucket_count * BUCKET_SIZE)
+        # the indices in node_ids of the positions in use, in no particular order
+        self.used: List[int] = []
+        self.used_index: Dict[int, int] = {}
+        self.node_positions: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.used)
+
+    def get(self, bucket: int, pos: int) -> int:
+        return self.node_ids[bucket * BUCKET_SIZE + pos]
+
+    def set(self, bucket: int, pos: int, node_id: int) -> None:
+        index = bucket * BUCKET_SIZE + pos
+        old_id = self.node_ids[index]
+        if old_id == node_id:
+            return None
+        if old_id != -1:
+            positions = self.node_positions[old_id]
+            positions.remove(index)
+            if len(positions) == 0:
+                del self.node_positions[old_id]
+            if node_id == -1:
+                # move the last used position into the one that's freed
+                i = self.used_index.pop(index)
+                last = self.used.pop()
+                if last != index:
+                    self.used[i] = last
+                    self.used_index[last] = i
+        elif node_id != -1:
+            self.used_index[index] = len(self.used)
+            self.used.append(index)
+        if node_id != -1:
+            self.node_positions.setdefault(node_id, []).append(index)
+        self.node_ids[index] = node_id
+
+    def random_node(self) -> int:
+        return self.node_ids[self.used[randrange(len(self.used))]]
+
+    def positions_of(self, node_id: int) -> List[Tuple[int, int]]:
+        """
+        Returns the (bucket, position) pairs holding the node.
+        """
+        return [divmod(index, BUCKET_SIZE) for index in self.node_positions.get(node_id, [])]
+
+    def entries(self) -> List[Tuple[int, int]]:
+        """
+        Returns the (node id, bucket) pairs of the positions in use, in table order.
+        """
+        return [(self.node_ids[index], index // BUCKET_SIZE) for index in sorted(self.used)]
+
+
 # This is a Python port from 'CAddrMan' class from Bitcoin core code.
 class AddressManager:
     id_count: int
     key: int
     random_pos: List[int]
-    tried_matrix: List[List[int]]
-    new_matrix: List[List[int]]
+    tried_table: BucketTable
+    new_table: BucketTable
     tried_count: int
     new_count: int
     map_addr: Dict[str, int]
     map_info: Dict[int, ExtendedPeerInfo]
     last_good: int
     tried_collisions: List[int]
-    used_new_matrix_positions: Set[Tuple[int, int]]
-    used_tried_matrix_positions: Set[Tuple[int, int]]
     allow_private_subnets: bool
+    # The hosts whose persisted data (peer info, tried or new buckets) changed since the last time they were saved
+    changed_hosts: Set[str]
 
     def __init__(self) -> None:
         self.clear()
@@ -181,53 +245,20 @@ class AddressManager:
         self.id_count = 0
         self.key = randbits(256)
         self.random_pos = []
-        self.tried_matrix = [[-1 for x in range(BUCKET_SIZE)] for y in range(TRIED_BUCKET_COUNT)]
-        self.new_matrix = [[-1 for x in range(BUCKET_SIZE)] for y in range(NEW_BUCKET_COUNT)]
+        self.tried_table = BucketTable(TRIED_BUCKET_COUNT)
+        self.new_table = BucketTable(NEW_BUCKET_COUNT)
         self.tried_count = 0
         self.new_count = 0
         self.map_addr = {}
         self.map_info = {}
         self.last_good = 1
         self.tried_collisions = []
-        self.used_new_matrix_positions = set()
-        self.used_tried_matrix_positions = set()
         self.allow_private_subnets = False
+        self.changed_hosts = set()
 
     def make_private_subnets_valid(self) -> None:
         self.allow_private_subnets = True
 
-    # Use only this method for modifying new matrix.
-    def _set_new_matrix(self, row: int, col: int, value: int) -> None:
-        self.new_matrix[row][col] = value
-        if value == -1:
-            if (row, col) in self.used_new_matrix_positions:
-                self.used_new_matrix_positions.remove((row, col))
-        else:
-            if (row, col) not in self.used_new_matrix_positions:
-                self.used_new_matrix_positions.add((row, col))
-
-    # Use only this method for modifying tried matrix.
-    def _set_tried_matrix(self, row: int, col: int, value: int) -> None:
-        self.tried_matrix[row][col] = value
-        if value == -1:
-            if (row, col) in self.used_tried_matrix_positions:
-                self.used_tried_matrix_positions.remove((row, col))
-        else:
-            if (row, col) not in self.used_tried_matrix_positions:
-                self.used_tried_matrix_positions.add((row, col))
-
-    def load_used_table_positions(self) -> None:
-        self.used_new_matrix_positions = set()
-        self.used_tried_matrix_positions = set()
-        for bucket in range(NEW_BUCKET_COUNT):
-            for pos in range(BUCKET_SIZE):
-                if self.new_matrix[bucket][pos] != -1:
-                    self.used_new_matrix_positions.add((bucket, pos))
-        for bucket in range(TRIED_BUCKET_COUNT):
-            for pos in range(BUCKET_SIZE):
-                if self.tried_matrix[bucket][pos] != -1:
-                    self.used_tried_matrix_positions.add((bucket, pos))
-
     def create_(self, addr: TimestampedPeerInfo, addr_src: Optional[PeerInfo]) -> Tuple[ExtendedPeerInfo, int]:
         self.id_count += 1
         node_id = self.id_count
@@ -235,6 +266,7 @@ class AddressManager:
         self.map_addr[addr.host] = node_id
         self.map_info[node_id].random_pos = len(self.random_pos)
         self.random_pos.append(node_id)
+        self.changed_hosts.add(addr.host)
         return (self.map_info[node_id], node_id)
 
     def find_(self, addr: PeerInfo) -> Tuple[Optional[ExtendedPeerInfo], Optional[int]]:
@@ -257,41 +289,42 @@ class AddressManager:
         self.random_pos[rand_pos_2] = node_id_1
 
     def make_tried_(self, info: ExtendedPeerInfo, node_id: int) -> None:
-        for bucket in range(NEW_BUCKET_COUNT):
-            pos = info.get_bucket_position(self.key, True, bucket)
-            if self.new_matrix[bucket][pos] == node_id:
-                self._set_new_matrix(bucket, pos, -1)
-                info.ref_count -= 1
+        for bucket, pos in self.new_table.positions_of(node_id):
+            self.new_table.set(bucket, pos, -1)
+            info.ref_count -= 1
         assert info.ref_count == 0
         self.new_count -= 1
         cur_bucket = info.get_tried_bucket(self.key)
         cur_bucket_pos = info.get_bucket_position(self.key, False, cur_bucket)
-        if self.tried_matrix[cur_bucket][cur_bucket_pos] != -1:
+        if self.tried_table.get(cur_bucket, cur_bucket_pos) != -1:
             # Evict the old node from the tried table.
-            node_id_evict = self.tried_matrix[cur_bucket][cur_bucket_pos]
+            node_id_evict = self.tried_table.get(cur_bucket, cur_bucket_pos)
             assert node_id_evict in self.map_info
             old_info = self.map_info[node_id_evict]
             old_info.is_tried = False
-            self._set_tried_matrix(cur_bucket, cur_bucket_pos, -1)
+            self.changed_hosts.add(old_info.peer_info.host)
+            self.tried_table.set(cur_bucket, cur_bucket_pos, -1)
             self.tried_count -= 1
             # Find its position into new table.
             new_bucket = old_info.get_new_bucket(self.key)
             new_bucket_pos = old_info.get_bucket_position(self.key, True, new_bucket)
             self.clear_new_(new_bucket, new_bucket_pos)
             old_info.ref_count = 1
-            self._set_new_matrix(new_bucket, new_bucket_pos, node_id_evict)
+            self.new_table.set(new_bucket, new_bucket_pos, node_id_evict)
             self.new_count += 1
-        self._set_tried_matrix(cur_bucket, cur_bucket_pos, node_id)
+        self.tried_table.set(cur_bucket, cur_bucket_pos, node_id)
         self.tried_count += 1
         info.is_tried = True
+        self.changed_hosts.add(info.peer_info.host)
 
     def clear_new_(self, bucket: int, pos: int) -> None:
-        if self.new_matrix[bucket][pos] != -1:
-            delete_id = self.new_matrix[bucket][pos]
+        delete_id = self.new_table.get(bucket, pos)
+        if delete_id != -1:
             delete_info = self.map_info[delete_id]
             assert delete_info.ref_count > 0
             delete_info.ref_count -= 1
-            self._set_new_matrix(bucket, pos, -1)
+            self.new_table.set(bucket, pos, -1)
+            self.changed_hosts.add(delete_info.peer_info.host)
             if delete_info.ref_count == 0:
                 self.delete_new_entry_(delete_id)
 
@@ -319,18 +352,8 @@ class AddressManager:
         if info.is_tried:
             return None
 
-        # find a bucket it is in now
-        bucket_rand = randrange(NEW_BUCKET_COUNT)
-        new_bucket = -1
-        for n in range(NEW_BUCKET_COUNT):
-            cur_new_bucket = (n + bucket_rand) % NEW_BUCKET_COUNT
-            cur_new_bucket_pos = info.get_bucket_position(self.key, True, cur_new_bucket)
-            if self.new_matrix[cur_new_bucket][cur_new_bucket_pos] == node_id:
-                new_bucket = cur_new_bucket
-                break
-
-        # if no bucket is found, something bad happened;
-        if new_bucket == -1:
+        # if it isn't in any new bucket, something bad happened;
+        if len(self.new_table.positions_of(node_id)) == 0:
             return None
 
         # NOTE(Florin): Double check this. It's not used anywhere else.
@@ -340,7 +363,7 @@ class AddressManager:
         tried_bucket_pos = info.get_bucket_position(self.key, False, tried_bucket)
 
         # Will moving this address into tried evict another entry?
-        if test_before_evict and self.tried_matrix[tried_bucket][tried_bucket_pos] != -1:
+        if test_before_evict and self.tried_table.get(tried_bucket, tried_bucket_pos) != -1:
             if len(self.tried_collisions) < TRIED_COLLISION_SIZE:
                 if node_id not in self.tried_collisions:
                     self.tried_collisions.append(node_id)
@@ -352,9 +375,10 @@ class AddressManager:
         if info is None or info.random_pos is None:
             return None
         self.swap_random_(info.random_pos, len(self.random_pos) - 1)
-        self.random_pos = self.random_pos[:-1]
+        self.random_pos.pop()
         del self.map_addr[info.peer_info.host]
         del self.map_info[node_id]
+        self.changed_hosts.add(info.peer_info.host)
         self.new_count -= 1
 
     def add_to_new_table_(self, addr: TimestampedPeerInfo, source: Optional[PeerInfo], penalty: int) -> bool:
@@ -377,6 +401,7 @@ class AddressManager:
                 info.timestamp > 0 or info.timestamp < addr.timestamp - update_interval - penalty
             ):
                 info.timestamp = max(0, addr.timestamp - penalty)
+                self.changed_hosts.add(info.peer_info.host)
 
             # do not update if no new information is present
             if addr.timestamp == 0 or (info.timestamp > 0 and addr.timestamp <= info.timestamp):
@@ -402,17 +427,19 @@ class AddressManager:
 
         new_bucket = info.get_new_bucket(self.key, source)
         new_bucket_pos = info.get_bucket_position(self.key, True, new_bucket)
-        if self.new_matrix[new_bucket][new_bucket_pos] != node_id:
-            add_to_new = self.new_matrix[new_bucket][new_bucket_pos] == -1
+        existing_id = self.new_table.get(new_bucket, new_bucket_pos)
+        if existing_id != node_id:
+            add_to_new = existing_id == -1
             if not add_to_new:
-                info_existing = self.map_info[self.new_matrix[new_bucket][new_bucket_pos]]
+                info_existing = self.map_info[existing_id]
                 if info_existing.is_terrible() or (info_existing.ref_count > 1 and info.ref_count == 0):
                     add_to_new = True
             if add_to_new:
                 self.clear_new_(new_bucket, new_bucket_pos)
                 info.ref_count += 1
                 if node_id is not None:
-                    self._set_new_matrix(new_bucket, new_bucket_pos, node_id)
+                    self.new_table.set(new_bucket, new_bucket_pos, node_id)
+                    self.changed_hosts.add(info.peer_info.host)
             else:
                 if info.ref_count == 0:
                     if node_id is not None:
@@ -441,62 +468,27 @@ class AddressManager:
 
         # Use a 50% chance for choosing between tried and new table entries.
         if not new_only and self.tried_count > 0 and (self.new_count == 0 or randrange(2) == 0):
-            chance = 1.0
-            start = time.time()
-            cached_tried_matrix_positions: List[Tuple[int, int]] = []
-            if len(self.used_tried_matrix_positions) < math.sqrt(TRIED_BUCKET_COUNT * BUCKET_SIZE):
-                cached_tried_matrix_positions = list(self.used_tried_matrix_positions)
-            while True:
-                if len(self.used_tried_matrix_positions) < math.sqrt(TRIED_BUCKET_COUNT * BUCKET_SIZE):
-                    if len(self.used_tried_matrix_positions) == 0:
-                        log.error(f"Empty tried table, but tried_count shows {self.tried_count}.")
-                        return None
-                    # The table is sparse, randomly pick from positions list.
-                    index = randrange(len(cached_tried_matrix_positions))
-                    tried_bucket, tried_bucket_pos = cached_tried_matrix_positions[index]
-                else:
-                    # The table is dense, randomly trying positions is faster than loading positions list.
-                    tried_bucket = randrange(TRIED_BUCKET_COUNT)
-                    tried_bucket_pos = randrange(BUCKET_SIZE)
-                    while self.tried_matrix[tried_bucket][tried_bucket_pos] == -1:
-                        tried_bucket = (tried_bucket + randbits(LOG_TRIED_BUCKET_COUNT)) % TRIED_BUCKET_COUNT
-                        tried_bucket_pos = (tried_bucket_pos + randbits(LOG_BUCKET_SIZE)) % BUCKET_SIZE
-
-                node_id = self.tried_matrix[tried_bucket][tried_bucket_pos]
-                assert node_id != -1
-                info = self.map_info[node_id]
-                if randbits(30) < (chance * info.get_selection_chance() * (1 << 30)):
-                    end = time.time()
-                    log.debug(f"address_manager.select_peer took {(end - start):.2e} seconds in tried table.")
-                    return info
-                chance *= 1.2
+            table = self.tried_table
+            table_name = "tried"
+            count = self.tried_count
         else:
-            chance = 1.0
-            start = time.time()
-            cached_new_matrix_positions: List[Tuple[int, int]] = []
-            if len(self.used_new_matrix_positions) < math.sqrt(NEW_BUCKET_COUNT * BUCKET_SIZE):
-                cached_new_matrix_positions = list(self.used_new_matrix_positions)
-            while True:
-                if len(self.used_new_matrix_positions) < math.sqrt(NEW_BUCKET_COUNT * BUCKET_SIZE):
-                    if len(self.used_new_matrix_positions) == 0:
-                        log.error(f"Empty new table, but new_count shows {self.new_count}.")
-                        return None
-                    index = randrange(len(cached_new_matrix_positions))
-                    new_bucket, new_bucket_pos = cached_new_matrix_positions[index]
-                else:
-                    new_bucket = randrange(NEW_BUCKET_COUNT)
-                    new_bucket_pos = randrange(BUCKET_SIZE)
-                    while self.new_matrix[new_bucket][new_bucket_pos] == -1:
-                        new_bucket = (new_bucket + randbits(LOG_NEW_BUCKET_COUNT)) % NEW_BUCKET_COUNT
-                        new_bucket_pos = (new_bucket_pos + randbits(LOG_BUCKET_SIZE)) % BUCKET_SIZE
-                node_id = self.new_matrix[new_bucket][new_bucket_pos]
-                assert node_id != -1
-                info = self.map_info[node_id]
-                if randbits(30) < chance * info.get_selection_chance() * (1 << 30):
-                    end = time.time()
-                    log.debug(f"address_manager.select_peer took {(end - start):.2e} seconds in new table.")
-                    return info
-                chance *= 1.2
+            table = self.new_table
+            table_name = "new"
+            count = self.new_count
+        if len(table) == 0:
+            log.error(f"Empty {table_name} table, but {table_name}_count shows {count}.")
+            return None
+
+        chance = 1.0
+        start = time.time()
+        now = int(math.floor(start))
+        while True:
+            info = self.map_info[table.random_node()]
+            if randbits(30) < chance * info.get_selection_chance(now) * (1 << 30):
+                end = time.time()
+                log.debug(f"address_manager.select_peer took {(end - start):.2e} seconds in {table_name} table.")
+                return info
+            chance *= 1.2
 
     def resolve_tried_collisions_(self) -> None:
         for node_id in self.tried_collisions[:]:
@@ -508,8 +500,8 @@ class AddressManager:
                 peer = info.peer_info
                 tried_bucket = info.get_tried_bucket(self.key)
                 tried_bucket_pos = info.get_bucket_position(self.key, False, tried_bucket)
-                if self.tried_matrix[tried_bucket][tried_bucket_pos] != -1:
-                    old_id = self.tried_matrix[tried_bucket][tried_bucket_pos]
+                old_id = self.tried_table.get(tried_bucket, tried_bucket_pos)
+                if old_id != -1:
                     old_info = self.map_info[old_id]
                     if time.time() - old_info.last_success < 4 * 60 * 60:
                         resolved = True
@@ -537,7 +529,7 @@ class AddressManager:
         tried_bucket = new_info.get_tried_bucket(self.key)
         tried_bucket_pos = new_info.get_bucket_position(self.key, False, tried_bucket)
 
-        old_id = self.tried_matrix[tried_bucket][tried_bucket_pos]
+        old_id = self.tried_table.get(tried_bucket, tried_bucket_pos)
         return self.map_info[old_id]
 
     def get_peers_(self) -> List[TimestampedPeerInfo]:
@@ -566,16 +558,16 @@ class AddressManager:
 
     def cleanup(self, max_timestamp_difference: int, max_consecutive_failures: int):
         now = int(math.floor(time.time()))
-        for bucket in range(NEW_BUCKET_COUNT):
-            for pos in range(BUCKET_SIZE):
-                if self.new_matrix[bucket][pos] != -1:
-                    node_id = self.new_matrix[bucket][pos]
-                    cur_info = self.map_info[node_id]
-                    if (
-                        cur_info.timestamp < now - max_timestamp_difference
-                        and cur_info.num_attempts >= max_consecutive_failures
-                    ):
-                        self.clear_new_(bucket, pos)
+        for index in sorted(self.new_table.used):
+            bucket, pos = divmod(index, BUCKET_SIZE)
+            node_id = self.new_table.get(bucket, pos)
+            if node_id != -1:
+                cur_info = self.map_info[node_id]
+                if (
+                    cur_info.timestamp < now - max_timestamp_difference
+                    and cur_info.num_attempts >= max_consecutive_failures
+                ):
+                    self.clear_new_(bucket, pos)
 
     def connect_(self, addr: PeerInfo, timestamp: int):
         info, _ = self.find_(addr)
@@ -589,6 +581,7 @@ class AddressManager:
         update_interval = 20 * 60
         if timestamp - info.timestamp > update_interval:
             info.timestamp = timestamp
+            self.changed_hosts.add(info.peer_info.host)
 
     async def size(self) -> int:
         async with self.lock:
@@ -1,10 +1,11 @@
 import aiofiles
 import asyncio
 import logging
+import os
+import sys
+from array import array
 
 from chia.server.address_manager import (
-    BUCKET_SIZE,
-    NEW_BUCKET_COUNT,
     NEW_BUCKETS_PER_ADDRESS,
     AddressManager,
     ExtendedPeerInfo,
@@ -20,6 +21,11 @@ from typing import Any, Dict, List, Optional, Tuple
 
 log = logging.getLogger(__name__)
 
+# The change log is compacted into a new snapshot once it's larger than this fraction of the peers file
+CHANGES_COMPACTION_RATIO = 0.5
+
+PeerData = Tuple[List[Tuple[str, str]], List[Tuple[int, str]], List[Tuple[int, int]]]
+
 
 @streamable
 @dataclass(frozen=True)
@@ -33,29 +39,170 @@ class PeerDataSerialization(Streamable):
     new_table: List[Tuple[uint64, uint64]]
 
 
+@streamable
+@dataclass(frozen=True)
+class PeerDataChange(Streamable):
+    """
+    The persisted data of a peer after it changed, appended to the change log kept next to the peers file. info is
+    None when the peer was removed from the address manager.
+    """
+
+    host: str
+    info: Optional[str]
+    is_tried: bool
+    new_buckets: List[uint64]
+
+
+def _stream_str(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return len(encoded).to_bytes(4, "big") + encoded
+
+
+def _parse_str(buf: memoryview, offset: int) -> Tuple[str, int]:
+    size = int.from_bytes(buf[offset : offset + 4], "big")
+    offset += 4
+    if offset + size > len(buf):
+        raise ValueError("Truncated peer data")
+    return str(buf[offset : offset + size], "utf-8"), offset + size
+
+
+def _stream_uint64_pairs(pairs: List[Tuple[int, int]]) -> bytes:
+    values = array("Q", [value for pair in pairs for value in pair])
+    assert values.itemsize == 8
+    if sys.byteorder == "little":
+        values.byteswap()
+    return len(pairs).to_bytes(4, "big") + values.tobytes()
+
+
+def _parse_uint64_pairs(buf: memoryview, offset: int) -> Tuple[List[Tuple[int, int]], int]:
+    count = int.from_bytes(buf[offset : offset + 4], "big")
+    offset += 4
+    end = offset + count * 16
+    if end > len(buf):
+        raise ValueError("Truncated peer data")
+    values = array("Q")
+    values.frombytes(buf[offset:end])
+    if sys.byteorder == "little":
+        values.byteswap()
+    return list(zip(values[::2], values[1::2])), end
+
+
 async def makePeerDataSerialization(
     metadata: List[Tuple[str, Any]], nodes: List[Tuple[int, ExtendedPeerInfo]], new_table: List[Tuple[int, int]]
 ) -> bytes:
     """
-    Create a PeerDataSerialization, adapting the provided collections
+    Serializes the peer data as a PeerDataSerialization. The new table, which is the bulk of it, is written as one
+    array instead of item by item.
     """
-    transformed_nodes: List[Tuple[uint64, str]] = []
-    transformed_new_table: List[Tuple[uint64, uint64]] = []
+    chunks: List[bytes] = [len(metadata).to_bytes(4, "big")]
+    for key, value in metadata:
+        chunks.append(_stream_str(key))
+        chunks.append(_stream_str(value))
 
+    chunks.append(len(nodes).to_bytes(4, "big"))
     for index, [node_id, peer_info] in enumerate(nodes):
-        transformed_nodes.append((uint64(node_id), peer_info.to_string()))
+        chunks.append(node_id.to_bytes(8, "big"))
+        chunks.append(_stream_str(peer_info.to_string()))
         # Come up to breathe for a moment
         if index % 1000 == 0:
             await asyncio.sleep(0)
 
-    for index, [node_id, bucket_id] in enumerate(new_table):
-        transformed_new_table.append((uint64(node_id), uint64(bucket_id)))
-        # Come up to breathe for a moment
-        if index % 1000 == 0:
-            await asyncio.sleep(0)
+    chunks.append(_stream_uint64_pairs(new_table))
+    return b"".join(chunks)
 
-    serialized_bytes: bytes = bytes(PeerDataSerialization(metadata, transformed_nodes, transformed_new_table))
-    return serialized_bytes
+
+def parsePeerDataSerialization(buf: bytes) -> PeerData:
+    """
+    Parses the metadata, nodes and new table of a serialized PeerDataSerialization, without creating the streamable
+    object and its ints.
+    """
+    view = memoryview(buf)
+    offset = 4
+    metadata: List[Tuple[str, str]] = []
+    for _ in range(int.from_bytes(view[0:4], "big")):
+        key, offset = _parse_str(view, offset)
+        value, offset = _parse_str(view, offset)
+        metadata.append((key, value))
+
+    nodes: List[Tuple[int, str]] = []
+    node_count = int.from_bytes(view[offset : offset + 4], "big")
+    offset += 4
+    for _ in range(node_count):
+        node_id = int.from_bytes(view[offset : offset + 8], "big")
+        info_str, offset = _parse_str(view, offset + 8)
+        nodes.append((node_id, info_str))
+
+    new_table, offset = _parse_uint64_pairs(view, offset)
+    if offset != len(view):
+        raise ValueError("Unexpected data after the peer data")
+    return metadata, nodes, new_table
+
+
+def makePeerDataChanges(address_manager: AddressManager) -> bytes:
+    """
+    Serializes the current data of the peers changed since the last time they were saved, as length prefixed
+    PeerDataChange records.
+    """
+    chunks: List[bytes] = []
+    for host in address_manager.changed_hosts:
+        info: Optional[ExtendedPeerInfo] = None
+        new_buckets: List[uint64] = []
+        node_id = address_manager.map_addr.get(host)
+        if node_id is not None and node_id in address_manager.map_info:
+            info = address_manager.map_info[node_id]
+            new_buckets = [uint64(bucket) for bucket, _ in address_manager.new_table.positions_of(node_id)]
+        if info is None or (not info.is_tried and len(new_buckets) == 0):
+            change = PeerDataChange(host, None, False, [])
+        else:
+            change = PeerDataChange(host, info.to_string(), info.is_tried, new_buckets)
+        record = bytes(change)
+        chunks.append(len(record).to_bytes(4, "big"))
+        chunks.append(record)
+    return b"".join(chunks)
+
+
+def applyPeerDataChanges(peer_data: PeerData, buf: bytes) -> Tuple[PeerData, int]:
+    """
+    Applies the records of a change log to the data of a peers file, and returns the result with the size of the
+    records that were applied. A truncated or corrupt record, from a write that was interrupted, ends the log.
+    """
+    metadata, nodes, new_table = peer_data
+    new_count = int(dict(metadata).get("new_count", 0))
+    # host -> (info, is_tried, new buckets)
+    peers: Dict[str, Tuple[str, bool, List[int]]] = {}
+    for node_id, info_str in nodes:
+        peers[info_str.split(" ")[0]] = (info_str, node_id >= new_count, [])
+    node_hosts: Dict[int, str] = {node_id: info_str.split(" ")[0] for node_id, info_str in nodes}
+    for node_id, bucket in new_table:
+        if node_id in node_hosts and node_id < new_count:
+            peers[node_hosts[node_id]][2].append(bucket)
+
+    offset = 0
+    while offset < len(buf):
+        size = int.from_bytes(buf[offset : offset + 4], "big")
+        if offset + 4 + size > len(buf):
+            log.warning("Ignoring a truncated record at the end of the peers change log")
+            break
+        try:
+            change = PeerDataChange.from_bytes(buf[offset + 4 : offset + 4 + size])
+        except Exception:
+            log.warning("Ignoring the rest of the peers change log after a corrupt record")
+            break
+        offset += 4 + size
+        if change.info is None:
+            peers.pop(change.host, None)
+        else:
+            peers[change.host] = (change.info, change.is_tried, [int(bucket) for bucket in change.new_buckets])
+
+    new_nodes = [(info_str, buckets) for info_str, is_tried, buckets in peers.values() if not is_tried]
+    tried_nodes = [info_str for info_str, is_tried, _ in peers.values() if is_tried]
+    metadata = [(key, value) for key, value in metadata if key not in ("new_count", "tried_count")]
+    metadata.append(("new_count", str(len(new_nodes))))
+    metadata.append(("tried_count", str(len(tried_nodes))))
+    nodes = [(node_id, info_str) for node_id, (info_str, _) in enumerate(new_nodes)]
+    nodes.extend((len(new_nodes) + index, info_str) for index, info_str in enumerate(tried_nodes))
+    new_table = [(node_id, bucket) for node_id, (_, buckets) in enumerate(new_nodes) for bucket in buckets]
+    return (metadata, nodes, new_table), offset
 
 
 class AddressManagerStore:
@@ -71,10 +218,17 @@ class AddressManagerStore:
     New table:
     * Stores node_id, bucket for each occurrence in the new table of an entry.
     * Once we know the buckets, we can also deduce the bucket positions.
-    Every other information, such as tried_matrix, map_addr, map_info, random_pos,
+    Every other information, such as the tried table, map_addr, map_info, random_pos,
     be deduced and it is not explicitly stored, instead it is recalculated.
+    Change log:
+    * The peers changed since the peers file was written, appended as PeerDataChange records to a file next to it.
+    * Loading replays it on top of the peers file, and it's compacted into a new peers file once it grows too large.
     """
 
+    @classmethod
+    def changes_file_path(cls, peers_file_path: Path) -> Path:
+        return peers_file_path.with_name(peers_file_path.name + ".log")
+
     @classmethod
     async def create_address_manager(cls, peers_file_path: Path) -> AddressManager:
         """
@@ -94,10 +248,37 @@ class AddressManagerStore:
 
         return address_manager
 
+    @classmethod
+    async def save_changes(cls, address_manager: AddressManager, peers_file_path: Path) -> None:
+        """
+        Append the peers changed since the last save to the change log, or write a new peers file if the change log
+        got too large compared to it.
+        """
+        changes_file_path = cls.changes_file_path(peers_file_path)
+        try:
+            peers_file_size = peers_file_path.stat().st_size
+            changes_file_size = changes_file_path.stat().st_size if changes_file_path.exists() else 0
+        except FileNotFoundError:
+            await cls.serialize(address_manager, peers_file_path)
+            return None
+        if changes_file_size > peers_file_size * CHANGES_COMPACTION_RATIO:
+            await cls.serialize(address_manager, peers_file_path)
+            return None
+
+        serialized_changes: bytes = makePeerDataChanges(address_manager)
+        try:
+            start_time = timer()
+            async with aiofiles.open(changes_file_path, "ab") as f:
+                await f.write(serialized_changes)
+            log.debug(f"Saving {len(address_manager.changed_hosts)} changed peers took {timer() - start_time} seconds")
+            address_manager.changed_hosts.clear()
+        except Exception:
+            log.exception(f"Failed to write peer changes to {changes_file_path}")
+
     @classmethod
     async def serialize(cls, address_manager: AddressManager, peers_file_path: Path) -> None:
         """
-        Serialize the address manager's peer data to a file.
+        Serialize the address manager's peer data to a file, which replaces the change log.
         """
         metadata: List[Tuple[str, str]] = []
         nodes: List[Tuple[int, ExtendedPeerInfo]] = []
@@ -126,17 +307,18 @@ class AddressManagerStore:
                 tried_ids += 1
         metadata.append(("tried_count", str(tried_ids)))
 
-        for bucket in range(NEW_BUCKET_COUNT):
-            for i in range(BUCKET_SIZE):
-                if address_manager.new_matrix[bucket][i] != -1:
-                    index = unique_ids[address_manager.new_matrix[bucket][i]]
-                    new_table_entries.append((index, bucket))
+        for node_id, bucket in address_manager.new_table.entries():
+            new_table_entries.append((unique_ids[node_id], bucket))
 
         try:
             # Ensure the parent directory exists
             mkdir(peers_file_path.parent)
             start_time = timer()
             await cls._write_peers(peers_file_path, metadata, nodes, new_table_entries)
+            changes_file_path = cls.changes_file_path(peers_file_path)
+            if changes_file_path.exists():
+                changes_file_path.unlink()
+            address_manager.changed_hosts.clear()
             log.debug(f"Serializing peer data took {timer() - start_time} seconds")
         except Exception:
             log.exception(f"Failed to write peer data to {peers_file_path}")
@@ -146,7 +328,7 @@ class AddressManagerStore:
         """
         Create an address manager using data deserialized from a peers file.
         """
-        peer_data: Optional[PeerDataSerialization] = None
+        peer_data: Optional[PeerData] = None
         address_manager = AddressManager()
         start_time = timer()
         try:
@@ -154,12 +336,24 @@ class AddressManagerStore:
         except Exception:
             log.exception(f"Unable to deserialize peers from {peers_file_path}")
 
+        changes_file_path = cls.changes_file_path(peers_file_path)
+        if peer_data is not None and changes_file_path.exists():
+            try:
+                async with aiofiles.open(changes_file_path, "rb") as f:
+                    changes = await f.read()
+                peer_data, changes_size = applyPeerDataChanges(peer_data, changes)
+                if changes_size < len(changes):
+                    # drop what's left of the interrupted write, new changes are appended after the valid ones
+                    os.truncate(changes_file_path, changes_size)
+            except Exception:
+                log.exception(f"Unable to replay peer changes from {changes_file_path}")
+
         if peer_data is not None:
-            metadata: Dict[str, str] = {key: value for key, value in peer_data.metadata}
+            metadata: Dict[str, str] = {key: value for key, value in peer_data[0]}
             nodes: List[Tuple[int, ExtendedPeerInfo]] = [
-                (node_id, ExtendedPeerInfo.from_string(info_str)) for node_id, info_str in peer_data.nodes
+                (node_id, ExtendedPeerInfo.from_string(info_str)) for node_id, info_str in peer_data[1]
             ]
-            new_table_entries: List[Tuple[int, int]] = [(node_id, bucket) for node_id, bucket in peer_data.new_table]
+            new_table_entries: List[Tuple[int, int]] = peer_data[2]
             log.debug(f"Deserializing peer data took {timer() - start_time} seconds")
 
             address_manager.key = int(metadata["key"])
@@ -179,14 +373,14 @@ class AddressManagerStore:
             for node_id, info in tried_table_nodes:
                 tried_bucket = info.get_tried_bucket(address_manager.key)
                 tried_bucket_pos = info.get_bucket_position(address_manager.key, False, tried_bucket)
-                if address_manager.tried_matrix[tried_bucket][tried_bucket_pos] == -1:
+                if address_manager.tried_table.get(tried_bucket, tried_bucket_pos) == -1:
                     info.random_pos = len(address_manager.random_pos)
                     info.is_tried = True
                     id_count = address_manager.id_count
                     address_manager.random_pos.append(id_count)
                     address_manager.map_info[id_count] = info
                     address_manager.map_addr[info.peer_info.host] = id_count
-                    address_manager.tried_matrix[tried_bucket][tried_bucket_pos] = id_count
+                    address_manager.tried_table.set(tried_bucket, tried_bucket_pos, id_count)
                     address_manager.id_count += 1
                     address_manager.tried_count += 1
                 # else:
@@ -198,27 +392,27 @@ class AddressManagerStore:
                     info = address_manager.map_info[node_id]
                     bucket_pos = info.get_bucket_position(address_manager.key, True, bucket)
                     if (
-                        address_manager.new_matrix[bucket][bucket_pos] == -1
+                        address_manager.new_table.get(bucket, bucket_pos) == -1
                         and info.ref_count < NEW_BUCKETS_PER_ADDRESS
                     ):
                         info.ref_count += 1
-                        address_manager.new_matrix[bucket][bucket_pos] = node_id
+                        address_manager.new_table.set(bucket, bucket_pos, node_id)
 
             for node_id, info in list(address_manager.map_info.items()):
                 if not info.is_tried and info.ref_count == 0:
                     address_manager.delete_new_entry_(node_id)
 
-            address_manager.load_used_table_positions()
+            address_manager.changed_hosts.clear()
 
         return address_manager
 
     @classmethod
-    async def _read_peers(cls, peers_file_path: Path) -> PeerDataSerialization:
+    async def _read_peers(cls, peers_file_path: Path) -> PeerData:
         """
-        Read the peers file and return the data as a PeerDataSerialization object.
+        Read the peers file and return the metadata, nodes and new table of the PeerDataSerialization in it.
         """
         async with aiofiles.open(peers_file_path, "rb") as f:
-            return PeerDataSerialization.from_bytes(await f.read())
+            return parsePeerDataSerialization(await f.read())
 
     @classmethod
     async def _write_peers(
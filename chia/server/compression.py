@@ -0,0 +1,85 @@
+from typing import Optional
+
+import zstd
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.rate_limits import DEFAULT_SETTINGS, rate_limits_other, rate_limits_tx
+
+# There's no message type 0, so a websocket frame starting with this byte is a zstd compressed message. They're only
+# sent to peers that advertised Capability.ZSTD_COMPRESSION. The prefix is followed by the type of the message, so the
+# size of the message can be checked against the limit of its type before decompressing it.
+COMPRESSED_FRAME_PREFIX = b"\x00"
+
+# Messages smaller than this aren't worth compressing
+COMPRESSION_THRESHOLD = 16 * 1024
+COMPRESSION_LEVEL = 3
+
+# The largest message we accept once decompressed, the same as the limit of the websocket
+MAX_DECOMPRESSED_SIZE = 50 * 1024 * 1024
+# The type and id that come before the data in an encoded message
+MESSAGE_HEADER_SIZE = 8
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def compress_message(encoded: bytes) -> bytes:
+    # a single thread, the message is compressed off the event loop already
+    return COMPRESSED_FRAME_PREFIX + encoded[:1] + zstd.compress(encoded, COMPRESSION_LEVEL, 1)
+
+
+def is_compressed_frame(frame: bytes) -> bool:
+    return frame[:1] == COMPRESSED_FRAME_PREFIX
+
+
+def max_decompressed_size(message_type: int) -> int:
+    try:
+        limits = rate_limits_tx.get(ProtocolMessageTypes(message_type))
+        if limits is None:
+            limits = rate_limits_other.get(ProtocolMessageTypes(message_type), DEFAULT_SETTINGS)
+    except ValueError:
+        limits = DEFAULT_SETTINGS
+    return min(limits.max_size + MESSAGE_HEADER_SIZE, MAX_DECOMPRESSED_SIZE)
+
+
+def zstd_content_size(buf: bytes) -> Optional[int]:
+    """
+    Returns the decompressed size written in the header of a zstd frame, or None if it's missing.
+    """
+    if len(buf) < 5 or buf[:4] != ZSTD_MAGIC:
+        raise ValueError("Not a zstd frame")
+    descriptor = buf[4]
+    size_flag = descriptor >> 6
+    single_segment = (descriptor >> 5) & 1
+    dict_id_size = [0, 1, 2, 4][descriptor & 3]
+    offset = 5 + (0 if single_segment else 1) + dict_id_size
+    if size_flag == 0:
+        if not single_segment:
+            return None
+        size_length = 1
+    else:
+        size_length = [0, 2, 4, 8][size_flag]
+    if len(buf) < offset + size_length:
+        raise ValueError("Truncated zstd frame header")
+    size = int.from_bytes(buf[offset : offset + size_length], "little")
+    if size_length == 2:
+        size += 256
+    return size
+
+
+def decompress_frame(frame: bytes) -> bytes:
+    """
+    Returns the encoded message in a compressed frame. The size it decompresses to is checked against the limit of
+    its type before decompressing, so a small frame can't make us allocate a lot of memory.
+    """
+    header_size = len(COMPRESSED_FRAME_PREFIX) + 1
+    if len(frame) < header_size:
+        raise ValueError("Truncated compressed frame")
+    message_type = frame[header_size - 1]
+    payload = frame[header_size:]
+    size = zstd_content_size(payload)
+    if size is None or size > max_decompressed_size(message_type):
+        raise ValueError(f"Invalid decompressed message size: {size}")
+    encoded = zstd.decompress(payload)
+    if encoded[:1] != bytes([message_type]):
+        raise ValueError("The type of the compressed message doesn't match its frame")
+    return encoded
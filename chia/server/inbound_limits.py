@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+from collections import Counter
+from typing import Any, AsyncIterator
+from typing import Counter as typing_Counter
+from typing import Dict, Optional, Tuple
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.outbound_queue import BULK_MESSAGES, CONSENSUS_MESSAGES, MessagePriority
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.loop_monitor import LoopLagMonitor
+
+# Requests whose responses are large or expensive to put together
+BULK_REQUESTS = {
+    ProtocolMessageTypes.request_proof_of_weight,
+    ProtocolMessageTypes.request_block,
+    ProtocolMessageTypes.request_blocks,
+    ProtocolMessageTypes.request_compact_vdf,
+    ProtocolMessageTypes.request_peers,
+    ProtocolMessageTypes.request_peers_introducer,
+    ProtocolMessageTypes.request_mempool_transactions,
+    ProtocolMessageTypes.request_header_blocks,
+    ProtocolMessageTypes.request_plots,
+}
+
+# Requests that are dropped when the event loop lags, since peers can do without an answer
+SHED_WHEN_LAGGING = {
+    ProtocolMessageTypes.request_peers,
+    ProtocolMessageTypes.request_peers_introducer,
+    ProtocolMessageTypes.request_mempool_transactions,
+}
+
+# Requests that are dropped when the event loop lags if the same peer already sent the same request, which is still
+# being handled
+DEDUPLICATED_WHEN_LAGGING = {
+    ProtocolMessageTypes.request_block,
+    ProtocolMessageTypes.request_blocks,
+}
+
+# The default number of messages of each class handled at the same time, in total and for each peer. Messages
+# beyond these wait for their turn.
+MAX_CONCURRENT_MESSAGES: Dict[str, int] = {"consensus": 100, "normal": 100, "bulk": 20}
+MAX_CONCURRENT_MESSAGES_PER_PEER: Dict[str, int] = {"consensus": 10, "normal": 10, "bulk": 4}
+# The default number of messages of each class from a peer that can be waiting or handled. Messages beyond these are
+# dropped when they arrive, so a flood never piles up tasks.
+MAX_QUEUED_MESSAGES_PER_PEER: Dict[str, int] = {"consensus": 100, "normal": 100, "bulk": 40}
+
+
+def inbound_message_priority(message_type: ProtocolMessageTypes) -> MessagePriority:
+    if message_type in CONSENSUS_MESSAGES:
+        return MessagePriority.CONSENSUS
+    if message_type in BULK_MESSAGES or message_type in BULK_REQUESTS:
+        return MessagePriority.BULK
+    return MessagePriority.NORMAL
+
+
+class InboundMessageLimiter:
+    """
+    Bounds the number of peer messages of each class (see MessagePriority) that are handled at the same time, in total
+    and for each peer, so a flood of messages can't pile up handlers on the event loop. Consensus messages have their
+    own limits, so they aren't held up by a peer downloading blocks.
+
+    Messages from a peer that already has too many waiting or being handled are dropped before a task is created for
+    them, and low-value requests are shed when the event loop lags by more than shed_requests_lag_seconds, as measured
+    by the loop lag monitor of the service. The limits are read from the max_concurrent_messages,
+    max_concurrent_messages_per_peer and max_queued_messages_per_peer sections of the service config.
+    """
+
+    def __init__(self, config: Dict[str, Any], loop_monitor: Optional[LoopLagMonitor] = None):
+        max_concurrent = {**MAX_CONCURRENT_MESSAGES, **config.get("max_concurrent_messages", {})}
+        max_per_peer = {**MAX_CONCURRENT_MESSAGES_PER_PEER, **config.get("max_concurrent_messages_per_peer", {})}
+        max_queued = {**MAX_QUEUED_MESSAGES_PER_PEER, **config.get("max_queued_messages_per_peer", {})}
+        self.max_concurrent: Dict[MessagePriority, int] = {
+            p: int(max_concurrent[p.name.lower()]) for p in MessagePriority
+        }
+        self.max_concurrent_per_peer: Dict[MessagePriority, int] = {
+            p: int(max_per_peer[p.name.lower()]) for p in MessagePriority
+        }
+        self.max_queued_per_peer: Dict[MessagePriority, int] = {
+            p: int(max_queued[p.name.lower()]) for p in MessagePriority
+        }
+        # 0 disables shedding
+        self.shed_lag: float = float(config.get("shed_requests_lag_seconds", 0.5))
+
+        self.semaphores: Dict[MessagePriority, asyncio.Semaphore] = {
+            p: asyncio.Semaphore(n) for p, n in self.max_concurrent.items()
+        }
+        self.peer_semaphores: Dict[bytes32, Dict[MessagePriority, asyncio.Semaphore]] = {}
+        # the number of messages of each class from each peer, which are waiting or being handled
+        self.queued: Dict[bytes32, typing_Counter[MessagePriority]] = {}
+        # the requests of each peer that can be deduplicated, which are waiting or being handled
+        self.in_flight: Dict[bytes32, typing_Counter[Tuple[ProtocolMessageTypes, bytes]]] = {}
+        self.loop_monitor = loop_monitor
+
+    def is_lagging(self) -> bool:
+        return self.shed_lag > 0 and self.loop_monitor is not None and self.loop_monitor.current_lag() > self.shed_lag
+
+    def admit(self, message_type: ProtocolMessageTypes, data: bytes, peer_id: bytes32) -> bool:
+        """
+        Returns False if the message should be dropped without being handled. Otherwise it's admitted, and release()
+        must be called once it's been handled.
+        """
+        priority = inbound_message_priority(message_type)
+        queued = self.queued.get(peer_id)
+        if queued is not None and queued[priority] >= self.max_queued_per_peer[priority]:
+            return False
+        if self.is_lagging():
+            if message_type in SHED_WHEN_LAGGING:
+                return False
+            if message_type in DEDUPLICATED_WHEN_LAGGING and self.in_flight.get(peer_id, {}).get(
+                (message_type, data), 0
+            ):
+                return False
+        self.queued.setdefault(peer_id, Counter())[priority] += 1
+        if message_type in DEDUPLICATED_WHEN_LAGGING:
+            self.in_flight.setdefault(peer_id, Counter())[(message_type, data)] += 1
+        return True
+
+    def release(self, message_type: ProtocolMessageTypes, data: bytes, peer_id: bytes32) -> None:
+        queued = self.queued.get(peer_id)
+        priority = inbound_message_priority(message_type)
+        if queued is not None and queued[priority] > 0:
+            queued[priority] -= 1
+        if message_type not in DEDUPLICATED_WHEN_LAGGING:
+            return None
+        in_flight = self.in_flight.get(peer_id)
+        if in_flight is None:
+            return None
+        in_flight[(message_type, data)] -= 1
+        if in_flight[(message_type, data)] <= 0:
+            del in_flight[(message_type, data)]
+
+    @contextlib.asynccontextmanager
+    async def limit(self, message_type: ProtocolMessageTypes, peer_id: bytes32) -> AsyncIterator[None]:
+        """
+        Waits until a message can be handled without going over the limits of its class.
+        """
+        priority = inbound_message_priority(message_type)
+        peer_semaphores = self.peer_semaphores.get(peer_id)
+        if peer_semaphores is None:
+            peer_semaphores = {p: asyncio.Semaphore(n) for p, n in self.max_concurrent_per_peer.items()}
+            self.peer_semaphores[peer_id] = peer_semaphores
+        # waiting on the peer first keeps a peer flooding us from taking up all the global slots
+        async with peer_semaphores[priority]:
+            async with self.semaphores[priority]:
+                yield
+
+    def peer_disconnected(self, peer_id: bytes32) -> None:
+        self.peer_semaphores.pop(peer_id, None)
+        self.queued.pop(peer_id, None)
+        self.in_flight.pop(peer_id, None)
@@ -0,0 +1,113 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+# The upper bounds, in seconds, of the buckets of the histograms of handler latencies
+LATENCY_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+
+@dataclass
+class MessageTypeMetrics:
+    received: int = 0
+    in_flight: int = 0
+    errors: int = 0
+    # dropped without being handled, because the event loop was lagging
+    shed: int = 0
+    bytes_in: int = 0
+    sent: int = 0
+    bytes_out: int = 0
+    # bucket_counts[i] is the number of calls that took at most LATENCY_BUCKETS[i], and the last one counts the
+    # slower calls. Unlike Prometheus buckets they aren't cumulative.
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    latency_sum: float = 0.0
+
+
+class MessageMetrics:
+    """
+    The number of messages of each protocol message type received and sent, the bytes they take, the number of
+    calls to their handler in progress and a histogram of how long these take, to find out which peer messages keep
+    the event loop busy. Message types are the names of ProtocolMessageTypes.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, MessageTypeMetrics] = {}
+
+    def _get(self, message_type: str) -> MessageTypeMetrics:
+        metrics = self.metrics.get(message_type)
+        if metrics is None:
+            metrics = MessageTypeMetrics()
+            self.metrics[message_type] = metrics
+        return metrics
+
+    def message_received(self, message_type: str, size: int) -> None:
+        metrics = self._get(message_type)
+        metrics.received += 1
+        metrics.bytes_in += size
+
+    def message_shed(self, message_type: str) -> None:
+        self._get(message_type).shed += 1
+
+    def message_sent(self, message_type: str, size: int) -> None:
+        metrics = self._get(message_type)
+        metrics.sent += 1
+        metrics.bytes_out += size
+
+    def call_started(self, message_type: str) -> None:
+        self._get(message_type).in_flight += 1
+
+    def call_finished(self, message_type: str, elapsed: float, error: bool = False) -> None:
+        metrics = self._get(message_type)
+        metrics.in_flight -= 1
+        if error:
+            metrics.errors += 1
+        metrics.bucket_counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        metrics.latency_sum += elapsed
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            message_type: {
+                "received": m.received,
+                "in_flight": m.in_flight,
+                "errors": m.errors,
+                "shed": m.shed,
+                "bytes_in": m.bytes_in,
+                "sent": m.sent,
+                "bytes_out": m.bytes_out,
+                "latency_buckets": [[bound, count] for bound, count in zip(LATENCY_BUCKETS, m.bucket_counts)]
+                + [["+Inf", m.bucket_counts[-1]]],
+                "latency_sum": m.latency_sum,
+            }
+            for message_type, m in sorted(self.metrics.items())
+        }
+
+    def to_prometheus(self, prefix: str) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format, with each metric name starting with prefix.
+        """
+        lines: List[str] = []
+
+        def add_counter(name: str, kind: str, help_text: str, attribute: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for message_type, m in sorted(self.metrics.items()):
+                lines.append(f'{prefix}_{name}{{message_type="{message_type}"}} {getattr(m, attribute)}')
+
+        add_counter("messages_received_total", "counter", "Messages received from peers.", "received")
+        add_counter("messages_in_flight", "gauge", "Calls to message handlers in progress.", "in_flight")
+        add_counter("message_errors_total", "counter", "Calls to message handlers that failed.", "errors")
+        add_counter("messages_shed_total", "counter", "Messages dropped because the event loop was lagging.", "shed")
+        add_counter("message_bytes_received_total", "counter", "Bytes of messages received from peers.", "bytes_in")
+        add_counter("messages_sent_total", "counter", "Messages sent to peers.", "sent")
+        add_counter("message_bytes_sent_total", "counter", "Bytes of messages sent to peers.", "bytes_out")
+
+        name = f"{prefix}_message_handler_seconds"
+        lines.append(f"# HELP {name} Time taken by message handlers.")
+        lines.append(f"# TYPE {name} histogram")
+        for message_type, m in sorted(self.metrics.items()):
+            cumulative = 0
+            for bound, count in zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], m.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{message_type="{message_type}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{message_type="{message_type}"}} {m.latency_sum}')
+            lines.append(f'{name}_count{{message_type="{message_type}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
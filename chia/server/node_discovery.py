@@ -15,6 +15,7 @@ from chia.server.address_manager import AddressManager, ExtendedPeerInfo
 from chia.server.address_manager_store import AddressManagerStore
 from chia.server.address_manager_sqlite_store import create_address_manager_from_db
 from chia.server.outbound_message import NodeType, make_msg
+from chia.server.peer_performance import peer_to_rotate
 from chia.server.peer_store_resolver import PeerStoreResolver
 from chia.server.server import ChiaServer
 from chia.types.peer_info import PeerInfo, TimestampedPeerInfo
@@ -24,6 +25,10 @@ from chia.util.ints import uint64
 MAX_PEERS_RECEIVED_PER_REQUEST = 1000
 MAX_TOTAL_PEERS_RECEIVED = 3000
 MAX_CONCURRENT_OUTBOUND_CONNECTIONS = 70
+# How often the slowest outbound full node is replaced, if it's much slower than the others
+PEER_ROTATION_INTERVAL = 15 * 60
+# Outbound connections are measured for this long before they can be rotated out
+PEER_ROTATION_MIN_AGE = 30 * 60
 NETWORK_ID_DEFAULT_PORTS = {
     "mainnet": 8444,
     "testnet7": 58444,
@@ -127,6 +132,9 @@ class FullNodeDiscovery:
             self.cancel_task_safe(t)
         if len(self.pending_tasks) > 0:
             await asyncio.wait(self.pending_tasks)
+        if self.address_manager is not None:
+            async with self.address_manager.lock:
+                await AddressManagerStore.save_changes(self.address_manager, self.peers_file_path)
 
     def cancel_task_safe(self, task: Optional[asyncio.Task]):
         if task is not None:
@@ -439,10 +447,11 @@ class FullNodeDiscovery:
             if self.address_manager is None:
                 await asyncio.sleep(10)
                 continue
-            serialize_interval = random.randint(15 * 60, 30 * 60)
+            # Only the changed peers are written, the whole peers file is rewritten when the change log gets large
+            serialize_interval = random.randint(60, 2 * 60)
             await asyncio.sleep(serialize_interval)
             async with self.address_manager.lock:
-                await AddressManagerStore.serialize(self.address_manager, self.peers_file_path)
+                await AddressManagerStore.save_changes(self.address_manager, self.peers_file_path)
 
     async def _periodically_cleanup(self) -> None:
         while not self.is_closed:
@@ -543,12 +552,45 @@ class FullNodePeers(FullNodeDiscovery):
         await self.initialize_address_manager()
         self.self_advertise_task = asyncio.create_task(self._periodically_self_advertise_and_clean_data())
         self.address_relay_task = asyncio.create_task(self._address_relay())
+        self.rotate_peers_task = asyncio.create_task(self._periodically_rotate_outbound_peers())
         await self.start_tasks()
 
     async def close(self):
         await self._close_common()
         self.cancel_task_safe(self.self_advertise_task)
         self.cancel_task_safe(self.address_relay_task)
+        self.cancel_task_safe(self.rotate_peers_task)
+
+    async def _periodically_rotate_outbound_peers(self) -> None:
+        while not self.is_closed:
+            try:
+                try:
+                    await asyncio.sleep(PEER_ROTATION_INTERVAL)
+                except asyncio.CancelledError:
+                    return None
+                await self.rotate_outbound_peer()
+            except Exception as e:
+                self.log.error(f"Exception in rotate outbound peers: {e}")
+                self.log.error(f"Traceback: {traceback.format_exc()}")
+
+    async def rotate_outbound_peer(self) -> Optional[ws.WSChiaConnection]:
+        """
+        Closes the outbound full node connection that's much slower than the others, if there's one, and returns it.
+        """
+        # Only rotate once all the outbound slots are used, the connect loop then replaces the peer
+        if self._num_needed_peers() > 0:
+            return None
+        connections = [c for c in self.server.get_full_node_outgoing_connections() if not c.is_feeler]
+        worst = peer_to_rotate(connections, PEER_ROTATION_MIN_AGE)
+        if worst is None:
+            return None
+        self.log.info(f"Replacing slow outbound peer {worst.get_peer_logging()}: {worst.performance.get_metrics()}")
+        # It was last tried when it connected, so without this the connect loop could pick it again right away
+        peer_info = worst.get_peer_info()
+        if peer_info is not None and self.address_manager is not None:
+            await self.address_manager.attempt(peer_info, False)
+        await worst.close()
+        return worst
 
     async def _periodically_self_advertise_and_clean_data(self):
         while not self.is_closed:
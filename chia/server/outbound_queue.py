@@ -0,0 +1,168 @@
+import asyncio
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, Optional, Tuple
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.outbound_message import Message
+
+
+class MessagePriority(IntEnum):
+    # signage points, infusion points and peaks, which go stale within seconds
+    CONSENSUS = 1
+    NORMAL = 2
+    # blocks, peers and plot lists, which are large and not urgent
+    BULK = 3
+
+
+# Messages are only kept in order within a priority, so messages that must arrive in order share one. For example
+# new_peak_wallet stays NORMAL, since the wallet expects the coin_state_update of a height before its peak.
+CONSENSUS_MESSAGES = {
+    ProtocolMessageTypes.new_signage_point,
+    ProtocolMessageTypes.declare_proof_of_space,
+    ProtocolMessageTypes.request_signed_values,
+    ProtocolMessageTypes.signed_values,
+    ProtocolMessageTypes.new_proof_of_space,
+    ProtocolMessageTypes.request_signatures,
+    ProtocolMessageTypes.respond_signatures,
+    ProtocolMessageTypes.new_signage_point_harvester,
+    ProtocolMessageTypes.new_peak_timelord,
+    ProtocolMessageTypes.new_unfinished_block_timelord,
+    ProtocolMessageTypes.new_infusion_point_vdf,
+    ProtocolMessageTypes.new_signage_point_vdf,
+    ProtocolMessageTypes.new_end_of_sub_slot_vdf,
+    ProtocolMessageTypes.new_peak,
+    ProtocolMessageTypes.new_signage_point_or_end_of_sub_slot,
+    ProtocolMessageTypes.request_signage_point_or_end_of_sub_slot,
+    ProtocolMessageTypes.respond_signage_point,
+    ProtocolMessageTypes.respond_end_of_sub_slot,
+}
+
+BULK_MESSAGES = {
+    ProtocolMessageTypes.respond_proof_of_weight,
+    ProtocolMessageTypes.respond_block,
+    ProtocolMessageTypes.respond_blocks,
+    ProtocolMessageTypes.respond_compact_proof_of_time,
+    ProtocolMessageTypes.respond_compact_vdf,
+    ProtocolMessageTypes.respond_peers,
+    ProtocolMessageTypes.respond_peers_introducer,
+    ProtocolMessageTypes.respond_header_blocks,
+    ProtocolMessageTypes.respond_plots,
+    ProtocolMessageTypes.plot_sync_loaded,
+    ProtocolMessageTypes.plot_sync_removed,
+    ProtocolMessageTypes.plot_sync_invalid,
+    ProtocolMessageTypes.plot_sync_keys_missing,
+    ProtocolMessageTypes.plot_sync_duplicates,
+}
+
+# The number of bytes of messages of each priority that can be queued. Messages are queued anyway when nothing else
+# of their priority is, so a single message can be bigger than this.
+MAX_QUEUED_BYTES: Dict[MessagePriority, int] = {
+    MessagePriority.CONSENSUS: 10 * 1024 * 1024,
+    MessagePriority.NORMAL: 50 * 1024 * 1024,
+    MessagePriority.BULK: 100 * 1024 * 1024,
+}
+
+
+def message_priority(message: Message) -> MessagePriority:
+    try:
+        message_type = ProtocolMessageTypes(message.type)
+    except ValueError:
+        return MessagePriority.NORMAL
+    if message_type in CONSENSUS_MESSAGES:
+        return MessagePriority.CONSENSUS
+    if message_type in BULK_MESSAGES:
+        return MessagePriority.BULK
+    return MessagePriority.NORMAL
+
+
+class OutboundMessageQueue:
+    """
+    The messages waiting to be sent to a peer, along with their encoding if it's already known. Messages of a more
+    urgent priority are sent first, so a peer downloading blocks still gets signage points in time.
+
+    The size of the queue of each priority is bounded. When it's full, sending a response waits for some room, to slow
+    down whoever is producing them, while other messages are dropped so broadcasting never waits on a slow peer.
+    """
+
+    def __init__(self, max_queued_bytes: Optional[Dict[MessagePriority, int]] = None):
+        self.max_queued_bytes = MAX_QUEUED_BYTES if max_queued_bytes is None else max_queued_bytes
+        self.queues: Dict[MessagePriority, Deque[Tuple[Message, Optional[bytes]]]] = {
+            p: deque() for p in MessagePriority
+        }
+        self.queued_bytes: Dict[MessagePriority, int] = {p: 0 for p in MessagePriority}
+        self.sent: Dict[MessagePriority, int] = {p: 0 for p in MessagePriority}
+        self.dropped: Dict[MessagePriority, int] = {p: 0 for p in MessagePriority}
+        self.condition = asyncio.Condition()
+        self.closed = False
+
+    def _fits(self, priority: MessagePriority, size: int) -> bool:
+        queued = self.queued_bytes[priority]
+        return queued == 0 or queued + size <= self.max_queued_bytes[priority]
+
+    async def put(self, message: Message, encoded: Optional[bytes] = None) -> bool:
+        """
+        Returns False if the message was dropped.
+        """
+        priority = message_priority(message)
+        size = len(message.data)
+        async with self.condition:
+            while not self._fits(priority, size):
+                if self.closed:
+                    return False
+                if message.id is None:
+                    self.dropped[priority] += 1
+                    return False
+                await self.condition.wait()
+            self.queues[priority].append((message, encoded))
+            self.queued_bytes[priority] += size
+            self.condition.notify_all()
+        return True
+
+    async def put_later(self, message: Message, encoded: Optional[bytes], delay: float) -> None:
+        """
+        Queues a message again after a delay, ahead of the other messages of its priority. It's used for messages
+        that hit the rate limit, and the room they take is reserved until then.
+        """
+        priority = message_priority(message)
+        self.queued_bytes[priority] += len(message.data)
+        await asyncio.sleep(delay)
+        async with self.condition:
+            self.queues[priority].appendleft((message, encoded))
+            self.condition.notify_all()
+
+    async def get(self) -> Tuple[Message, Optional[bytes]]:
+        async with self.condition:
+            while True:
+                for priority in MessagePriority:
+                    if len(self.queues[priority]) > 0:
+                        message, encoded = self.queues[priority].popleft()
+                        self.queued_bytes[priority] -= len(message.data)
+                        self.condition.notify_all()
+                        return message, encoded
+                await self.condition.wait()
+
+    async def close(self) -> None:
+        """
+        Wakes up the senders waiting for room, since the messages won't be sent anymore.
+        """
+        async with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def message_sent(self, message: Message) -> None:
+        self.sent[message_priority(message)] += 1
+
+    def qsize(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        return {
+            priority.name.lower(): {
+                "queued_messages": len(self.queues[priority]),
+                "queued_bytes": self.queued_bytes[priority],
+                "sent_messages": self.sent[priority],
+                "dropped_messages": self.dropped[priority],
+            }
+            for priority in MessagePriority
+        }
@@ -0,0 +1,105 @@
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+# The weight of a new sample in the moving averages
+SMOOTHING = 0.2
+# Only responses at least this large are used to estimate the throughput of a peer
+MIN_THROUGHPUT_RESPONSE_SIZE = 64 * 1024
+# The throughput of a peer counts in its cost as the time it takes to send this many bytes
+COST_TRANSFER_SIZE = 1024 * 1024
+# The cost of a peer whose requests all time out
+TIMEOUT_COST = 10.0
+# A peer isn't scored until this many requests or peaks were measured
+MIN_SAMPLES = 5
+
+# A peer is only rotated out when its cost is at least this many times the median cost of the outbound peers, and
+# at least MIN_ROTATION_COST_DIFFERENCE seconds more
+ROTATION_COST_RATIO = 2.0
+MIN_ROTATION_COST_DIFFERENCE = 0.5
+# The number of scored outbound peers needed to know which one is bad
+MIN_ROTATION_PEERS = 3
+
+
+def _smooth(average: Optional[float], sample: float) -> float:
+    if average is None:
+        return sample
+    return average + SMOOTHING * (sample - average)
+
+
+class PeerPerformance:
+    """
+    Moving averages of how fast a peer answers our requests, how fast it sends large responses and how late it tells
+    us about new peaks, compared to the first peer that did.
+    """
+
+    def __init__(self) -> None:
+        self.rtt: Optional[float] = None
+        self.throughput: Optional[float] = None
+        self.peak_delay: Optional[float] = None
+        self.timeout_rate = 0.0
+        self.samples = 0
+
+    def request_finished(self, elapsed: float, response_size: Optional[int]) -> None:
+        """
+        Records a request to the peer, response_size is None if it timed out.
+        """
+        self.samples += 1
+        if response_size is None:
+            self.timeout_rate = _smooth(self.timeout_rate, 1.0)
+            return None
+        self.timeout_rate = _smooth(self.timeout_rate, 0.0)
+        self.rtt = _smooth(self.rtt, elapsed)
+        if response_size >= MIN_THROUGHPUT_RESPONSE_SIZE and elapsed > 0:
+            self.throughput = _smooth(self.throughput, response_size / elapsed)
+
+    def new_peak_seen(self, delay: float) -> None:
+        self.samples += 1
+        self.peak_delay = _smooth(self.peak_delay, delay)
+
+    def cost(self) -> Optional[float]:
+        """
+        An estimate, in seconds, of how much the peer slows us down. Lower is better, None until it was measured
+        enough.
+        """
+        if self.samples < MIN_SAMPLES:
+            return None
+        cost = TIMEOUT_COST * self.timeout_rate
+        if self.rtt is not None:
+            cost += self.rtt
+        if self.throughput is not None:
+            cost += COST_TRANSFER_SIZE / self.throughput
+        if self.peak_delay is not None:
+            cost += self.peak_delay
+        return cost
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "rtt": self.rtt,
+            "throughput": self.throughput,
+            "peak_delay": self.peak_delay,
+            "timeout_rate": self.timeout_rate,
+            "samples": self.samples,
+            "cost": self.cost(),
+        }
+
+
+def peer_to_rotate(connections: List[Any], min_age: float, now: Optional[float] = None) -> Optional[Any]:
+    """
+    Returns the outbound connection that's much slower than the others, if there's one. Connections younger than
+    min_age, in seconds, are left alone.
+    """
+    if now is None:
+        now = time.time()
+    scored = []
+    for connection in connections:
+        cost = connection.performance.cost()
+        if cost is not None and now - connection.creation_time >= min_age:
+            scored.append((cost, connection))
+    if len(scored) < MIN_ROTATION_PEERS:
+        return None
+    median = statistics.median(cost for cost, _ in scored)
+    worst_cost, worst = max(scored, key=lambda item: item[0])
+    if worst_cost < median * ROTATION_COST_RATIO or worst_cost < median + MIN_ROTATION_COST_DIFFERENCE:
+        return None
+    return worst
@@ -1,8 +1,7 @@
 import dataclasses
 import logging
 import time
-from collections import Counter
-from typing import Optional
+from typing import Dict, Optional
 
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
 from chia.server.outbound_message import Message
@@ -120,99 +119,128 @@ rate_limits_other = {
 # TODO: only full node disconnects based on rate limits
 
 
+class TokenBucket:
+    """
+    Holds up to capacity tokens, and refills continuously so that it goes from empty to full in period seconds.
+    Tokens can be taken past zero, down to -capacity, for messages that are processed anyway.
+    """
+
+    __slots__ = ("capacity", "refill_rate", "tokens", "last_refill")
+
+    def __init__(self, capacity: float, period: float, now: float):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.tokens = capacity
+        self.last_refill = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+        return self.tokens
+
+    def take(self, amount: float) -> None:
+        self.tokens = max(-self.capacity, self.tokens - amount)
+
+
+class MessageTypeLimits:
+    """
+    The limits and buckets of one message type, computed once when the RateLimiter is created.
+    """
+
+    __slots__ = ("name", "max_size", "count", "size", "non_tx", "in_rate_limits")
+
+    def __init__(self, message_type: ProtocolMessageTypes, period: float, proportion_of_limit: float, now: float):
+        self.name = message_type.name
+        self.in_rate_limits = True
+        self.non_tx = False
+        if message_type in rate_limits_tx:
+            limits = rate_limits_tx[message_type]
+        elif message_type in rate_limits_other:
+            limits = rate_limits_other[message_type]
+            self.non_tx = True
+        else:
+            limits = DEFAULT_SETTINGS
+            self.in_rate_limits = False
+        max_total_size = limits.max_total_size
+        if max_total_size is None:
+            max_total_size = limits.frequency * limits.max_size
+        self.max_size = limits.max_size
+        self.count = TokenBucket(limits.frequency * proportion_of_limit, period, now)
+        self.size = TokenBucket(max_total_size * proportion_of_limit, period, now)
+
+
 class RateLimiter:
     incoming: bool
     reset_seconds: int
-    current_minute: int
-    message_counts: Counter
-    message_cumulative_sizes: Counter
     percentage_of_limit: int
-    non_tx_message_counts: int = 0
-    non_tx_cumulative_size: int = 0
 
     def __init__(self, incoming: bool, reset_seconds=60, percentage_of_limit=100):
         """
-        The incoming parameter affects whether counters are incremented
-        unconditionally or not. For incoming messages, the counters are always
-        incremeneted. For outgoing messages, the counters are only incremented
-        if they are allowed to be sent by the rate limiter, since we won't send
-        the messages otherwise.
+        The incoming parameter affects whether tokens are taken unconditionally
+        or not. For incoming messages, the tokens are always taken. For
+        outgoing messages, the tokens are only taken if they are allowed to be
+        sent by the rate limiter, since we won't send the messages otherwise.
+
+        Each limit is a token bucket that refills completely in reset_seconds,
+        so a peer can't send twice the limit by bursting on both sides of a
+        period boundary.
         """
         self.incoming = incoming
         self.reset_seconds = reset_seconds
-        self.current_minute = time.time() // reset_seconds
-        self.message_counts = Counter()
-        self.message_cumulative_sizes = Counter()
         self.percentage_of_limit = percentage_of_limit
-        self.non_tx_message_counts = 0
-        self.non_tx_cumulative_size = 0
+        proportion_of_limit: float = percentage_of_limit / 100
+        now = time.monotonic()
+        self.limits: Dict[int, MessageTypeLimits] = {
+            message_type.value: MessageTypeLimits(message_type, reset_seconds, proportion_of_limit, now)
+            for message_type in ProtocolMessageTypes
+        }
+        self.non_tx_count = TokenBucket(NON_TX_FREQ * proportion_of_limit, reset_seconds, now)
+        self.non_tx_size = TokenBucket(NON_TX_MAX_TOTAL_SIZE * proportion_of_limit, reset_seconds, now)
 
     def process_msg_and_check(self, message: Message) -> bool:
         """
         Returns True if message can be processed successfully, false if a rate limit is passed.
         """
-
-        current_minute = int(time.time() // self.reset_seconds)
-        if current_minute != self.current_minute:
-            self.current_minute = current_minute
-            self.message_counts = Counter()
-            self.message_cumulative_sizes = Counter()
-            self.non_tx_message_counts = 0
-            self.non_tx_cumulative_size = 0
-        try:
-            message_type = ProtocolMessageTypes(message.type)
-        except Exception as e:
-            log.warning(f"Invalid message: {message.type}, {e}")
-            return True
-
-        new_message_counts: int = self.message_counts[message_type] + 1
-        new_cumulative_size: int = self.message_cumulative_sizes[message_type] + len(message.data)
-        new_non_tx_count: int = self.non_tx_message_counts
-        new_non_tx_size: int = self.non_tx_cumulative_size
-        proportion_of_limit: float = self.percentage_of_limit / 100
-
-        ret: bool = False
-        try:
-
-            limits = DEFAULT_SETTINGS
-            if message_type in rate_limits_tx:
-                limits = rate_limits_tx[message_type]
-            elif message_type in rate_limits_other:
-                limits = rate_limits_other[message_type]
-                new_non_tx_count = self.non_tx_message_counts + 1
-                new_non_tx_size = self.non_tx_cumulative_size + len(message.data)
-                if new_non_tx_count > NON_TX_FREQ * proportion_of_limit:
-                    log.debug(f"Rate limit: {new_non_tx_count} > {NON_TX_FREQ} * {proportion_of_limit}")
-                    return False
-                if new_non_tx_size > NON_TX_MAX_TOTAL_SIZE * proportion_of_limit:
-                    log.debug(f"Rate limit: {new_non_tx_size} > {NON_TX_MAX_TOTAL_SIZE} * {proportion_of_limit}")
-                    return False
-            else:
-                log.warning(f"Message type {message_type} not found in rate limits")
-
-            if limits.max_total_size is None:
-                limits = dataclasses.replace(limits, max_total_size=limits.frequency * limits.max_size)
-            assert limits.max_total_size is not None
-
-            if new_message_counts > limits.frequency * proportion_of_limit:
-                log.debug(f"Rate limit: {new_message_counts} > {limits.frequency} * {proportion_of_limit}")
-                return False
-            if len(message.data) > limits.max_size:
-                log.debug(f"Rate limit: {len(message.data)} > {limits.max_size}")
-                return False
-            if new_cumulative_size > limits.max_total_size * proportion_of_limit:
-                log.debug(f"Rate limit: {new_cumulative_size} > {limits.max_total_size} * {proportion_of_limit}")
-                return False
-
-            ret = True
+        limits = self.limits.get(message.type)
+        if limits is None:
+            log.warning(f"Invalid message: {message.type}")
             return True
-        finally:
-            if self.incoming or ret:
-                # now that we determined that it's OK to send the message, commit the
-                # updates to the counters. Alternatively, if this was an
-                # incoming message, we already received it and it should
-                # increment the counters unconditionally
-                self.message_counts[message_type] = new_message_counts
-                self.message_cumulative_sizes[message_type] = new_cumulative_size
-                self.non_tx_message_counts = new_non_tx_count
-                self.non_tx_cumulative_size = new_non_tx_size
+        if not limits.in_rate_limits:
+            log.warning(f"Message type {limits.name} not found in rate limits")
+
+        now = time.monotonic()
+        size = len(message.data)
+        ret = True
+        if limits.non_tx:
+            if self.non_tx_count.refill(now) < 1:
+                log.debug(f"Rate limit: too many non-tx messages, {limits.name}")
+                ret = False
+            elif self.non_tx_size.refill(now) < size:
+                log.debug(f"Rate limit: too much non-tx data, {limits.name}")
+                ret = False
+        if ret:
+            if limits.count.refill(now) < 1:
+                log.debug(f"Rate limit: too many {limits.name} messages")
+                ret = False
+            elif size > limits.max_size:
+                log.debug(f"Rate limit: {size} > {limits.max_size}")
+                ret = False
+            elif limits.size.refill(now) < size:
+                log.debug(f"Rate limit: too much {limits.name} data")
+                ret = False
+
+        if self.incoming or ret:
+            # now that we determined that it's OK to send the message, take the
+            # tokens. Alternatively, if this was an incoming message, we
+            # already received it and it should take the tokens
+            # unconditionally
+            limits.count.refill(now)
+            limits.count.take(1)
+            limits.size.refill(now)
+            limits.size.take(size)
+            if limits.non_tx:
+                self.non_tx_count.refill(now)
+                self.non_tx_count.take(1)
+                self.non_tx_size.refill(now)
+                self.non_tx_size.take(size)
+        return ret
@@ -3,13 +3,10 @@ import logging
 import ssl
 import time
 import traceback
-from collections import Counter
 from ipaddress import IPv4Network, IPv6Address, IPv6Network, ip_address, ip_network
 from pathlib import Path
 from secrets import token_bytes
-from typing import Any, Callable
-from typing import Counter as typing_Counter
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from aiohttp import ClientSession, ClientTimeout, ServerDisconnectedError, WSCloseCode, client_exceptions, web
 from aiohttp.web_app import Application
@@ -22,7 +19,9 @@ from chia.protocols.protocol_message_types import ProtocolMessageTypes
 from chia.protocols.protocol_state_machine import message_requires_reply
 from chia.protocols.protocol_timing import API_EXCEPTION_BAN_SECONDS, INVALID_PROTOCOL_BAN_SECONDS
 from chia.protocols.shared_protocol import protocol_version
+from chia.server.inbound_limits import InboundMessageLimiter
 from chia.server.introducer_peers import IntroducerPeers
+from chia.server.message_metrics import MessageMetrics
 from chia.server.outbound_message import Message, NodeType
 from chia.server.ssl_context import private_ssl_paths, public_ssl_paths
 from chia.server.ws_connection import WSChiaConnection
@@ -30,6 +29,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.peer_info import PeerInfo
 from chia.util.errors import Err, ProtocolError
 from chia.util.ints import uint16
+from chia.util.loop_monitor import LoopLagMonitor
 from chia.util.network import is_in_network, is_localhost
 from chia.util.ssl_check import verify_ssl_certs_and_keys
 
@@ -116,6 +116,7 @@ class ChiaServer:
         chia_ca_crt_key: Tuple[Path, Path],
         name: str = None,
         introducer_peers: Optional[IntroducerPeers] = None,
+        loop_monitor: Optional[LoopLagMonitor] = None,
     ):
         # Keeps track of all connections to and from this node.
         logging.basicConfig(level=logging.DEBUG)
@@ -178,6 +179,8 @@ class ChiaServer:
         self.received_message_callback: Optional[Callable] = None
         self.api_tasks: Dict[bytes32, asyncio.Task] = {}
         self.execute_tasks: Set[bytes32] = set()
+        self.message_metrics = MessageMetrics()
+        self.inbound_limiter = InboundMessageLimiter(config, loop_monitor)
 
         self.tasks_from_peer: Dict[bytes32, Set[bytes32]] = {}
         self.banned_peers: Dict[str, float] = {}
@@ -307,6 +310,7 @@ class ChiaServer:
                 self._inbound_rate_limit_percent,
                 self._outbound_rate_limit_percent,
                 close_event,
+                message_metrics=self.message_metrics,
             )
             await connection.perform_handshake(
                 self._network_id,
@@ -460,6 +464,7 @@ class ChiaServer:
                 self._inbound_rate_limit_percent,
                 self._outbound_rate_limit_percent,
                 session=session,
+                message_metrics=self.message_metrics,
             )
             await connection.perform_handshake(
                 self._network_id,
@@ -529,6 +534,7 @@ class ChiaServer:
                 f" while closing. Handshake never finished."
             )
         self.cancel_tasks_from_peer(connection.peer_node_id)
+        self.inbound_limiter.peer_disconnected(connection.peer_node_id)
         on_disconnect = getattr(self.node, "on_disconnect", None)
         if on_disconnect is not None:
             on_disconnect(connection)
@@ -546,16 +552,35 @@ class ChiaServer:
 
     async def incoming_api_task(self) -> None:
         self.tasks = set()
-        message_types: typing_Counter[str] = Counter()  # Used for debugging information.
         while True:
             payload_inc, connection_inc = await self.incoming_messages.get()
             if payload_inc is None or connection_inc is None:
                 continue
 
-            async def api_call(full_message: Message, connection: WSChiaConnection, task_id):
-                nonlocal message_types
+            try:
+                inc_type: Optional[ProtocolMessageTypes] = ProtocolMessageTypes(payload_inc.type)
+            except ValueError:
+                # the handler deals with these
+                inc_type = None
+            if inc_type is not None and not self.inbound_limiter.admit(
+                inc_type, payload_inc.data, connection_inc.peer_node_id
+            ):
+                connection_inc.log.debug(
+                    f"Too many messages queued or event loop lagging, dropping {inc_type.name} "
+                    f"from {connection_inc.peer_host}"
+                )
+                self.message_metrics.message_shed(inc_type.name)
+                continue
+
+            async def api_call(
+                full_message: Message,
+                connection: WSChiaConnection,
+                task_id,
+                admitted_type: Optional[ProtocolMessageTypes],
+            ):
                 start_time = time.time()
                 message_type = ""
+                failed = False
                 try:
                     if self.received_message_callback is not None:
                         await self.received_message_callback(connection)
@@ -564,11 +589,10 @@ class ChiaServer:
                         f"{connection.peer_node_id} {connection.peer_host}"
                     )
                     message_type = ProtocolMessageTypes(full_message.type).name
-                    message_types[message_type] += 1
+                    self.message_metrics.message_received(message_type, len(full_message.data))
+                    self.message_metrics.call_started(message_type)
 
                     f = getattr(self.api, message_type, None)
-                    if len(message_types) % 100 == 0:
-                        self.log.debug(f"Message types: {[(m, n) for m, n in sorted(message_types.items()) if n != 0]}")
 
                     if f is None:
                         self.log.error(f"Non existing function: {message_type}")
@@ -589,14 +613,16 @@ class ChiaServer:
                         self.execute_tasks.add(task_id)
                         timeout = None
 
-                    if hasattr(f, "peer_required"):
-                        coroutine = f(full_message.data, connection)
-                    else:
-                        coroutine = f(full_message.data)
-
                     async def wrapped_coroutine() -> Optional[Message]:
                         try:
-                            result = await coroutine
+                            # waiting for a slot counts towards the timeout
+                            async with self.inbound_limiter.limit(
+                                ProtocolMessageTypes(full_message.type), connection.peer_node_id
+                            ):
+                                if hasattr(f, "peer_required"):
+                                    result = await f(full_message.data, connection)
+                                else:
+                                    result = await f(full_message.data)
                             return result
                         except asyncio.CancelledError:
                             pass
@@ -616,8 +642,10 @@ class ChiaServer:
                         response_message = Message(response.type, full_message.id, response.data)
                         await connection.send_message(response_message)
                 except TimeoutError:
+                    failed = True
                     connection.log.error(f"Timeout error for: {message_type}")
                 except Exception as e:
+                    failed = True
                     if self.connection_close_task is None:
                         tb = traceback.format_exc()
                         connection.log.error(
@@ -628,7 +656,10 @@ class ChiaServer:
                     # TODO: actually throw one of the errors from errors.py and pass this to close
                     await connection.close(self.api_exception_ban_seconds, WSCloseCode.PROTOCOL_ERROR, Err.UNKNOWN)
                 finally:
-                    message_types[message_type] -= 1
+                    if message_type != "":
+                        self.message_metrics.call_finished(message_type, time.time() - start_time, failed)
+                    if admitted_type is not None:
+                        self.inbound_limiter.release(admitted_type, full_message.data, connection.peer_node_id)
                     if task_id in self.api_tasks:
                         self.api_tasks.pop(task_id)
                     if task_id in self.tasks_from_peer[connection.peer_node_id]:
@@ -637,7 +668,7 @@ class ChiaServer:
                         self.execute_tasks.remove(task_id)
 
             task_id: bytes32 = bytes32(token_bytes(32))
-            api_task = asyncio.create_task(api_call(payload_inc, connection_inc, task_id))
+            api_task = asyncio.create_task(api_call(payload_inc, connection_inc, task_id, inc_type))
             self.api_tasks[task_id] = api_task
             if connection_inc.peer_node_id not in self.tasks_from_peer:
                 self.tasks_from_peer[connection_inc.peer_node_id] = set()
@@ -649,12 +680,13 @@ class ChiaServer:
         node_type: NodeType,
         origin_peer: WSChiaConnection,
     ):
+        encoded_messages = [(message, bytes(message)) for message in messages]
         for node_id, connection in self.all_connections.items():
             if node_id == origin_peer.peer_node_id:
                 continue
             if connection.connection_type is node_type:
-                for message in messages:
-                    await connection.send_message(message)
+                for message, encoded in encoded_messages:
+                    await connection.send_message(message, encoded)
 
     async def validate_broadcast_message_type(self, messages: List[Message], node_type: NodeType):
         for message in messages:
@@ -672,17 +704,20 @@ class ChiaServer:
 
     async def send_to_all(self, messages: List[Message], node_type: NodeType):
         await self.validate_broadcast_message_type(messages, node_type)
+        # the messages are encoded once, and the same bytes are sent to every peer
+        encoded_messages = [(message, bytes(message)) for message in messages]
         for _, connection in self.all_connections.items():
             if connection.connection_type is node_type:
-                for message in messages:
-                    await connection.send_message(message)
+                for message, encoded in encoded_messages:
+                    await connection.send_message(message, encoded)
 
     async def send_to_all_except(self, messages: List[Message], node_type: NodeType, exclude: bytes32):
         await self.validate_broadcast_message_type(messages, node_type)
+        encoded_messages = [(message, bytes(message)) for message in messages]
         for _, connection in self.all_connections.items():
             if connection.connection_type is node_type and connection.peer_node_id != exclude:
-                for message in messages:
-                    await connection.send_message(message)
+                for message, encoded in encoded_messages:
+                    await connection.send_message(message, encoded)
 
     async def send_to_specific(self, messages: List[Message], node_id: bytes32):
         if node_id in self.all_connections:
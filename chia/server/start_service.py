@@ -22,6 +22,7 @@ from chia.server.upnp import UPnP
 from chia.types.peer_info import PeerInfo
 from chia.util.chia_logging import initialize_logging
 from chia.util.config import load_config, load_config_cli
+from chia.util.loop_monitor import LoopLagMonitor
 from chia.util.setproctitle import setproctitle
 from chia.util.ints import uint16
 
@@ -89,6 +90,8 @@ class Service:
             initialize_logging(service_name, service_config["logging"], root_path)
 
         self._rpc_info = rpc_info
+        self.loop_monitor = LoopLagMonitor(self._log, float(service_config.get("loop_lag_threshold", 1.0)))
+        self._enable_loop_monitor = service_config.get("enable_loop_lag_monitor", True)
         private_ca_crt, private_ca_key = private_ssl_ca_paths(root_path, self.config)
         chia_ca_crt, chia_ca_key = chia_ssl_ca_paths(root_path, self.config)
         inbound_rlp = self.config.get("inbound_rate_limit_percent")
@@ -112,6 +115,7 @@ class Service:
             (private_ca_crt, private_ca_key),
             (chia_ca_crt, chia_ca_key),
             name=f"{service_name}_server",
+            loop_monitor=self.loop_monitor,
         )
         f = getattr(node, "set_server", None)
         if f:
@@ -151,6 +155,9 @@ class Service:
         if self._running_new_process:
             self._enable_signals()
 
+        if self._enable_loop_monitor:
+            self.loop_monitor.start()
+
         await self._node._start(**kwargs)
         self._node._shut_down = False
 
@@ -184,6 +191,7 @@ class Service:
                     self._connect_to_daemon,
                     max_request_body_size=self.max_request_body_size,
                     name=self._service_name + "_rpc",
+                    loop_monitor=self.loop_monitor,
                 )
             )
 
@@ -241,6 +249,7 @@ class Service:
                 _.cancel()
             self._log.info("Closing connections")
             self._server.close_all()
+            self.loop_monitor.stop()
             self._node._close()
             self._node._shut_down = True
 
@@ -3,7 +3,7 @@ import contextlib
 import logging
 import time
 import traceback
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from aiohttp import WSCloseCode, WSMessage, WSMsgType
 
@@ -12,7 +12,11 @@ from chia.protocols.protocol_message_types import ProtocolMessageTypes
 from chia.protocols.protocol_state_machine import message_response_ok
 from chia.protocols.protocol_timing import INTERNAL_PROTOCOL_ERROR_BAN_SECONDS
 from chia.protocols.shared_protocol import Capability, Handshake
+from chia.server.compression import COMPRESSION_THRESHOLD, compress_message, decompress_frame, is_compressed_frame
+from chia.server.message_metrics import MessageMetrics
 from chia.server.outbound_message import Message, NodeType, make_msg
+from chia.server.outbound_queue import OutboundMessageQueue
+from chia.server.peer_performance import PeerPerformance
 from chia.server.rate_limits import RateLimiter
 from chia.types.peer_info import PeerInfo
 from chia.util.errors import Err, ProtocolError
@@ -24,6 +28,16 @@ from chia.util.network import class_for_type, is_localhost
 # Max size 2^(8*4) which is around 4GiB
 LENGTH_BYTES: int = 4
 
+# The capabilities we advertise in the handshake
+CAPABILITIES: List[Tuple[uint16, str]] = [
+    (uint16(Capability.BASE.value), "1"),
+    (uint16(Capability.ZSTD_COMPRESSION.value), "1"),
+]
+
+
+def has_capability(handshake: Handshake, capability: Capability) -> bool:
+    return any(c == capability.value and value == "1" for c, value in handshake.capabilities)
+
 
 class WSChiaConnection:
     """
@@ -48,6 +62,7 @@ class WSChiaConnection:
         outbound_rate_limit_percent: int,
         close_event=None,
         session=None,
+        message_metrics: Optional[MessageMetrics] = None,
     ):
         # Local properties
         self.ws: Any = ws
@@ -77,10 +92,12 @@ class WSChiaConnection:
         self.bytes_read = 0
         self.bytes_written = 0
         self.last_message_time: float = 0
+        self.message_metrics = message_metrics
+        self.performance = PeerPerformance()
 
         # Messaging
         self.incoming_queue: asyncio.Queue = incoming_queue
-        self.outgoing_queue: asyncio.Queue = asyncio.Queue()
+        self.outgoing_queue = OutboundMessageQueue()
 
         self.inbound_task: Optional[asyncio.Task] = None
         self.outbound_task: Optional[asyncio.Task] = None
@@ -91,6 +108,8 @@ class WSChiaConnection:
 
         self.pending_requests: Dict[uint16, asyncio.Event] = {}
         self.request_results: Dict[uint16, Message] = {}
+        # when each pending request was written to the socket, the round trip doesn't include our own queueing
+        self.request_sent_times: Dict[uint16, float] = {}
         self.closed = False
         self.connection_type: Optional[NodeType] = None
         if is_outbound:
@@ -108,6 +127,9 @@ class WSChiaConnection:
         # Used by the Chia Seeder.
         self.version = None
         self.protocol_version = ""
+        # whether the peer accepts compressed messages, and whether we offered to accept them from the peer
+        self.send_compressed = False
+        self.accept_compressed = False
 
     async def perform_handshake(
         self,
@@ -125,11 +147,12 @@ class WSChiaConnection:
                     chia_full_version_str(),
                     uint16(server_port),
                     uint8(local_type.value),
-                    [(uint16(Capability.BASE.value), "1")],
+                    CAPABILITIES,
                 ),
             )
             assert outbound_handshake is not None
             await self._send_message(outbound_handshake)
+            self.accept_compressed = (uint16(Capability.ZSTD_COMPRESSION.value), "1") in CAPABILITIES
             inbound_handshake_msg = await self._read_one_message()
             if inbound_handshake_msg is None:
                 raise ProtocolError(Err.INVALID_HANDSHAKE)
@@ -151,6 +174,7 @@ class WSChiaConnection:
             self.protocol_version = inbound_handshake.protocol_version
             self.peer_server_port = inbound_handshake.server_port
             self.connection_type = NodeType(inbound_handshake.node_type)
+            self.send_compressed = has_capability(inbound_handshake, Capability.ZSTD_COMPRESSION)
 
         else:
             try:
@@ -181,12 +205,14 @@ class WSChiaConnection:
                     chia_full_version_str(),
                     uint16(server_port),
                     uint8(local_type.value),
-                    [(uint16(Capability.BASE.value), "1")],
+                    CAPABILITIES,
                 ),
             )
             await self._send_message(outbound_handshake)
+            self.accept_compressed = (uint16(Capability.ZSTD_COMPRESSION.value), "1") in CAPABILITIES
             self.peer_server_port = inbound_handshake.server_port
             self.connection_type = NodeType(inbound_handshake.node_type)
+            self.send_compressed = has_capability(inbound_handshake, Capability.ZSTD_COMPRESSION)
 
         self.outbound_task = asyncio.create_task(self.outbound_handler())
         self.inbound_task = asyncio.create_task(self.inbound_handler())
@@ -211,6 +237,7 @@ class WSChiaConnection:
                 self.inbound_task.cancel()
             if self.outbound_task is not None:
                 self.outbound_task.cancel()
+            await self.outgoing_queue.close()
             if self.ws is not None and self.ws._closed is False:
                 await self.ws.close(code=ws_close_code, message=message)
             if self.session is not None:
@@ -249,9 +276,8 @@ class WSChiaConnection:
     async def outbound_handler(self):
         try:
             while not self.closed:
-                msg = await self.outgoing_queue.get()
-                if msg is not None:
-                    await self._send_message(msg)
+                msg, encoded = await self.outgoing_queue.get()
+                await self._send_message(msg, encoded)
         except asyncio.CancelledError:
             pass
         except BrokenPipeError as e:
@@ -283,12 +309,14 @@ class WSChiaConnection:
             self.log.error(f"Exception: {e}")
             self.log.error(f"Exception Stack: {error_stack}")
 
-    async def send_message(self, message: Message) -> bool:
-        """Send message sends a message with no tracking / callback."""
+    async def send_message(self, message: Message, encoded: Optional[bytes] = None) -> bool:
+        """
+        Send message sends a message with no tracking / callback. Messages sent to many peers can be encoded once,
+        and passed along with their encoding. Returns False if the message is dropped because the peer is too slow.
+        """
         if self.closed:
             return False
-        await self.outgoing_queue.put(message)
-        return True
+        return await self.outgoing_queue.put(message, encoded)
 
     def __getattr__(self, attr_name: str):
         # TODO KWARGS
@@ -366,6 +394,11 @@ class WSChiaConnection:
             self.log.debug(f"<- {ProtocolMessageTypes(result.type).name} from: {self.peer_host}:{self.peer_port}")
             self.request_results.pop(message.id)
 
+        sent_time = self.request_sent_times.pop(message.id, None)
+        if sent_time is not None:
+            self.performance.request_finished(
+                time.monotonic() - sent_time, None if result is None else len(result.data)
+            )
         return result
 
     async def send_messages(self, messages: List[Message]):
@@ -374,17 +407,9 @@ class WSChiaConnection:
         for message in messages:
             await self.outgoing_queue.put(message)
 
-    async def _wait_and_retry(self, msg: Message, queue: asyncio.Queue):
-        try:
-            await asyncio.sleep(1)
-            await queue.put(msg)
-        except Exception as e:
-            self.log.debug(f"Exception {e} while waiting to retry sending rate limited message")
-            return None
-
-    async def _send_message(self, message: Message):
-        encoded: bytes = bytes(message)
-        size = len(encoded)
+    async def _send_message(self, message: Message, encoded: Optional[bytes] = None):
+        if encoded is None:
+            encoded = bytes(message)
         assert len(encoded) < (2 ** (LENGTH_BYTES * 8))
         if not self.outbound_rate_limiter.process_msg_and_check(message):
             if not is_localhost(self.peer_host):
@@ -395,7 +420,7 @@ class WSChiaConnection:
 
                 # TODO: fix this special case. This function has rate limits which are too low.
                 if ProtocolMessageTypes(message.type) != ProtocolMessageTypes.respond_peers:
-                    asyncio.create_task(self._wait_and_retry(message, self.outgoing_queue))
+                    asyncio.create_task(self.outgoing_queue.put_later(message, encoded, 1))
 
                 return None
             else:
@@ -404,7 +429,16 @@ class WSChiaConnection:
                     f"peer: {self.peer_host}"
                 )
 
+        if self.send_compressed and len(encoded) >= COMPRESSION_THRESHOLD:
+            # zstd releases the GIL, large messages are compressed without blocking the event loop
+            encoded = await asyncio.get_running_loop().run_in_executor(None, compress_message, encoded)
+        size = len(encoded)
         await self.ws.send_bytes(encoded)
+        if message.id is not None and message.id in self.pending_requests:
+            self.request_sent_times[message.id] = time.monotonic()
+        self.outgoing_queue.message_sent(message)
+        if self.message_metrics is not None:
+            self.message_metrics.message_sent(ProtocolMessageTypes(message.type).name, len(message.data))
         self.log.debug(f"-> {ProtocolMessageTypes(message.type).name} to peer {self.peer_host} {self.peer_node_id}")
         self.bytes_written += size
 
@@ -446,8 +480,19 @@ class WSChiaConnection:
                 return None
         elif message.type == WSMsgType.BINARY:
             data = message.data
-            full_message_loaded: Message = Message.from_bytes(data)
             self.bytes_read += len(data)
+            if is_compressed_frame(data):
+                try:
+                    if not self.accept_compressed:
+                        raise ValueError("Compression wasn't offered to the peer")
+                    # the rate limiter works on the decompressed message
+                    data = await asyncio.get_running_loop().run_in_executor(None, decompress_frame, data)
+                except ValueError as e:
+                    self.log.error(f"Invalid compressed message from {self.peer_host}, disconnecting: {e}")
+                    asyncio.create_task(self.close(300))
+                    await asyncio.sleep(3)
+                    return None
+            full_message_loaded: Message = Message.from_bytes(data)
             self.last_message_time = time.time()
             try:
                 message_type = ProtocolMessageTypes(full_message_loaded.type).name
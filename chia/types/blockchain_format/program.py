@@ -1,5 +1,6 @@
 import io
-from typing import List, Set, Tuple, Optional, Any
+from hashlib import sha256
+from typing import List, Tuple, Optional, Any, Sequence
 
 from clvm import SExp
 from clvm.casts import int_from_bytes
@@ -9,15 +10,20 @@ from chia_rs import MEMPOOL_MODE, run_chia_program, serialized_length, run_gener
 from clvm_tools.curry import uncurry
 
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.util.hash import std_hash
 from chia.util.byte_types import hexstr_to_bytes
+from chia.util.lru_cache import LRUCache
 from chia.types.spend_bundle_conditions import SpendBundleConditions
 
-from .tree_hash import sha256_treehash
+from .tree_hash import sha256_treehash, sha256_treehash_from_bytes
 
 
 INFINITE_COST = 0x7FFFFFFFFFFFFFFF
 
+# Tree hashes of serialized programs, keyed by their bytes. The same puzzles (standard, CAT, singleton layers...) are
+# deserialized and hashed over and over. Large programs (like block generators) are not worth keeping around.
+TREE_HASH_CACHE: LRUCache = LRUCache(10000)
+TREE_HASH_CACHE_MAX_PROGRAM_SIZE = 16384
+
 
 class Program(SExp):
     """
@@ -77,7 +83,15 @@ class Program(SExp):
         Any values in `args` that appear in the tree
         are presumed to have been hashed already.
         """
-        return sha256_treehash(self, set(args))
+        if len(args) > 0:
+            return sha256_treehash(self, set(args))
+        # programs are immutable, so the hash is only computed once. It's also used when hashing larger trees
+        # containing this program, like curried puzzles
+        tree_hash: Optional[bytes32] = getattr(self, "_cached_tree_hash", None)
+        if tree_hash is None:
+            tree_hash = sha256_treehash(self)
+            self._cached_tree_hash = tree_hash
+        return tree_hash
 
     def run_with_cost(self, max_cost: int, args) -> Tuple[int, "Program"]:
         prog_args = Program.to(args)
@@ -147,20 +161,53 @@ class Program(SExp):
     EvalError = EvalError
 
 
-def _tree_hash(node: SExp, precalculated: Set[bytes32]) -> bytes32:
+def shatree_atom(atom: bytes) -> bytes32:
+    return bytes32(sha256(b"\1" + atom).digest())
+
+
+def shatree_pair(left_hash: bytes32, right_hash: bytes32) -> bytes32:
+    return bytes32(sha256(b"\2" + left_hash + right_hash).digest())
+
+
+# Tree hashes of the atoms of the structure Program.curry wraps the module and its arguments in
+Q_KW_TREEHASH = shatree_atom(b"\x01")
+A_KW_TREEHASH = shatree_atom(b"\x02")
+C_KW_TREEHASH = shatree_atom(b"\x04")
+ONE_TREEHASH = shatree_atom(b"\x01")
+NULL_TREEHASH = shatree_atom(b"")
+
+
+def calculate_hash_of_quoted_mod_hash(mod_hash: bytes32) -> bytes32:
     """
-    Hash values in `precalculated` are presumed to have been hashed already.
+    The tree hash of (q . mod), to be passed to curry_and_treehash. It only depends on the module, so it's meant to
+    be computed once.
     """
-    if node.listp():
-        left = _tree_hash(node.first(), precalculated)
-        right = _tree_hash(node.rest(), precalculated)
-        s = b"\2" + left + right
-    else:
-        atom = node.as_atom()
-        if atom in precalculated:
-            return bytes32(atom)
-        s = b"\1" + atom
-    return bytes32(std_hash(s))
+    return shatree_pair(Q_KW_TREEHASH, mod_hash)
+
+
+def curried_values_tree_hash(hashed_arguments: Sequence[bytes32]) -> bytes32:
+    """
+    The tree hash of the arguments list built by Program.curry: (c (q . arg1) (c (q . arg2) ... 1))
+    """
+    curried_values = ONE_TREEHASH
+    for arg_hash in reversed(hashed_arguments):
+        quoted_arg = shatree_pair(Q_KW_TREEHASH, arg_hash)
+        curried_values = shatree_pair(
+            C_KW_TREEHASH, shatree_pair(quoted_arg, shatree_pair(curried_values, NULL_TREEHASH))
+        )
+    return curried_values
+
+
+def curry_and_treehash(hash_of_quoted_mod_hash: bytes32, *hashed_arguments: bytes32) -> bytes32:
+    """
+    Returns the tree hash of mod.curry(*arguments), from the tree hashes of the arguments, without creating the
+    curried program. hash_of_quoted_mod_hash comes from calculate_hash_of_quoted_mod_hash. Atom arguments are hashed
+    with shatree_atom, and other programs with get_tree_hash.
+    """
+    curried_values = curried_values_tree_hash(hashed_arguments)
+    return shatree_pair(
+        A_KW_TREEHASH, shatree_pair(hash_of_quoted_mod_hash, shatree_pair(curried_values, NULL_TREEHASH))
+    )
 
 
 def _serialize(node) -> bytes:
@@ -176,6 +223,7 @@ class SerializedProgram:
     """
 
     _buf: bytes = b""
+    _cached_tree_hash: Optional[bytes32] = None
 
     @classmethod
     def parse(cls, f) -> "SerializedProgram":
@@ -202,7 +250,10 @@ class SerializedProgram:
         return ret
 
     def to_program(self) -> Program:
-        return Program.from_bytes(self._buf)
+        program = Program.from_bytes(self._buf)
+        if self._cached_tree_hash is not None:
+            program._cached_tree_hash = self._cached_tree_hash
+        return program
 
     def uncurry(self) -> Tuple["Program", "Program"]:
         return self.to_program().uncurry()
@@ -231,8 +282,17 @@ class SerializedProgram:
         Any values in `args` that appear in the tree
         are presumed to have been hashed already.
         """
-        tmp = sexp_from_stream(io.BytesIO(self._buf), SExp.to)
-        return _tree_hash(tmp, set(args))
+        if len(args) > 0:
+            return sha256_treehash_from_bytes(self._buf, set(args))
+        if self._cached_tree_hash is None:
+            cacheable = len(self._buf) <= TREE_HASH_CACHE_MAX_PROGRAM_SIZE
+            tree_hash: Optional[bytes32] = TREE_HASH_CACHE.get(self._buf) if cacheable else None
+            if tree_hash is None:
+                tree_hash = sha256_treehash_from_bytes(self._buf)
+                if cacheable:
+                    TREE_HASH_CACHE.put(self._buf, tree_hash)
+            self._cached_tree_hash = tree_hash
+        return self._cached_tree_hash
 
     def run_mempool_with_cost(self, max_cost: int, *args) -> Tuple[int, Program]:
         return self._run(max_cost, MEMPOOL_MODE, *args)
@@ -6,7 +6,8 @@ This implementation goes to great pains to be non-recursive so we don't
 have to worry about blowing out the python stack.
 """
 
-from typing import Optional, Set
+from hashlib import sha256
+from typing import List, Optional, Set
 
 from clvm import CLVMObject
 
@@ -24,7 +25,11 @@ def sha256_treehash(sexp: CLVMObject, precalculated: Optional[Set[bytes32]] = No
 
     def handle_sexp(sexp_stack, op_stack, precalculated: Set[bytes32]) -> None:
         sexp = sexp_stack.pop()
-        if sexp.pair:
+        # Programs remember their tree hash, which is only valid if no atom is presumed to be a hash
+        memo = None if precalculated else getattr(sexp, "_cached_tree_hash", None)
+        if memo is not None:
+            sexp_stack.append(memo)
+        elif sexp.pair:
             p0, p1 = sexp.pair
             sexp_stack.append(p0)
             sexp_stack.append(p1)
@@ -56,3 +61,55 @@ def sha256_treehash(sexp: CLVMObject, precalculated: Optional[Set[bytes32]] = No
         op = op_stack.pop()
         op(sexp_stack, op_stack, precalculated)
     return bytes32(sexp_stack[0])
+
+
+def sha256_treehash_from_bytes(buf: bytes, precalculated: Optional[Set[bytes32]] = None) -> bytes32:
+    """
+    Same as sha256_treehash, for the serialized form of a program. The serialization is walked directly, without
+    creating a clvm object for each node.
+    """
+
+    if precalculated is None:
+        precalculated = set()
+
+    # the hashes of the left sides of the pairs being read, and for each pair, whether its left side was read already
+    left_hashes: List[bytes] = []
+    pairs: List[bool] = []
+    pos = 0
+    try:
+        while True:
+            b = buf[pos]
+            pos += 1
+            if b == 0xFF:
+                pairs.append(False)
+                continue
+            if b == 0x80:
+                atom = b""
+            elif b <= 0x7F:
+                atom = buf[pos - 1 : pos]
+            else:
+                # the number of leading set bits is the number of bytes of the size
+                size_len = 1
+                mask = 0x40
+                while b & mask:
+                    size_len += 1
+                    mask >>= 1
+                if size_len > 5:
+                    raise ValueError("bad encoding")
+                size = int.from_bytes(bytes([b & (mask - 1)]) + buf[pos : pos + size_len - 1], "big")
+                pos += size_len - 1
+                atom = buf[pos : pos + size]
+                if len(atom) != size:
+                    raise ValueError("bad encoding")
+                pos += size
+            h: bytes = atom if atom in precalculated else sha256(b"\1" + atom).digest()
+            # this completes every pair whose left side was read already
+            while len(pairs) > 0 and pairs[-1]:
+                pairs.pop()
+                h = sha256(b"\2" + left_hashes.pop() + h).digest()
+            if len(pairs) == 0:
+                return bytes32(h)
+            pairs[-1] = True
+            left_hashes.append(h)
+    except IndexError:
+        raise ValueError("bad encoding")
@@ -9,7 +9,8 @@ from chia.types.spend_bundle import SpendBundle
 @dataclass(frozen=True)
 class TransactionQueueEntry:
     """
-    A transaction received from peer. This is put into a queue, and not yet in the mempool.
+    A transaction received from a peer (full node or wallet), or submitted locally if peer is None. This is put into a
+    queue, and not yet in the mempool.
     """
 
     transaction: SpendBundle
@@ -1,11 +1,16 @@
+import atexit
 import functools
-from typing import Dict, List, Optional, Sequence
+import secrets
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 from blspy import AugSchemeMPL, G1Element, G2Element, GTElement
 
 from chia.types.blockchain_format.sized_bytes import bytes48
 from chia.util.hash import std_hash
 from chia.util.lru_cache import LRUCache
+from chia.util.shared_pairing_cache import SharedPairingCache
+
+_Element = TypeVar("_Element", G2Element, GTElement)
 
 
 def get_pairings(cache: LRUCache, pks: List[bytes48], msgs: Sequence[bytes], force_cache: bool) -> List[GTElement]:
@@ -15,6 +20,10 @@ def get_pairings(cache: LRUCache, pks: List[bytes48], msgs: Sequence[bytes], for
         aug_msg: bytes = pk + msg
         h: bytes = bytes(std_hash(aug_msg))
         pairing: Optional[GTElement] = cache.get(h)
+        if pairing is None and SHARED_CACHE is not None:
+            pairing = SHARED_CACHE.get(h)
+            if pairing is not None:
+                cache.put(h, pairing)
         if not force_cache and pairing is None:
             missing_count += 1
             # Heuristic to avoid more expensive sig validation with pairing
@@ -42,6 +51,8 @@ def get_pairings(cache: LRUCache, pks: List[bytes48], msgs: Sequence[bytes], for
 
             h = bytes(std_hash(aug_msg))
             cache.put(h, pairing)
+            if SHARED_CACHE is not None:
+                SHARED_CACHE.put(h, pairing)
             pairings[i] = pairing
     return pairings
 
@@ -49,6 +60,30 @@ def get_pairings(cache: LRUCache, pks: List[bytes48], msgs: Sequence[bytes], for
 # Increasing this number will increase RAM usage, but decrease BLS validation time for blocks and unfinished blocks.
 LOCAL_CACHE: LRUCache = LRUCache(50000)
 
+# Pairings shared with other processes (the mempool validation workers), backing up the LOCAL_CACHE of each process
+SHARED_CACHE: Optional[SharedPairingCache] = None
+SHARED_CACHE_SLOTS = 50000
+
+
+def create_shared_cache() -> Optional[str]:
+    """
+    Creates the shared pairing cache of this process, if it doesn't exist yet. Returns its name, to be passed to
+    attach_shared_cache in other processes, or None if shared memory isn't supported.
+    """
+    global SHARED_CACHE
+    if SHARED_CACHE is None and SharedPairingCache.is_supported():
+        SHARED_CACHE = SharedPairingCache.create(SHARED_CACHE_SLOTS)
+        atexit.register(SHARED_CACHE.close)
+    return None if SHARED_CACHE is None else SHARED_CACHE.name
+
+
+def attach_shared_cache(name: str) -> None:
+    global SHARED_CACHE
+    # forked processes inherit the cache of their parent
+    if SHARED_CACHE is None or SHARED_CACHE.name != name:
+        SHARED_CACHE = SharedPairingCache.attach(name)
+        atexit.register(SHARED_CACHE.close)
+
 
 def aggregate_verify(
     pks: List[bytes48], msgs: Sequence[bytes], sig: G2Element, force_cache: bool = False, cache: LRUCache = LOCAL_CACHE
@@ -61,3 +96,68 @@ def aggregate_verify(
 
     pairings_prod: GTElement = functools.reduce(GTElement.__mul__, pairings)
     return pairings_prod == sig.pair(G1Element.generator())
+
+
+# Size of the random scalars of batch_aggregate_verify. A batch containing an invalid signature passes the check with
+# probability about 2^-BATCH_SCALAR_BITS.
+BATCH_SCALAR_BITS = 64
+
+
+def _scale(element: _Element, scalar: int, add: Callable[[_Element, _Element], _Element]) -> _Element:
+    # double-and-add, since blspy can't multiply by a python int. With 64 bit scalars, this is much cheaper than the
+    # pairings it saves
+    result: Optional[_Element] = None
+    for bit in bin(scalar)[2:]:
+        if result is not None:
+            result = add(result, result)
+        if bit == "1":
+            result = element if result is None else add(result, element)
+    assert result is not None
+    return result
+
+
+def batch_aggregate_verify(
+    triples: Sequence[Tuple[List[bytes48], Sequence[bytes], G2Element]], cache: LRUCache = LOCAL_CACHE
+) -> List[bool]:
+    """
+    Verifies several aggregate signatures at once, returning whether each of them is valid. Each (pks, msgs, sig)
+    triple gets a random scalar r_i, and all of them are checked with a single pairing of the signatures:
+    prod_i (prod_j e(pk_ij, H(pk_ij + m_ij)))^r_i == e(g1, sum_i r_i * sig_i)
+    Without the random scalars, invalid signatures could cancel each other out. The pairings on the left are the same
+    as the ones of aggregate_verify, so they're cached. If the batch check fails, the triples are checked one by one.
+    """
+    results: List[bool] = [False] * len(triples)
+    # index, product of the pairings and signature of the triples that are part of the batch
+    batch: List[Tuple[int, GTElement, G2Element]] = []
+    for i, (pks, msgs, sig) in enumerate(triples):
+        if len(pks) == 0:
+            # nothing to pair, the signature must be the identity
+            results[i] = aggregate_verify(pks, msgs, sig, True, cache)
+        else:
+            pairings: List[GTElement] = get_pairings(cache, pks, msgs, True)
+            batch.append((i, functools.reduce(GTElement.__mul__, pairings), sig))
+
+    if len(batch) == 0:
+        return results
+    if len(batch) == 1:
+        i, pairings_prod, sig = batch[0]
+        results[i] = pairings_prod == sig.pair(G1Element.generator())
+        return results
+
+    lhs: Optional[GTElement] = None
+    rhs: Optional[G2Element] = None
+    for _, pairings_prod, sig in batch:
+        r: int = secrets.randbits(BATCH_SCALAR_BITS) | 1
+        scaled_prod: GTElement = _scale(pairings_prod, r, GTElement.__mul__)
+        scaled_sig: G2Element = _scale(sig, r, G2Element.__add__)
+        lhs = scaled_prod if lhs is None else lhs * scaled_prod
+        rhs = scaled_sig if rhs is None else rhs + scaled_sig
+    assert lhs is not None and rhs is not None
+    if lhs == rhs.pair(G1Element.generator()):
+        for i, _, _ in batch:
+            results[i] = True
+    else:
+        # At least one of them is invalid
+        for i, pairings_prod, sig in batch:
+            results[i] = pairings_prod == sig.pair(G1Element.generator())
+    return results
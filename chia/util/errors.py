@@ -154,6 +154,8 @@ class Err(Enum):
     INTERNAL_PROTOCOL_ERROR = 125
     INVALID_SPEND_BUNDLE = 126
     FAILED_GETTING_GENERATOR_MULTIPROCESSING = 127
+    MEMPOOL_CHAIN_TOO_LONG = 128
+    MEMPOOL_IS_FULL = 129
 
 
 class ValidationError(Exception):
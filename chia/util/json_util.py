@@ -4,6 +4,12 @@ from typing import Any
 
 from aiohttp import web
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from chia.util.streamable_view import StreamableView
 from chia.wallet.util.wallet_types import WalletType
 
 
@@ -13,7 +19,7 @@ class EnhancedJSONEncoder(json.JSONEncoder):
     """
 
     def default(self, o: Any):
-        if dataclasses.is_dataclass(o):
+        if dataclasses.is_dataclass(o) or isinstance(o, StreamableView):
             return o.to_json_dict()
         elif isinstance(o, WalletType):
             return o.name
@@ -32,9 +38,27 @@ def dict_to_json_str(o: Any) -> str:
     return json_str
 
 
+def dict_to_json_bytes(o: Any) -> bytes:
+    """
+    Converts a python object into json, encoded with orjson if it's installed. The result only differs from
+    dict_to_json_str() in whitespace, in non-ASCII characters not being escaped, and in NaN and infinite floats being
+    encoded as null (json writes NaN and Infinity, which aren't valid JSON).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                o,
+                default=EnhancedJSONEncoder().default,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            # orjson doesn't support ints that don't fit in 64 bits
+            pass
+    return dict_to_json_str(o).encode("utf-8")
+
+
 def obj_to_response(o: Any) -> web.Response:
     """
     Converts a python object into json. Used for RPC server which returns JSON.
     """
-    json_str = dict_to_json_str(o)
-    return web.Response(body=json_str, content_type="application/json")
+    return web.Response(body=dict_to_json_bytes(o), content_type="application/json")
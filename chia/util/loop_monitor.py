@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+# How often the event loop is sampled, in seconds
+SAMPLE_INTERVAL = 0.1
+# The number of samples kept for the percentiles, which is the last minute
+MAX_SAMPLES = 600
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping for SAMPLE_INTERVAL, which is how long other callbacks
+    kept it busy. A watchdog thread logs the stack of the event loop thread when it's been stalled for longer than
+    the threshold, which shows the coroutine or callback hogging it.
+    """
+
+    def __init__(self, log: logging.Logger, threshold: float = 1.0):
+        self.log = log
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_wakeup = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._sampler_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self._sampler_task is not None
+
+    def start(self) -> None:
+        """
+        Must be called from the event loop thread.
+        """
+        if self.enabled:
+            return None
+        self._loop_thread_id = threading.get_ident()
+        self.last_wakeup = time.monotonic()
+        self._stop_event = threading.Event()
+        self._sampler_task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(self._stop_event,), name="loop_lag_watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._sampler_task is not None:
+            self._sampler_task.cancel()
+            self._sampler_task = None
+        self._stop_event.set()
+        self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            self.last_wakeup = time.monotonic()
+            lag = max(0.0, self.last_wakeup - start - SAMPLE_INTERVAL)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.log.warning(f"Event loop was blocked for {lag:0.3f} seconds")
+
+    def current_lag(self) -> float:
+        """
+        How late the event loop is, in seconds: the last sample, or how long the current one is overdue if that's
+        longer. It's 0 when the monitor isn't running.
+        """
+        if not self.enabled:
+            return 0.0
+        overdue = time.monotonic() - self.last_wakeup - SAMPLE_INTERVAL
+        return max(0.0, overdue, self.samples[-1] if len(self.samples) > 0 else 0.0)
+
+    def _watch(self, stop_event: threading.Event) -> None:
+        reported = False
+        while not stop_event.wait(SAMPLE_INTERVAL):
+            stalled = time.monotonic() - self.last_wakeup - SAMPLE_INTERVAL
+            if stalled <= self.threshold:
+                reported = False
+                continue
+            if reported or self._loop_thread_id is None:
+                continue
+            # only the first stack of each stall is logged
+            reported = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.log.warning(f"Event loop blocked for {stalled:0.3f} seconds, at:\n{stack}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+
+        def percentile(p: float) -> Optional[float]:
+            if len(samples) == 0:
+                return None
+            return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "samples": len(samples),
+            "p50": percentile(0.5),
+            "p90": percentile(0.9),
+            "p99": percentile(0.99),
+            "max": self.max_lag,
+            "stalls": self.stalls,
+        }
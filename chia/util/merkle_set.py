@@ -1,6 +1,7 @@
 from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
 from hashlib import sha256
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 from chia.types.blockchain_format.sized_bytes import bytes32
 
@@ -121,6 +122,17 @@ class MerkleSet:
         else:
             self.root = root
 
+    @classmethod
+    def from_already_hashed(cls, values: Iterable[bytes]) -> "MerkleSet":
+        """
+        Builds the set of all the values at once. The tree is the same as the one built by adding them one at a time,
+        but each node is only created (and hashed) once.
+        """
+        leafs: List[bytes] = sorted(set(values))
+        for leaf in leafs:
+            assert len(leaf) == 32
+        return cls(_build(leafs, [int.from_bytes(leaf, "big") for leaf in leafs], 0, len(leafs), 0))
+
     def get_root(self) -> bytes32:
         return compress_root(self.root.get_hash())
 
@@ -181,6 +193,29 @@ def _make_middle(children: Any, depth: int) -> Node:
     return MiddleNode(nextvals)
 
 
+def _build(leafs: List[bytes], ints: List[int], lo: int, hi: int, depth: int) -> Node:
+    """
+    Builds the subtree of the sorted leafs[lo:hi], which all share their first depth bits. ints are the leafs as
+    integers, to find where they split.
+    """
+    if lo == hi:
+        return _empty
+    if hi - lo == 1:
+        return TerminalNode(leafs[lo])
+    # the leafs are sorted, so they all share the prefix of the first and last ones, and they split on the first bit
+    # those two differ on
+    split_depth = 256 - (ints[lo] ^ ints[hi - 1]).bit_length()
+    shift = 255 - split_depth
+    mid = bisect_left(ints, ((ints[lo] >> shift) + 1) << shift, lo, hi)
+    node: Node = MiddleNode(
+        [_build(leafs, ints, lo, mid, split_depth + 1), _build(leafs, ints, mid, hi, split_depth + 1)]
+    )
+    # above the split, every node has a single non empty child
+    for d in range(split_depth - 1, depth - 1, -1):
+        node = MiddleNode([node, _empty] if get_bit(leafs[lo], d) == 0 else [_empty, node])
+    return node
+
+
 class TerminalNode(Node):
     def __init__(self, hash: bytes, bits: List[int] = None):
         assert len(hash) == 32
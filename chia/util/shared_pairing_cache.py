@@ -0,0 +1,76 @@
+from typing import Any, Optional
+
+from blspy import GTElement
+
+from chia.util.hash import std_hash
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # python 3.7
+    shared_memory = None
+
+# The header holds the number of slots, since the size of the segment may be rounded up by the OS
+HEADER_SIZE = 8
+CHECKSUM_SIZE = 8
+KEY_SIZE = 32
+
+
+class SharedPairingCache:
+    """
+    A fixed size hash table of pairings in shared memory, keyed by std_hash(pk + msg), so pairings computed in one
+    process can be used by the others. Each pairing is stored in the slot selected by its key, replacing the previous
+    one. There is no locking: every slot holds a checksum of its content, and a slot whose checksum doesn't match
+    (because it's being written concurrently) is treated as a cache miss.
+    """
+
+    SLOT_SIZE = CHECKSUM_SIZE + KEY_SIZE + GTElement.SIZE
+
+    def __init__(self, shm: Any, slots: int, owner: bool):
+        self._shm = shm
+        self._slots = slots
+        self._owner = owner
+
+    @staticmethod
+    def is_supported() -> bool:
+        return shared_memory is not None
+
+    @classmethod
+    def create(cls, slots: int) -> "SharedPairingCache":
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + slots * cls.SLOT_SIZE)
+        shm.buf[:HEADER_SIZE] = slots.to_bytes(HEADER_SIZE, "big")
+        return cls(shm, slots, True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedPairingCache":
+        """
+        Attaches to a cache created by the parent process. The segment is only unlinked by its creator.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, int.from_bytes(shm.buf[:HEADER_SIZE], "big"), False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _offset(self, key: bytes) -> int:
+        return HEADER_SIZE + (int.from_bytes(key[:8], "big") % self._slots) * self.SLOT_SIZE
+
+    def get(self, key: bytes) -> Optional[GTElement]:
+        offset = self._offset(key)
+        entry = bytes(self._shm.buf[offset : offset + self.SLOT_SIZE])
+        entry_key = entry[CHECKSUM_SIZE : CHECKSUM_SIZE + KEY_SIZE]
+        if entry_key != key:
+            return None
+        if std_hash(entry[CHECKSUM_SIZE:])[:CHECKSUM_SIZE] != entry[:CHECKSUM_SIZE]:
+            return None
+        return GTElement.from_bytes(entry[CHECKSUM_SIZE + KEY_SIZE :])
+
+    def put(self, key: bytes, pairing: GTElement) -> None:
+        content = key + bytes(pairing)
+        offset = self._offset(key)
+        self._shm.buf[offset : offset + self.SLOT_SIZE] = std_hash(content)[:CHECKSUM_SIZE] + content
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -4,16 +4,18 @@ import dataclasses
 import io
 import os
 import pprint
+import struct
 from enum import Enum
-from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar, Union, get_type_hints
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_type_hints
 
 from blspy import G1Element, G2Element, PrivateKey
 from typing_extensions import Literal, get_args, get_origin
 
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.util.byte_types import hexstr_to_bytes
+from chia.util.byte_types import SizedBytes, hexstr_to_bytes
 from chia.util.hash import std_hash
 from chia.util.ints import uint32
+from chia.util.struct_stream import StructStream
 
 pp = pprint.PrettyPrinter(indent=1, width=120, compact=True)
 
@@ -59,6 +61,10 @@ FIELDS_FOR_STREAMABLE_CLASS: Dict[Type[object], Tuple[Field, ...]] = {}
 STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS: Dict[Type[object], List[StreamFunctionType]] = {}
 PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS: Dict[Type[object], List[ParseFunctionType]] = {}
 CONVERT_FUNCTIONS_FOR_STREAMABLE_CLASS: Dict[Type[object], List[ConvertFunctionType]] = {}
+# The parse and stream functions generated for each streamable class from the ones of its fields
+PARSE_FUNCTION_FOR_STREAMABLE_CLASS: Dict[Type[object], ParseFunctionType] = {}
+STREAM_FUNCTION_FOR_STREAMABLE_CLASS: Dict[Type[object], StreamFunctionType] = {}
+JSONIFY_FUNCTION_FOR_STREAMABLE_CLASS: Dict[Type[object], Callable[[Any], Dict[str, Any]]] = {}
 
 
 def create_fields_cache(cls: Type[object]) -> Tuple[Field, ...]:
@@ -222,6 +228,86 @@ def recurse_jsonify(d: Any) -> Any:
     raise ValueError(f"failed to jsonify {d} (type: {type(d)})")
 
 
+def jsonify_bytes(item: Any) -> str:
+    return f"0x{bytes(item).hex()}"
+
+
+def jsonify_enum(item: Any) -> str:
+    return str(item.name)
+
+
+def jsonify_optional(item: Any, jsonify_inner_f: Callable[[Any], Any]) -> Any:
+    if item is None:
+        return None
+    return jsonify_inner_f(item)
+
+
+def jsonify_list(item: Any, jsonify_inner_f: Callable[[Any], Any]) -> List[Any]:
+    return [jsonify_inner_f(x) for x in item]
+
+
+def jsonify_tuple(item: Any, list_jsonify_inner_f: List[Callable[[Any], Any]]) -> List[Any]:
+    return [jsonify_inner_f(x) for jsonify_inner_f, x in zip(list_jsonify_inner_f, item)]
+
+
+def identity(item: Any) -> Any:
+    return item
+
+
+def function_to_jsonify_one_item(f_type: Type[Any]) -> Optional[Callable[[Any], Any]]:
+    """
+    Returns a function converting a value of the given type the same way recurse_jsonify() does, with the checks
+    done on the type once. None means that the value is used as is.
+    """
+    if is_type_SpecificOptional(f_type):
+        jsonify_optional_inner_f = function_to_jsonify_one_item(get_args(f_type)[0])
+        if jsonify_optional_inner_f is None:
+            return None
+        jsonify_inner_f: Callable[[Any], Any] = jsonify_optional_inner_f
+        return lambda item: jsonify_optional(item, jsonify_inner_f)
+    if is_type_List(f_type):
+        jsonify_list_inner_f = function_to_jsonify_one_item(get_args(f_type)[0])
+        if jsonify_list_inner_f is None:
+            return list
+        jsonify_item_f: Callable[[Any], Any] = jsonify_list_inner_f
+        return lambda item: jsonify_list(item, jsonify_item_f)
+    if is_type_Tuple(f_type):
+        list_jsonify_inner_f = [function_to_jsonify_one_item(inner_type) or identity for inner_type in get_args(f_type)]
+        return lambda item: jsonify_tuple(item, list_jsonify_inner_f)
+    if f_type in JSONIFY_FUNCTION_FOR_STREAMABLE_CLASS:
+        # nested streamable objects are converted field by field, even if their class overrides to_json_dict()
+        return JSONIFY_FUNCTION_FOR_STREAMABLE_CLASS[f_type]
+    if not isinstance(f_type, type) or dataclasses.is_dataclass(f_type):
+        return recurse_jsonify
+    if f_type.__name__ in unhashable_types or issubclass(f_type, bytes):
+        return jsonify_bytes
+    if issubclass(f_type, Enum):
+        return jsonify_enum
+    if f_type is bool or f_type is str:
+        return None
+    if issubclass(f_type, int):
+        return int
+    return recurse_jsonify
+
+
+def create_jsonify_function(cls: Type[Any], fields: Tuple[Field, ...]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Generates a function returning the same dict as recurse_jsonify(), which builds the dict at once instead of
+    inspecting the fields and the types of their values.
+    """
+    namespace: Dict[str, Any] = {}
+    items: List[str] = []
+    for i, field in enumerate(fields):
+        jsonify_f = function_to_jsonify_one_item(field.type)
+        if jsonify_f is None:
+            items.append(f"{field.name!r}: obj.{field.name}")
+        else:
+            namespace[f"j{i}"] = jsonify_f
+            items.append(f"{field.name!r}: j{i}(obj.{field.name})")
+    exec(f"def to_json_dict(obj):\n    return {{{', '.join(items)}}}", namespace)
+    return namespace["to_json_dict"]  # type: ignore[no-any-return]
+
+
 def parse_bool(f: BinaryIO) -> bool:
     bool_byte = f.read(1)
     assert bool_byte is not None and len(bool_byte) == 1  # Checks for EOF
@@ -344,6 +430,204 @@ def stream_byte_convertible(item: object, f: BinaryIO) -> None:
     f.write(getattr(item, "__bytes__")())
 
 
+# struct formats of the sized ints, by size
+INT_FORMATS = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+
+def overrides_serialization(f_type: Type[Any], base: Type[Any]) -> bool:
+    for klass in f_type.__mro__[: f_type.__mro__.index(base)]:
+        if any(name in vars(klass) for name in ["__new__", "__init__", "parse", "stream", "from_bytes", "__bytes__"]):
+            return True
+    return False
+
+
+def fixed_size_format(f_type: Type[Any]) -> Optional[str]:
+    """
+    Returns the struct format of the types that are serialized to a fixed number of bytes, so runs of them can be
+    (un)packed at once, or None for the other types.
+    """
+    if f_type is bool:
+        return "B"
+    if not isinstance(f_type, type):
+        return None
+    if issubclass(f_type, StructStream) and not overrides_serialization(f_type, StructStream):
+        if f_type.SIZE in INT_FORMATS:
+            int_format = INT_FORMATS[f_type.SIZE]
+            return int_format if f_type.SIGNED else int_format.upper()
+        return f"{f_type.SIZE}s"
+    if issubclass(f_type, SizedBytes) and not overrides_serialization(f_type, SizedBytes):
+        return f"{f_type._size}s"
+    return None
+
+
+def convert_fixed_size_code(f_type: Type[Any], var: str, type_name: str) -> List[str]:
+    """
+    Returns the code turning the value unpacked with the struct format of f_type into an instance of f_type. The
+    unpacked values are in range by construction, so the sized ints and bytes are created without the checks.
+    """
+    if f_type is bool:
+        return [f"if {var} not in (0, 1):", '    raise ValueError("Bool byte must be 0 or 1")', f"{var} = {var} == 1"]
+    if issubclass(f_type, SizedBytes):
+        return [f"{var} = new_bytes({type_name}, {var})"]
+    if f_type.SIZE in INT_FORMATS:
+        return [f"{var} = new_int({type_name}, {var})"]
+    return [f"{var} = {type_name}.from_bytes({var})"]
+
+
+def fixed_size_stream_expression(f_type: Type[Any], value: str) -> str:
+    if f_type is not bool and issubclass(f_type, StructStream) and f_type.SIZE not in INT_FORMATS:
+        return f"bytes({value})"
+    return value
+
+
+def create_parse_function(cls: Type[Any], fields: Tuple[Field, ...], parse_functions: List[ParseFunctionType]) -> Any:
+    """
+    Generates a function parsing an instance of cls, with the fields parsed inline instead of through the list of
+    parse functions. Runs of fixed size fields are read and unpacked at once, and when there isn't enough data left for
+    a run, its fields are parsed one by one, to fail the same way.
+    """
+    namespace: Dict[str, Any] = {
+        "cls": cls,
+        "new": object.__new__,
+        "new_int": int.__new__,
+        "new_bytes": bytes.__new__,
+        "SEEK_CUR": os.SEEK_CUR,
+        "parse_uint32": parse_uint32,
+        "parse_optional": parse_optional,
+    }
+    code = ["def parse(f):", "    read = f.read"]
+
+    def add(indent: int, lines: List[str]) -> None:
+        code.extend(" " * indent + line for line in lines)
+
+    def generated_parse_function(f_type: Type[Any], parse_f: ParseFunctionType) -> ParseFunctionType:
+        # items of streamable types call their generated parse function directly
+        if f_type in PARSE_FUNCTION_FOR_STREAMABLE_CLASS and f_type.parse.__func__ is Streamable.parse.__func__:
+            return PARSE_FUNCTION_FOR_STREAMABLE_CLASS[f_type]
+        return parse_f
+
+    for i, (field, parse_f) in enumerate(zip(fields, parse_functions)):
+        namespace[f"t{i}"] = field.type
+        namespace[f"p{i}"] = generated_parse_function(field.type, parse_f)
+
+    i = 0
+    while i < len(fields):
+        run: List[int] = []
+        while i + len(run) < len(fields) and fixed_size_format(fields[i + len(run)].type) is not None:
+            run.append(i + len(run))
+        if len(run) > 0:
+            run_struct = struct.Struct(">" + "".join(str(fixed_size_format(fields[j].type)) for j in run))
+            namespace[f"unpack{i}"] = run_struct.unpack
+            add(4, [f"b = read({run_struct.size})", f"if len(b) == {run_struct.size}:"])
+            add(8, [f"{', '.join(f'v{j}' for j in run)}, = unpack{i}(b)"])
+            for j in run:
+                add(8, convert_fixed_size_code(fields[j].type, f"v{j}", f"t{j}"))
+            add(4, ["else:"])
+            add(8, ["f.seek(-len(b), SEEK_CUR)"] + [f"v{j} = p{j}(f)" for j in run])
+            i += len(run)
+            continue
+
+        f_type = fields[i].type
+        if is_type_List(f_type) and get_args(f_type)[0] is not bool and fixed_size_format(get_args(f_type)[0]):
+            inner_type = get_args(f_type)[0]
+            item_format = str(fixed_size_format(inner_type))
+            item_size = struct.calcsize(">" + item_format)
+            namespace[f"inner{i}"] = inner_type
+            add(4, ["b = read(4)", f"lb = read(int.from_bytes(b, 'big') * {item_size}) if len(b) == 4 else b''"])
+            add(4, [f"if len(b) == 4 and len(lb) == int.from_bytes(b, 'big') * {item_size}:"])
+            if issubclass(inner_type, SizedBytes):
+                add(
+                    8,
+                    [f"v{i} = [new_bytes(inner{i}, lb[j : j + {item_size}]) for j in range(0, len(lb), {item_size})]"],
+                )
+            elif item_format.endswith("s"):
+                add(
+                    8,
+                    [f"v{i} = [inner{i}.from_bytes(lb[j : j + {item_size}]) for j in range(0, len(lb), {item_size})]"],
+                )
+            else:
+                namespace[f"iter_unpack{i}"] = struct.Struct(">" + item_format).iter_unpack
+                add(8, [f"v{i} = [new_int(inner{i}, x) for (x,) in iter_unpack{i}(lb)]"])
+            add(4, ["else:"])
+            add(8, ["f.seek(-(len(b) + len(lb)), SEEK_CUR)", f"v{i} = p{i}(f)"])
+        elif is_type_List(f_type) or is_type_SpecificOptional(f_type):
+            inner_type = get_args(f_type)[0]
+            namespace[f"inner_p{i}"] = generated_parse_function(inner_type, cls.function_to_parse_one_item(inner_type))
+            if is_type_List(f_type):
+                add(4, [f"v{i} = [inner_p{i}(f) for _ in range(parse_uint32(f))]"])
+            else:
+                add(4, [f"v{i} = parse_optional(f, inner_p{i})"])
+        else:
+            add(4, [f"v{i} = p{i}(f)"])
+        i += 1
+
+    add(4, ["obj = new(cls)"])
+    if len(fields) > 0:
+        add(4, [f"obj.__dict__.update({', '.join(f'{field.name}=v{j}' for j, field in enumerate(fields))})"])
+    add(4, ["return obj"])
+    exec("\n".join(code), namespace)
+    return namespace["parse"]
+
+
+def create_stream_function(
+    cls: Type[Any], fields: Tuple[Field, ...], stream_functions: List[StreamFunctionType]
+) -> Any:
+    """
+    Generates a function streaming an instance of cls, with runs of fixed size fields packed at once. The output is
+    identical to streaming the fields one by one.
+    """
+    namespace: Dict[str, Any] = {
+        "uint32": uint32,
+        "stream_optional": stream_optional,
+    }
+    code = ["def stream(obj, f):", "    write = f.write"]
+
+    def add(lines: List[str]) -> None:
+        code.extend("    " + line for line in lines)
+
+    for i, stream_f in enumerate(stream_functions):
+        namespace[f"s{i}"] = stream_f
+
+    i = 0
+    while i < len(fields):
+        run: List[int] = []
+        while i + len(run) < len(fields) and fixed_size_format(fields[i + len(run)].type) is not None:
+            run.append(i + len(run))
+        if len(run) > 0:
+            run_struct = struct.Struct(">" + "".join(str(fixed_size_format(fields[j].type)) for j in run))
+            namespace[f"pack{i}"] = run_struct.pack
+            values = [fixed_size_stream_expression(fields[j].type, f"obj.{fields[j].name}") for j in run]
+            add([f"write(pack{i}({', '.join(values)}))"])
+            i += len(run)
+            continue
+
+        f_type = fields[i].type
+        name = fields[i].name
+        if is_type_List(f_type) and get_args(f_type)[0] is not bool and fixed_size_format(get_args(f_type)[0]):
+            inner_type = get_args(f_type)[0]
+            item_format = str(fixed_size_format(inner_type))
+            add([f"x = obj.{name}", "write(bytes(uint32(len(x))))"])
+            if issubclass(inner_type, SizedBytes):
+                add(['write(b"".join(x))'])
+            elif item_format.endswith("s"):
+                add(['write(b"".join(bytes(item) for item in x))'])
+            else:
+                add([f'write(struct.pack(f">{{len(x)}}{item_format}", *x))'])
+                namespace["struct"] = struct
+        elif is_type_List(f_type):
+            namespace[f"inner_s{i}"] = cls.function_to_stream_one_item(get_args(f_type)[0])
+            add([f"x = obj.{name}", "write(bytes(uint32(len(x))))", "for item in x:", f"    inner_s{i}(item, f)"])
+        elif is_type_SpecificOptional(f_type):
+            namespace[f"inner_s{i}"] = cls.function_to_stream_one_item(get_args(f_type)[0])
+            add([f"stream_optional(inner_s{i}, obj.{name}, f)"])
+        else:
+            add([f"s{i}(obj.{name}, f)"])
+        i += 1
+
+    exec("\n".join(code), namespace)
+    return namespace["stream"]
+
+
 def streamable(cls: Type[_T_Streamable]) -> Type[_T_Streamable]:
     """
     This decorator forces correct streamable protocol syntax/usage and populates the caches for types hints and
@@ -394,6 +678,9 @@ def streamable(cls: Type[_T_Streamable]) -> Type[_T_Streamable]:
     STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[cls] = stream_functions
     PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS[cls] = parse_functions
     CONVERT_FUNCTIONS_FOR_STREAMABLE_CLASS[cls] = convert_functions
+    STREAM_FUNCTION_FOR_STREAMABLE_CLASS[cls] = create_stream_function(cls, fields, stream_functions)
+    PARSE_FUNCTION_FOR_STREAMABLE_CLASS[cls] = create_parse_function(cls, fields, parse_functions)
+    JSONIFY_FUNCTION_FOR_STREAMABLE_CLASS[cls] = create_jsonify_function(cls, fields)
     return cls
 
 
@@ -541,18 +828,8 @@ class Streamable:
 
     @classmethod
     def parse(cls: Type[_T_Streamable], f: BinaryIO) -> _T_Streamable:
-        # Create the object without calling __init__() to avoid unnecessary post-init checks in strictdataclass
-        obj: _T_Streamable = object.__new__(cls)
-        fields = iter(FIELDS_FOR_STREAMABLE_CLASS.get(cls, {}))
-        values: Iterator[object] = (parse_f(f) for parse_f in PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS[cls])
-        for field, value in zip(fields, values):
-            object.__setattr__(obj, field.name, value)
-
-        # Use -1 as a sentinel value as it's not currently serializable
-        if next(fields, -1) != -1:
-            raise ValueError("Failed to parse incomplete Streamable object")
-        if next(values, -1) != -1:
-            raise ValueError("Failed to parse unknown data in Streamable object")
+        # The generated function creates the object without calling __init__() to avoid unnecessary post-init checks
+        obj: _T_Streamable = PARSE_FUNCTION_FOR_STREAMABLE_CLASS[cls](f)  # type: ignore[assignment]
         return obj
 
     @classmethod
@@ -586,16 +863,9 @@ class Streamable:
             raise NotImplementedError(f"can't stream {f_type}")
 
     def stream(self, f: BinaryIO) -> None:
-        self_type = type(self)
-        try:
-            fields = FIELDS_FOR_STREAMABLE_CLASS[self_type]
-            functions = STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[self_type]
-        except Exception:
-            fields = ()
-            functions = []
-
-        for field, stream_func in zip(fields, functions):
-            stream_func(getattr(self, field.name), f)
+        stream_func = STREAM_FUNCTION_FOR_STREAMABLE_CLASS.get(type(self))
+        if stream_func is not None:
+            stream_func(self, f)
 
     def get_hash(self) -> bytes32:
         return bytes32(std_hash(bytes(self), skip_bytes_conversion=True))
@@ -619,8 +889,11 @@ class Streamable:
         return pp.pformat(recurse_jsonify(self))
 
     def to_json_dict(self) -> Dict[str, Any]:
-        ret: Dict[str, Any] = recurse_jsonify(self)
-        return ret
+        jsonify_f = JSONIFY_FUNCTION_FOR_STREAMABLE_CLASS.get(type(self))
+        if jsonify_f is None:
+            ret: Dict[str, Any] = recurse_jsonify(self)
+            return ret
+        return jsonify_f(self)
 
     @classmethod
     def from_json_dict(cls: Any, json_dict: Dict[str, Any]) -> Any:
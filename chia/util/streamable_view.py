@@ -0,0 +1,207 @@
+import inspect
+import io
+import struct
+import types
+from typing import Any, Callable, Dict, Generic, List, Type, Union
+
+from chia_rs import serialized_length
+from typing_extensions import get_args
+
+from chia.types.blockchain_format.program import Program, SerializedProgram
+from chia.util.streamable import (
+    FIELDS_FOR_STREAMABLE_CLASS,
+    Streamable,
+    _T_Streamable,
+    fixed_size_format,
+    is_type_List,
+    is_type_SpecificOptional,
+    is_type_Tuple,
+    size_hints,
+)
+
+# takes the buffer and the offset of an item, and returns the offset following it
+SkipFunctionType = Callable[[memoryview, int], int]
+
+SKIP_FUNCTION_FOR_TYPE: Dict[Any, SkipFunctionType] = {}
+
+
+def skip_fixed_size(size: int) -> SkipFunctionType:
+    return lambda buf, offset: offset + size
+
+
+def skip_optional(buf: memoryview, offset: int, skip_item: SkipFunctionType) -> int:
+    if buf[offset] == 0:
+        return offset + 1
+    if buf[offset] != 1:
+        raise ValueError("Optional must be 0 or 1")
+    return skip_item(buf, offset + 1)
+
+
+def skip_list(buf: memoryview, offset: int, skip_item: SkipFunctionType) -> int:
+    n = int.from_bytes(buf[offset : offset + 4], "big", signed=False)
+    offset += 4
+    for _ in range(n):
+        offset = skip_item(buf, offset)
+    return offset
+
+
+def skip_fixed_size_list(buf: memoryview, offset: int, item_size: int) -> int:
+    return offset + 4 + int.from_bytes(buf[offset : offset + 4], "big", signed=False) * item_size
+
+
+def skip_items(buf: memoryview, offset: int, skip_functions: List[SkipFunctionType]) -> int:
+    for skip_f in skip_functions:
+        offset = skip_f(buf, offset)
+    return offset
+
+
+def skip_bytes(buf: memoryview, offset: int) -> int:
+    return offset + 4 + int.from_bytes(buf[offset : offset + 4], "big", signed=False)
+
+
+def skip_program(buf: memoryview, offset: int) -> int:
+    return offset + serialized_length(buf[offset:])
+
+
+def function_to_skip_one_item(f_type: Any) -> SkipFunctionType:
+    """
+    Returns a function skipping over a serialized value of the given type without decoding it.
+    """
+    skip_f = SKIP_FUNCTION_FOR_TYPE.get(f_type)
+    if skip_f is not None:
+        return skip_f
+
+    item_format = fixed_size_format(f_type)
+    if item_format is not None:
+        skip_f = skip_fixed_size(struct.calcsize(">" + item_format))
+    elif is_type_SpecificOptional(f_type):
+        skip_inner_f = function_to_skip_one_item(get_args(f_type)[0])
+        skip_f = lambda buf, offset: skip_optional(buf, offset, skip_inner_f)  # noqa: E731
+    elif is_type_List(f_type):
+        inner_format = fixed_size_format(get_args(f_type)[0])
+        if inner_format is not None:
+            item_size = struct.calcsize(">" + inner_format)
+            skip_f = lambda buf, offset: skip_fixed_size_list(buf, offset, item_size)  # noqa: E731
+        else:
+            skip_inner_f = function_to_skip_one_item(get_args(f_type)[0])
+            skip_f = lambda buf, offset: skip_list(buf, offset, skip_inner_f)  # noqa: E731
+    elif is_type_Tuple(f_type):
+        skip_functions = [function_to_skip_one_item(inner_type) for inner_type in get_args(f_type)]
+        skip_f = lambda buf, offset: skip_items(buf, offset, skip_functions)  # noqa: E731
+    elif f_type is bytes or f_type is str:
+        skip_f = skip_bytes
+    elif f_type is Program or f_type is SerializedProgram:
+        skip_f = skip_program
+    elif isinstance(f_type, type) and f_type.__name__ in size_hints:
+        skip_f = skip_fixed_size(size_hints[f_type.__name__])
+    elif f_type in FIELDS_FOR_STREAMABLE_CLASS and f_type.parse.__func__ is Streamable.parse.__func__:
+        skip_functions = [function_to_skip_one_item(field.type) for field in FIELDS_FOR_STREAMABLE_CLASS[f_type]]
+        skip_f = lambda buf, offset: skip_items(buf, offset, skip_functions)  # noqa: E731
+    else:
+        # anything else is parsed to find out where it ends
+        parse_f = Streamable.function_to_parse_one_item(f_type)
+
+        def skip_parsed(buf: memoryview, offset: int) -> int:
+            f = io.BytesIO(buf[offset:])
+            parse_f(f)
+            return offset + f.tell()
+
+        skip_f = skip_parsed
+
+    SKIP_FUNCTION_FOR_TYPE[f_type] = skip_f
+    return skip_f
+
+
+class StreamableView(Generic[_T_Streamable]):
+    """
+    A read-only view of a serialized streamable object, which decodes its fields when they are first accessed. The
+    fields before the accessed one are only skipped over, so reading the height or the header hash of a block doesn't
+    decode its proofs or its generator, and the serialized object is served as is.
+
+    The properties and methods of the streamable class work on the view, as long as they only read fields.
+    """
+
+    def __init__(self, cls: Type[_T_Streamable], buf: Union[bytes, memoryview]):
+        self._cls = cls
+        self._buf = buf
+        self._view = memoryview(buf)
+        self._fields = FIELDS_FOR_STREAMABLE_CLASS[cls]
+        self._field_indices = {field.name: i for i, field in enumerate(self._fields)}
+        # the offsets of the fields that have been reached so far, the last one being the offset of the next field
+        self._offsets: List[int] = [0]
+        self._values: Dict[str, Any] = {}
+
+    def _field_range(self, index: int) -> slice:
+        while len(self._offsets) <= index + 1:
+            i = len(self._offsets) - 1
+            try:
+                offset = function_to_skip_one_item(self._fields[i].type)(self._view, self._offsets[i])
+            except IndexError:
+                offset = len(self._view) + 1
+            if offset > len(self._view):
+                raise ValueError(f"Failed to parse field {self._fields[i].name} of {self._cls.__name__}")
+            self._offsets.append(offset)
+        return slice(self._offsets[index], self._offsets[index + 1])
+
+    def field_bytes(self, name: str) -> memoryview:
+        """
+        Returns the serialized field without copying it.
+        """
+        return self._view[self._field_range(self._field_indices[name])]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in self._values:
+            return self._values[name]
+        if name in self._field_indices:
+            f_type = self._fields[self._field_indices[name]].type
+            f = io.BytesIO(self.field_bytes(name))
+            value = self._cls.function_to_parse_one_item(f_type)(f)
+            assert f.read() == b""
+            self._values[name] = value
+            return value
+
+        attr = inspect.getattr_static(self._cls, name)
+        if isinstance(attr, property):
+            return attr.__get__(self)
+        if isinstance(attr, types.FunctionType):
+            return types.MethodType(attr, self)
+        return getattr(self._cls, name)
+
+    def __bytes__(self) -> bytes:
+        if isinstance(self._buf, bytes):
+            return self._buf
+        return bytes(self._view)
+
+    def __repr__(self) -> str:
+        return f"StreamableView({self._cls.__name__}, {len(self._view)} bytes)"
+
+    def stream(self, f: Any) -> None:
+        f.write(self._view)
+
+    def get_object(self) -> _T_Streamable:
+        """
+        Decodes the whole object.
+        """
+        return self._cls.from_bytes(bytes(self))
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return self.get_object().to_json_dict()
+
+    def replace(self, **changes: Any) -> "StreamableView[_T_Streamable]":
+        """
+        Returns a view of a copy of the serialized object with some fields replaced, like dataclasses.replace().
+        """
+        for name in changes:
+            if name not in self._field_indices:
+                raise TypeError(f"{self._cls.__name__} has no field {name}")
+        chunks: List[Any] = []
+        for i, field in enumerate(self._fields):
+            if field.name in changes:
+                f = io.BytesIO()
+                self._cls.function_to_stream_one_item(field.type)(changes[field.name], f)
+                chunks.append(f.getvalue())
+            else:
+                chunks.append(self._view[self._field_range(i)])
+        return StreamableView(self._cls, b"".join(chunks))
@@ -4,18 +4,27 @@ from typing import List, Tuple, Iterator, Optional
 from blspy import G2Element
 
 from chia.types.blockchain_format.coin import Coin, coin_as_list
-from chia.types.blockchain_format.program import Program, INFINITE_COST
+from chia.types.blockchain_format.program import (
+    INFINITE_COST,
+    Program,
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+)
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.spend_bundle import CoinSpend, SpendBundle
 from chia.util.condition_tools import conditions_dict_for_solution
 from chia.wallet.lineage_proof import LineageProof
-from chia.wallet.puzzles.cat_loader import CAT_MOD
+from chia.wallet.puzzles.cat_loader import CAT_MOD, CAT_MOD_HASH
 
 NULL_SIGNATURE = G2Element()
 
 ANYONE_CAN_SPEND_PUZZLE = Program.to(1)  # simply return the conditions
 
+CAT_MOD_HASH_HASH = shatree_atom(CAT_MOD_HASH)
+CAT_QUOTED_MOD_HASH = calculate_hash_of_quoted_mod_hash(CAT_MOD_HASH)
+
 
 # information needed to spend a cc
 @dataclasses.dataclass
@@ -60,6 +69,16 @@ def construct_cat_puzzle(
     return mod_code.curry(mod_code_hash, limitations_program_hash, inner_puzzle)
 
 
+def construct_cat_puzzle_hash(limitations_program_hash: bytes32, inner_puzzle_hash: bytes32) -> bytes32:
+    """
+    Same as construct_cat_puzzle(CAT_MOD, limitations_program_hash, inner_puzzle).get_tree_hash(), from the hash of
+    the inner puzzle.
+    """
+    return curry_and_treehash(
+        CAT_QUOTED_MOD_HASH, CAT_MOD_HASH_HASH, shatree_atom(limitations_program_hash), inner_puzzle_hash
+    )
+
+
 def subtotals_for_deltas(deltas) -> List[int]:
     """
     Given a list of deltas corresponding to input coins, create the "subtotals" list
@@ -30,6 +30,7 @@ from chia.wallet.cat_wallet.cat_utils import (
     CAT_MOD,
     SpendableCAT,
     construct_cat_puzzle,
+    construct_cat_puzzle_hash,
     match_cat_puzzle,
     unsigned_spend_bundle_for_spendable_cats,
 )
@@ -398,6 +399,10 @@ class CATWallet:
         cat_puzzle: Program = construct_cat_puzzle(CAT_MOD, self.cat_info.limitations_program_hash, inner_puzzle)
         return cat_puzzle
 
+    def puzzle_hash_for_pk(self, pubkey) -> bytes32:
+        inner_puzzle_hash = self.standard_wallet.puzzle_hash_for_pk(bytes(pubkey))
+        return construct_cat_puzzle_hash(self.cat_info.limitations_program_hash, inner_puzzle_hash)
+
     async def get_new_cat_puzzle_hash(self):
         return (await self.wallet_state_manager.get_unused_derivation_record(self.id())).puzzle_hash
 
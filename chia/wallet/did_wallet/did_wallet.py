@@ -30,6 +30,7 @@ from chia.wallet.did_wallet import did_wallet_puzzles
 from chia.wallet.derive_keys import master_sk_to_wallet_sk_unhardened
 from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
     puzzle_for_pk,
+    puzzle_hash_for_pk,
     DEFAULT_HIDDEN_PUZZLE_HASH,
     calculate_synthetic_secret_key,
 )
@@ -116,9 +117,9 @@ class DIDWallet:
         await self.wallet_state_manager.add_new_wallet(self, self.wallet_info.id)
         assert self.did_info.origin_coin is not None
         assert self.did_info.current_inner is not None
-        did_puzzle_hash = did_wallet_puzzles.create_fullpuz(
-            self.did_info.current_inner, self.did_info.origin_coin.name()
-        ).get_tree_hash()
+        did_puzzle_hash = did_wallet_puzzles.create_fullpuz_hash(
+            self.did_info.current_inner.get_tree_hash(), self.did_info.origin_coin.name()
+        )
 
         did_record = TransactionRecord(
             confirmed_at_height=uint32(0),
@@ -466,7 +467,7 @@ class DIDWallet:
                 await self.wallet_state_manager.get_unused_derivation_record(self.wallet_info.id, in_transaction=True)
             ).pubkey
         )
-        new_puzhash = puzzle_for_pk(new_pubkey).get_tree_hash()
+        new_puzhash = puzzle_hash_for_pk(new_pubkey)
         parent_info = None
         assert did_info.origin_coin is not None
         assert did_info.current_inner is not None
@@ -535,6 +536,18 @@ class DIDWallet:
             innerpuz = Program.to((8, 0))
             return did_wallet_puzzles.create_fullpuz(innerpuz, bytes32([0] * 32))
 
+    def puzzle_hash_for_pk(self, pubkey: G1Element) -> bytes32:
+        if self.did_info.origin_coin is None:
+            return self.puzzle_for_pk(pubkey).get_tree_hash()
+        innerpuz_hash = did_wallet_puzzles.get_inner_puzhash_by_p2(
+            puzzle_hash_for_pk(pubkey),
+            self.did_info.backup_ids,
+            self.did_info.num_of_backup_ids_needed,
+            self.did_info.origin_coin.name(),
+            did_wallet_puzzles.metadata_to_program(json.loads(self.did_info.metadata)),
+        )
+        return did_wallet_puzzles.create_fullpuz_hash(innerpuz_hash, self.did_info.origin_coin.name())
+
     async def get_new_puzzle(self) -> Program:
         return self.puzzle_for_pk(
             (await self.wallet_state_manager.get_unused_derivation_record(self.wallet_info.id)).pubkey
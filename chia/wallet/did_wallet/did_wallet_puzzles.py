@@ -1,11 +1,17 @@
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.program import (
+    Program,
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+)
 from typing import List, Optional, Tuple, Iterator, Dict
 from blspy import G1Element
 from chia.types.blockchain_format.coin import Coin
 from chia.types.coin_spend import CoinSpend
 from chia.util.ints import uint64
 from chia.wallet.puzzles.load_clvm import load_clvm
+from chia.wallet.puzzles.singleton_top_layer_v1_1 import puzzle_hash_for_singleton
 from chia.types.condition_opcodes import ConditionOpcode
 
 
@@ -16,6 +22,7 @@ SINGLETON_LAUNCHER = load_clvm("singleton_launcher.clvm")
 SINGLETON_MOD_HASH = SINGLETON_TOP_LAYER_MOD.get_tree_hash()
 LAUNCHER_PUZZLE_HASH = SINGLETON_LAUNCHER.get_tree_hash()
 DID_INNERPUZ_MOD_HASH = DID_INNERPUZ_MOD.get_tree_hash()
+DID_INNERPUZ_QUOTED_MOD_HASH = calculate_hash_of_quoted_mod_hash(DID_INNERPUZ_MOD_HASH)
 
 
 def create_innerpuz(
@@ -57,9 +64,14 @@ def get_inner_puzhash_by_p2(
     """
     backup_ids_hash = Program(Program.to(recovery_list)).get_tree_hash()
     singleton_struct = Program.to((SINGLETON_MOD_HASH, (launcher_id, LAUNCHER_PUZZLE_HASH)))
-    return DID_INNERPUZ_MOD.curry(
-        p2_puzhash, backup_ids_hash, num_of_backup_ids_needed, singleton_struct, metadata
-    ).get_tree_hash(p2_puzhash)
+    return curry_and_treehash(
+        DID_INNERPUZ_QUOTED_MOD_HASH,
+        p2_puzhash,
+        shatree_atom(backup_ids_hash),
+        Program.to(num_of_backup_ids_needed).get_tree_hash(),
+        singleton_struct.get_tree_hash(),
+        metadata.get_tree_hash(),
+    )
 
 
 def create_fullpuz(innerpuz: Program, launcher_id: bytes32) -> Program:
@@ -75,6 +87,16 @@ def create_fullpuz(innerpuz: Program, launcher_id: bytes32) -> Program:
     return SINGLETON_TOP_LAYER_MOD.curry(singleton_struct, innerpuz)
 
 
+def create_fullpuz_hash(innerpuz_hash: bytes32, launcher_id: bytes32) -> bytes32:
+    """
+    Calculate the puzzle hash of a DID full puzzle, without creating it
+    :param innerpuz_hash: DID inner puzzle hash
+    :param launcher_id:
+    :return: DID full puzzle hash
+    """
+    return puzzle_hash_for_singleton(launcher_id, innerpuz_hash, LAUNCHER_PUZZLE_HASH)
+
+
 def is_did_innerpuz(inner_f: Program) -> bool:
     """
     Check if a puzzle is a DID inner mode
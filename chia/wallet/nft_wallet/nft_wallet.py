@@ -12,7 +12,7 @@ from chia.server.outbound_message import NodeType
 from chia.server.ws_connection import WSChiaConnection
 from chia.types.announcement import Announcement
 from chia.types.blockchain_format.coin import Coin
-from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.program import NULL_TREEHASH, Program, shatree_atom, shatree_pair
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.coin_spend import CoinSpend
 from chia.types.spend_bundle import SpendBundle
@@ -323,6 +323,11 @@ class NFTWallet:
         )
         return provenance_puzzle
 
+    def puzzle_hash_for_pk(self, pk: G1Element) -> bytes32:
+        inner_puzzle_hash = self.standard_wallet.puzzle_hash_for_pk(bytes(pk))
+        # the hash of the list built by puzzle_for_pk
+        return shatree_pair(shatree_atom(NFT_STATE_LAYER_MOD_HASH), shatree_pair(inner_puzzle_hash, NULL_TREEHASH))
+
     async def get_did_approval_info(
         self,
         nft_id: bytes32,
@@ -61,7 +61,12 @@ from typing import Union
 from blspy import G1Element, PrivateKey
 from clvm.casts import int_from_bytes
 
-from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.program import (
+    Program,
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+)
 from chia.types.blockchain_format.sized_bytes import bytes32
 
 from .load_clvm import load_clvm
@@ -73,6 +78,8 @@ DEFAULT_HIDDEN_PUZZLE_HASH = DEFAULT_HIDDEN_PUZZLE.get_tree_hash()  # this puzzl
 
 MOD = load_clvm("p2_delegated_puzzle_or_hidden_puzzle.clvm")
 
+QUOTED_MOD_HASH = calculate_hash_of_quoted_mod_hash(MOD.get_tree_hash())
+
 SYNTHETIC_MOD = load_clvm("calculate_synthetic_public_key.clvm")
 
 PublicKeyProgram = Union[bytes, Program]
@@ -120,6 +127,20 @@ def puzzle_for_pk(public_key: G1Element) -> Program:
     return puzzle_for_public_key_and_hidden_puzzle_hash(public_key, DEFAULT_HIDDEN_PUZZLE_HASH)
 
 
+def puzzle_hash_for_synthetic_public_key(synthetic_public_key: G1Element) -> bytes32:
+    return curry_and_treehash(QUOTED_MOD_HASH, shatree_atom(bytes(synthetic_public_key)))
+
+
+def puzzle_hash_for_public_key_and_hidden_puzzle_hash(public_key: G1Element, hidden_puzzle_hash: bytes32) -> bytes32:
+    synthetic_public_key = calculate_synthetic_public_key(public_key, hidden_puzzle_hash)
+
+    return puzzle_hash_for_synthetic_public_key(synthetic_public_key)
+
+
+def puzzle_hash_for_pk(public_key: G1Element) -> bytes32:
+    return puzzle_hash_for_public_key_and_hidden_puzzle_hash(public_key, DEFAULT_HIDDEN_PUZZLE_HASH)
+
+
 def solution_for_delegated_puzzle(delegated_puzzle: Program, solution: Program) -> Program:
     return Program.to([[], delegated_puzzle, solution])
 
@@ -1,7 +1,13 @@
 from typing import Iterator, List, Tuple, Optional
 
 from chia.types.blockchain_format.coin import Coin
-from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.program import (
+    Program,
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+    shatree_pair,
+)
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.coin_spend import CoinSpend
@@ -12,6 +18,8 @@ from chia.util.hash import std_hash
 
 SINGLETON_MOD = load_clvm("singleton_top_layer.clvm")
 SINGLETON_MOD_HASH = SINGLETON_MOD.get_tree_hash()
+SINGLETON_MOD_HASH_HASH = shatree_atom(SINGLETON_MOD_HASH)
+SINGLETON_QUOTED_MOD_HASH = calculate_hash_of_quoted_mod_hash(SINGLETON_MOD_HASH)
 P2_SINGLETON_MOD = load_clvm("p2_singleton.clvm")
 P2_SINGLETON_OR_DELAYED_MOD = load_clvm("p2_singleton_or_delayed_puzhash.clvm")
 SINGLETON_LAUNCHER = load_clvm("singleton_launcher.clvm")
@@ -266,6 +274,16 @@ def puzzle_for_singleton(
     )
 
 
+# Return the puzzle hash of a singleton with specific ID and innerpuz hash, without creating its puzzle reveal
+def puzzle_hash_for_singleton(
+    launcher_id: bytes32, inner_puzzle_hash: bytes32, launcher_hash: bytes32 = SINGLETON_LAUNCHER_HASH
+) -> bytes32:
+    singleton_struct_hash = shatree_pair(
+        SINGLETON_MOD_HASH_HASH, shatree_pair(shatree_atom(launcher_id), shatree_atom(launcher_hash))
+    )
+    return curry_and_treehash(SINGLETON_QUOTED_MOD_HASH, singleton_struct_hash, inner_puzzle_hash)
+
+
 # Return a solution to spend a singleton
 def solution_for_singleton(
     lineage_proof: LineageProof,
@@ -419,6 +419,10 @@ class RLWallet:
             clawback_pk=self.rl_info.admin_pubkey,
         )
 
+    def puzzle_hash_for_pk(self, pk) -> Optional[bytes32]:
+        puzzle = self.puzzle_for_pk(pk)
+        return None if puzzle is None else puzzle.get_tree_hash()
+
     async def get_keys(self, puzzle_hash: bytes32) -> Tuple[G1Element, PrivateKey]:
         """
         Returns keys for puzzle_hash.
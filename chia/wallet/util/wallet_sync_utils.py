@@ -150,11 +150,7 @@ def validate_removals(
         # we must find the ones relevant to our wallets.
 
         # Verify removals root
-        removals_merkle_set = MerkleSet()
-        for name_coin in coins:
-            name, coin = name_coin
-            if coin is not None:
-                removals_merkle_set.add_already_hashed(coin.name())
+        removals_merkle_set = MerkleSet.from_already_hashed(coin.name() for _, coin in coins if coin is not None)
         removals_root = removals_merkle_set.get_root()
         if root != removals_root:
             return False
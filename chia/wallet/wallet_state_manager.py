@@ -33,7 +33,7 @@ from chia.util.db_wrapper import DBWrapper
 from chia.util.errors import Err
 from chia.util.ints import uint8, uint32, uint64, uint128
 from chia.wallet.cat_wallet.cat_constants import DEFAULT_CATS
-from chia.wallet.cat_wallet.cat_utils import construct_cat_puzzle, match_cat_puzzle
+from chia.wallet.cat_wallet.cat_utils import construct_cat_puzzle_hash, match_cat_puzzle
 from chia.wallet.cat_wallet.cat_wallet import CATWallet
 from chia.wallet.derivation_record import DerivationRecord
 from chia.wallet.derive_keys import master_sk_to_wallet_sk, master_sk_to_wallet_sk_unhardened
@@ -45,7 +45,6 @@ from chia.wallet.nft_wallet.nft_wallet import NFTWallet
 from chia.wallet.nft_wallet.uncurry_nft import UncurriedNFT
 from chia.wallet.outer_puzzles import AssetType, match_puzzle
 from chia.wallet.puzzle_drivers import PuzzleInfo
-from chia.wallet.puzzles.cat_loader import CAT_MOD, CAT_MOD_HASH
 from chia.wallet.rl_wallet.rl_wallet import RLWallet
 from chia.wallet.settings.user_settings import UserSettings
 from chia.wallet.trade_manager import TradeManager
@@ -286,11 +285,10 @@ class WalletStateManager:
 
                     # Hardened
                     pubkey: G1Element = self.get_public_key(uint32(index))
-                    puzzle: Program = target_wallet.puzzle_for_pk(bytes(pubkey))
-                    if puzzle is None:
+                    puzzlehash: Optional[bytes32] = target_wallet.puzzle_hash_for_pk(bytes(pubkey))
+                    if puzzlehash is None:
                         self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
                         break
-                    puzzlehash: bytes32 = puzzle.get_tree_hash()
                     self.log.debug(f"Puzzle at index {index} wallet ID {wallet_id} puzzle hash {puzzlehash.hex()}")
                     derivation_paths.append(
                         DerivationRecord(
@@ -299,11 +297,12 @@ class WalletStateManager:
                     )
                     # Unhardened
                     pubkey_unhardened: G1Element = self.get_public_key_unhardened(uint32(index))
-                    puzzle_unhardened: Program = target_wallet.puzzle_for_pk(bytes(pubkey_unhardened))
-                    if puzzle_unhardened is None:
+                    puzzlehash_unhardened: Optional[bytes32] = target_wallet.puzzle_hash_for_pk(
+                        bytes(pubkey_unhardened)
+                    )
+                    if puzzlehash_unhardened is None:
                         self.log.error(f"Unable to create puzzles with wallet {target_wallet}")
                         break
-                    puzzlehash_unhardened: bytes32 = puzzle_unhardened.get_tree_hash()
                     self.log.debug(
                         f"Puzzle at index {index} wallet ID {wallet_id} puzzle hash {puzzlehash_unhardened.hex()}"
                     )
@@ -341,8 +340,7 @@ class WalletStateManager:
         for index in range(unused, last):
             # Since DID are not released yet we can assume they are only using unhardened keys derivation
             pubkey: G1Element = self.get_public_key_unhardened(uint32(index))
-            puzzle: Program = target_wallet.puzzle_for_pk(bytes(pubkey))
-            puzzlehash: bytes32 = puzzle.get_tree_hash()
+            puzzlehash: bytes32 = target_wallet.puzzle_hash_for_pk(bytes(pubkey))
             self.log.info(f"Generating public key at index {index} puzzle hash {puzzlehash.hex()}")
             derivation_paths.append(
                 DerivationRecord(
@@ -616,10 +614,9 @@ class WalletStateManager:
         if derivation_record is None:
             self.log.info(f"Received state for the coin that doesn't belong to us {coin_state}")
         else:
-            our_inner_puzzle: Program = self.main_wallet.puzzle_for_pk(bytes(derivation_record.pubkey))
+            our_inner_puzzle_hash: bytes32 = self.main_wallet.puzzle_hash_for_pk(bytes(derivation_record.pubkey))
             asset_id: bytes32 = bytes32(bytes(tail_hash)[1:])
-            cat_puzzle = construct_cat_puzzle(CAT_MOD, asset_id, our_inner_puzzle, CAT_MOD_HASH)
-            if cat_puzzle.get_tree_hash() != coin_state.coin.puzzle_hash:
+            if construct_cat_puzzle_hash(asset_id, our_inner_puzzle_hash) != coin_state.coin.puzzle_hash:
                 return None, None
             if bytes(tail_hash).hex()[2:] in self.default_cats or self.config.get(
                 "automatically_add_unknown_cats", False
@@ -77,6 +77,7 @@ kwargs = dict(
     install_requires=dependencies,
     extras_require=dict(
         uvloop=["uvloop"],
+        orjson=["orjson"],
         dev=dev_dependencies,
         upnp=upnp_dependencies,
     ),
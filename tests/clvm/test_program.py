@@ -1,6 +1,11 @@
 from unittest import TestCase
 
-from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.program import (
+    Program,
+    calculate_hash_of_quoted_mod_hash,
+    curry_and_treehash,
+    shatree_atom,
+)
 from clvm.EvalError import EvalError
 from clvm_tools.curry import uncurry
 from clvm.operators import KEYWORD_TO_ATOM
@@ -23,6 +28,19 @@ class TestProgram(TestCase):
         self.assertRaises(ValueError, lambda: p.at("q"))
         self.assertRaises(EvalError, lambda: p.at("ff"))
 
+    def test_tree_hash_memo(self):
+        mod = Program.to([2, [1, 2, 3], [4, 5]])
+        mod_hash = mod.get_tree_hash()
+        self.assertEqual(mod.get_tree_hash(), mod_hash)
+        # the hash of the curried program reuses the hash of the program it contains
+        curried = mod.curry(100, b"\x01" * 32)
+        curried_hash = curried.get_tree_hash()
+        self.assertEqual(curried_hash, Program.from_bytes(bytes(curried)).get_tree_hash())
+        # the memoized hash is not used when some atoms are presumed to be hashes
+        self.assertEqual(
+            curried.get_tree_hash(b"\x01" * 32), Program.from_bytes(bytes(curried)).get_tree_hash(b"\x01" * 32)
+        )
+
 
 def check_idempotency(f, *args):
     prg = Program.to(f)
@@ -47,3 +65,15 @@ def test_curry_uncurry():
     # passing "args" here wraps the arguments in a list
     actual_disassembly = check_idempotency(f, args)
     assert actual_disassembly == f"(a (q {PLUS} 2 5) (c (q {PLUS} (q . 50) (q . 60)) 1))"
+
+
+def test_curry_and_treehash():
+    mod = assemble("(+ 2 5)")
+    quoted_mod_hash = calculate_hash_of_quoted_mod_hash(Program.to(mod).get_tree_hash())
+    args = [200, b"\x01" * 32, Program.to([1, (2, 3)]), 0]
+    arg_hashes = [shatree_atom(Program.to(200).as_atom()), shatree_atom(b"\x01" * 32)] + [
+        Program.to(arg).get_tree_hash() for arg in args[2:]
+    ]
+    for n in range(len(args) + 1):
+        curried = Program.to(mod).curry(*args[:n])
+        assert curry_and_treehash(quoted_mod_hash, *arg_hashes[:n]) == curried.get_tree_hash()
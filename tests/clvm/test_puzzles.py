@@ -9,6 +9,8 @@ from chia.types.coin_spend import CoinSpend
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.spend_bundle import SpendBundle
 from chia.util.hash import std_hash
+from chia.wallet.cat_wallet.cat_utils import CAT_MOD, construct_cat_puzzle, construct_cat_puzzle_hash
+from chia.wallet.did_wallet import did_wallet_puzzles
 from chia.wallet.puzzles import (
     p2_conditions,
     p2_delegated_conditions,
@@ -16,6 +18,8 @@ from chia.wallet.puzzles import (
     p2_delegated_puzzle_or_hidden_puzzle,
     p2_m_of_n_delegate_direct,
     p2_puzzle_hash,
+    singleton_top_layer,
+    singleton_top_layer_v1_1,
 )
 from tests.util.key_tool import KeyTool
 
@@ -241,3 +245,36 @@ class TestPuzzles(TestCase):
     def test_p2_delegated_puzzle_or_hidden_puzzle_with_delegated_puzzle(self):
         for hidden_pub_key_index in range(1, 10):
             self.do_test_spend_p2_delegated_puzzle_or_hidden_puzzle_with_delegated_puzzle(hidden_pub_key_index)
+
+    def test_puzzle_hashes_from_hashes(self):
+        # the puzzle hashes computed from the hashes of the arguments match the ones of the curried puzzles
+        key_lookup = KeyTool()
+        pk = G1Element.from_bytes(public_key_for_index(1, key_lookup))
+        standard_puzzle = p2_delegated_puzzle_or_hidden_puzzle.puzzle_for_pk(pk)
+        standard_puzzle_hash = standard_puzzle.get_tree_hash()
+        assert p2_delegated_puzzle_or_hidden_puzzle.puzzle_hash_for_pk(pk) == standard_puzzle_hash
+
+        tail_hash = bytes32(b"\x05" * 32)
+        assert (
+            construct_cat_puzzle_hash(tail_hash, standard_puzzle_hash)
+            == construct_cat_puzzle(CAT_MOD, tail_hash, standard_puzzle).get_tree_hash()
+        )
+
+        launcher_id = bytes32(b"\x06" * 32)
+        for singleton in (singleton_top_layer, singleton_top_layer_v1_1):
+            assert (
+                singleton.puzzle_hash_for_singleton(launcher_id, standard_puzzle_hash)
+                == singleton.puzzle_for_singleton(launcher_id, standard_puzzle).get_tree_hash()
+            )
+
+        recovery_list = [bytes32(b"\x07" * 32)]
+        metadata = Program.to([("a", "b")])
+        did_inner_puzzle = did_wallet_puzzles.create_innerpuz(standard_puzzle, recovery_list, 1, launcher_id, metadata)
+        did_inner_puzzle_hash = did_wallet_puzzles.get_inner_puzhash_by_p2(
+            standard_puzzle_hash, recovery_list, 1, launcher_id, metadata
+        )
+        assert did_inner_puzzle_hash == did_inner_puzzle.get_tree_hash()
+        assert (
+            did_wallet_puzzles.create_fullpuz_hash(did_inner_puzzle_hash, launcher_id)
+            == did_wallet_puzzles.create_fullpuz(did_inner_puzzle, launcher_id).get_tree_hash()
+        )
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from chia.types.blockchain_format.program import Program, SerializedProgram, INFINITE_COST
+from chia.types.blockchain_format.program import Program, SerializedProgram, INFINITE_COST, TREE_HASH_CACHE
+from chia.types.blockchain_format.tree_hash import sha256_treehash_from_bytes
 from chia.wallet.puzzles.load_clvm import load_clvm
 
 SHA256TREE_MOD = load_clvm("sha256tree_module.clvm")
@@ -13,6 +14,31 @@ class TestSerializedProgram(TestCase):
         s = SerializedProgram.from_bytes(bytes(SHA256TREE_MOD))
         self.assertEqual(s.get_tree_hash(), p.get_tree_hash())
 
+    def test_tree_hash_with_args(self):
+        p = Program.to([b"\x01" * 32, [b"\x02" * 32, 1000, b""], b"\x80" * 100])
+        s = SerializedProgram.from_program(p)
+        self.assertEqual(s.get_tree_hash(b"\x01" * 32), p.get_tree_hash(b"\x01" * 32))
+        self.assertEqual(s.get_tree_hash(b"\x02" * 32, b"\x01" * 32), p.get_tree_hash(b"\x02" * 32, b"\x01" * 32))
+        self.assertEqual(s.get_tree_hash(), p.get_tree_hash())
+        self.assertNotEqual(s.get_tree_hash(), s.get_tree_hash(b"\x01" * 32))
+
+    def test_tree_hash_cache(self):
+        buf = bytes(SHA256TREE_MOD)
+        tree_hash = SerializedProgram.from_bytes(buf).get_tree_hash()
+        self.assertEqual(TREE_HASH_CACHE.get(buf), tree_hash)
+        # the hash is found in the cache by other programs with the same content
+        TREE_HASH_CACHE.put(buf, b"\x00" * 32)
+        try:
+            self.assertEqual(SerializedProgram.from_bytes(buf).get_tree_hash(), b"\x00" * 32)
+        finally:
+            TREE_HASH_CACHE.remove(buf)
+        self.assertEqual(SerializedProgram.from_bytes(buf).to_program().get_tree_hash(), tree_hash)
+
+    def test_tree_hash_bad_encoding(self):
+        for buf in [b"", b"\xff\x01", b"\x82\x01", b"\xfc"]:
+            with self.assertRaises(ValueError):
+                sha256_treehash_from_bytes(buf)
+
     def test_program_execution(self):
         p_result = SHA256TREE_MOD.run(SHA256TREE_MOD)
         sp = SerializedProgram.from_bytes(bytes(SHA256TREE_MOD))
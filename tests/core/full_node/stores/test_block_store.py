@@ -264,3 +264,39 @@ class TestBlockStore:
             assert await store.get_generator(blocks[4].header_hash) == new_blocks[4].transactions_generator
             assert await store.get_generator(blocks[6].header_hash) == new_blocks[6].transactions_generator
             assert await store.get_generator(blocks[7].header_hash) == new_blocks[7].transactions_generator
+
+    @pytest.mark.asyncio
+    async def test_generator_cache(self, bt):
+        blocks = bt.get_consecutive_blocks(10)
+
+        def generator(i: int) -> SerializedProgram:
+            return SerializedProgram.from_bytes(int_to_bytes(i))
+
+        async with DBConnection(2) as db_wrapper:
+            store = await BlockStore.create(db_wrapper)
+
+            new_blocks = []
+            for i, block in enumerate(blocks):
+                block = dataclasses.replace(block, transactions_generator=generator(i))
+                block_record = header_block_to_sub_block_record(
+                    DEFAULT_CONSTANTS, 0, block, 0, False, 0, max(0, block.height - 1), None
+                )
+                await store.add_full_block(block.header_hash, block, block_record)
+                await store.set_in_chain([(block_record.header_hash,)])
+                await store.set_peak(block_record.header_hash)
+                new_blocks.append(block)
+
+            expected_generators = [new_blocks[i].transactions_generator for i in [3, 7, 8]]
+            assert await store.get_generators_at([3, 7, 8]) == expected_generators
+            assert set(store.generator_cache.cache.keys()) == {3, 7, 8}
+
+            # served from the cache, even though they're no longer in the database
+            async with db_wrapper.write_db() as conn:
+                await conn.execute("UPDATE full_blocks SET in_main_chain=0 WHERE height IN (3, 7)")
+            assert await store.get_generators_at([7, 3]) == expected_generators[1::-1]
+
+            # rolling back removes the heights above the fork point
+            await store.rollback(5)
+            assert set(store.generator_cache.cache.keys()) == {3}
+            with pytest.raises(KeyError):
+                await store.get_generators_at([3, 7])
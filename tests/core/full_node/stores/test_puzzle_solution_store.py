@@ -0,0 +1,48 @@
+import pytest
+
+from chia.full_node.puzzle_solution_store import PuzzleSolutionOffsets, PuzzleSolutionStore
+from chia.types.blockchain_format.program import Program, SerializedProgram
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.generator_types import BlockGenerator
+from chia.util.ints import uint32
+from tests.util.db_connection import DBConnection
+
+
+class TestPuzzleSolutionStore:
+    @pytest.mark.asyncio
+    async def test_basic_store(self, db_version):
+        async with DBConnection(db_version) as db_wrapper:
+            store = await PuzzleSolutionStore.create(db_wrapper)
+            header_hash_0 = bytes32(32 * b"\0")
+            header_hash_1 = bytes32(32 * b"\1")
+            coin_id = bytes32(32 * b"\2")
+
+            assert not await store.is_block_indexed(header_hash_0)
+            offsets = PuzzleSolutionOffsets(coin_id, 0, 2, 5, 1, 0, 3)
+            await store.add_block(header_hash_0, uint32(10), [offsets])
+            await store.add_block(header_hash_1, uint32(11), [])
+            assert await store.is_block_indexed(header_hash_0)
+            assert await store.is_block_indexed(header_hash_1)
+
+            assert await store.get_offsets(coin_id, header_hash_0) == offsets
+            # the same coin spent in a different block at the same height (after a reorg) isn't found
+            assert await store.get_offsets(coin_id, header_hash_1) is None
+
+            await store.rollback(10)
+            assert await store.is_block_indexed(header_hash_0)
+            assert not await store.is_block_indexed(header_hash_1)
+            await store.rollback(9)
+            assert not await store.is_block_indexed(header_hash_0)
+            assert await store.get_offsets(coin_id, header_hash_0) is None
+
+    def test_get_puzzle_and_solution(self):
+        puzzle = Program.to([1, 2])
+        solution = Program.to(3)
+        program = SerializedProgram.from_bytes(b"\xff" + bytes(puzzle) + b"\x80")
+        ref = SerializedProgram.from_bytes(bytes(solution))
+        generator = BlockGenerator(program, [ref], [uint32(1)])
+        offsets = PuzzleSolutionOffsets(bytes32(32 * b"\0"), 0, 1, 1 + len(bytes(puzzle)), 1, 0, len(bytes(solution)))
+        assert offsets.get_puzzle_and_solution(generator) == (
+            SerializedProgram.from_program(puzzle),
+            SerializedProgram.from_program(solution),
+        )
@@ -58,3 +58,23 @@ class TestStore:
         store.peer_has_block(std_hash(b"block30"), peer_ids[0], 700, 30, True)
         assert store.get_peak_of_each_peer()[peer_ids[0]][2] == 700
         assert store.get_heaviest_peak()[2] == 700
+
+    @pytest.mark.asyncio
+    async def test_peak_first_seen(self):
+        store = await SyncStore.create()
+        peer_ids = [std_hash(bytes([a])) for a in range(2)]
+        assert store.get_peak_first_seen(std_hash(b"block1")) is None
+
+        store.peer_has_block(std_hash(b"block1"), peer_ids[0], 300, 1, True)
+        first_seen = store.get_peak_first_seen(std_hash(b"block1"))
+        assert first_seen is not None
+        store.peer_has_block(std_hash(b"block1"), peer_ids[1], 300, 1, True)
+        assert store.get_peak_first_seen(std_hash(b"block1")) == first_seen
+
+        # forgotten with the peak
+        for height in range(2, 300):
+            store.peer_has_block(std_hash(bytes([height % 256, height // 256])), peer_ids[0], height, height, True)
+        assert store.get_peak_first_seen(std_hash(b"block1")) is None
+        assert len(store.peak_first_seen) == len(store.peak_to_peer)
+        await store.clear_sync_info()
+        assert len(store.peak_first_seen) == 0
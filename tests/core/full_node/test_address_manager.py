@@ -5,7 +5,12 @@ from pathlib import Path
 import pytest
 
 from chia.server.address_manager import AddressManager, ExtendedPeerInfo
-from chia.server.address_manager_store import AddressManagerStore
+from chia.server.address_manager_store import (
+    AddressManagerStore,
+    PeerDataSerialization,
+    makePeerDataSerialization,
+    parsePeerDataSerialization,
+)
 from chia.types.peer_info import PeerInfo, TimestampedPeerInfo
 from chia.util.ints import uint16, uint64
 
@@ -572,6 +577,92 @@ class TestPeerManager:
         assert recovered == 3
         peers_dat_filename.unlink()
 
+    @pytest.mark.asyncio
+    async def test_peer_data_format(self):
+        source = PeerInfo("252.5.1.1", uint16(8333))
+        peer_info = ExtendedPeerInfo(TimestampedPeerInfo("250.7.1.1", uint16(8333), uint64(1000)), source)
+        metadata = [("key", "1"), ("tried_count", "0")]
+        nodes = [(0, peer_info), (1, peer_info)]
+        new_table = [(0, 5), (1, 2**40), (0, 1023)]
+
+        serialized = await makePeerDataSerialization(metadata, nodes, new_table)
+        expected = PeerDataSerialization(
+            metadata,
+            [(uint64(node_id), info.to_string()) for node_id, info in nodes],
+            [(uint64(node_id), uint64(bucket)) for node_id, bucket in new_table],
+        )
+        assert serialized == bytes(expected)
+        assert parsePeerDataSerialization(serialized) == (
+            metadata,
+            [(node_id, info.to_string()) for node_id, info in nodes],
+            new_table,
+        )
+        with pytest.raises(ValueError):
+            parsePeerDataSerialization(serialized[:-1])
+
+    @pytest.mark.asyncio
+    async def test_incremental_serialization(self, tmp_path: Path):
+        def peer_data(addrman: AddressManager):
+            return sorted(
+                (
+                    info.to_string(),
+                    info.is_tried,
+                    sorted(bucket for bucket, _ in addrman.new_table.positions_of(node_id)),
+                )
+                for node_id, info in addrman.map_info.items()
+            )
+
+        addrman = AddressManagerTest()
+        now = int(math.floor(time.time()))
+        source = PeerInfo("252.5.1.1", uint16(8333))
+        old_peer = TimestampedPeerInfo("250.7.1.1", uint16(8333), uint64(100000))
+        peers = [TimestampedPeerInfo(f"250.7.2.{i}", uint16(8444), uint64(now - 10000)) for i in range(1, 20)]
+        await addrman.add_to_new_table([old_peer, *peers[:10]], source)
+        await addrman.mark_good(PeerInfo("250.7.2.1", uint16(8444)))
+
+        peers_file_path = tmp_path / "peers.dat"
+        changes_file_path = AddressManagerStore.changes_file_path(peers_file_path)
+        # the first save writes the whole peers file
+        await AddressManagerStore.save_changes(addrman, peers_file_path)
+        assert peers_file_path.exists()
+        assert not changes_file_path.exists()
+        peers_file_size = peers_file_path.stat().st_size
+
+        await addrman.add_to_new_table(peers[10:], source)
+        await addrman.mark_good(PeerInfo("250.7.2.2", uint16(8444)))
+        await addrman.mark_good(PeerInfo("250.7.2.15", uint16(8444)))
+        await addrman.connect(PeerInfo("250.7.2.3", uint16(8444)))
+        for _ in range(5):
+            await addrman.attempt(PeerInfo("250.7.1.1", uint16(8333)), True, time.time() - 61)
+        addrman.cleanup(7 * 3600 * 24, 5)
+        assert len(addrman.changed_hosts) == 12
+        await AddressManagerStore.save_changes(addrman, peers_file_path)
+        assert changes_file_path.exists()
+        assert len(addrman.changed_hosts) == 0
+        assert peers_file_path.stat().st_size == peers_file_size
+
+        addrman2 = await AddressManagerStore.create_address_manager(peers_file_path)
+        assert addrman2.key == addrman.key
+        assert peer_data(addrman2) == peer_data(addrman)
+        assert addrman2.new_count == addrman.new_count
+        assert addrman2.tried_count == addrman.tried_count
+
+        # an interrupted write only loses the last change
+        with open(changes_file_path, "ab") as f:
+            f.write(bytes([0, 0, 1, 0, 1]))
+        addrman2 = await AddressManagerStore.create_address_manager(peers_file_path)
+        assert peer_data(addrman2) == peer_data(addrman)
+
+        # the change log is compacted into a new peers file once it's large compared to it
+        for _ in range(3):
+            if not changes_file_path.exists():
+                break
+            addrman.changed_hosts.update(info.peer_info.host for info in addrman.map_info.values())
+            await AddressManagerStore.save_changes(addrman, peers_file_path)
+        assert not changes_file_path.exists()
+        assert len(addrman.changed_hosts) == 0
+        assert peer_data(await AddressManagerStore.create_address_manager(peers_file_path)) == peer_data(addrman)
+
     @pytest.mark.asyncio
     async def test_cleanup(self):
         addrman = AddressManagerTest()
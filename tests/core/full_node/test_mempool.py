@@ -1,3 +1,4 @@
+import asyncio
 import dataclasses
 import logging
 
@@ -9,6 +10,7 @@ import pytest
 import chia.server.ws_connection as ws
 
 from chia.full_node.mempool import Mempool
+from chia.full_node.mempool_manager import MempoolManager
 from chia.full_node.full_node_api import FullNodeAPI
 from chia.protocols import full_node_protocol, wallet_protocol
 from chia.protocols.wallet_protocol import TransactionAck
@@ -21,14 +23,16 @@ from chia.types.coin_spend import CoinSpend
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.condition_with_args import ConditionWithArgs
 from chia.types.spend_bundle import SpendBundle
+from chia.types.transaction_queue_entry import TransactionQueueEntry
 from chia.types.mempool_item import MempoolItem
 from chia.util.condition_tools import conditions_for_solution, pkm_pairs
-from chia.util.errors import Err
+from chia.util.errors import Err, ValidationError
 from chia.util.ints import uint64, uint32
 from chia.util.hash import std_hash
 from chia.types.mempool_inclusion_status import MempoolInclusionStatus
 from chia.util.api_decorators import api_request, peer_required, bytes_required
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
+from chia.full_node.mempool_snapshot import read_mempool_snapshot, write_mempool_snapshot
 from chia.full_node.pending_tx_cache import PendingTxCache
 from blspy import G2Element
 
@@ -90,6 +94,26 @@ def make_item(idx: int, cost: uint64 = uint64(80)) -> MempoolItem:
     )
 
 
+@dataclasses.dataclass(frozen=True)
+class WalletPeer:
+    peer_node_id: bytes32
+
+
+def make_chained_item(idx: int, fee: int, cost: int = 100, parents: Tuple[MempoolItem, ...] = ()) -> MempoolItem:
+    # spends a confirmed coin and the coins created by its parents, and creates a coin of its own
+    confirmed_coin = Coin(bytes32([0] * 32), bytes32([idx] * 32), uint64(idx))
+    return MempoolItem(
+        SpendBundle([], G2Element()),
+        uint64(fee),
+        NPCResult(None, None, uint64(cost)),
+        uint64(cost),
+        bytes32([idx] * 32),
+        [Coin(bytes32([idx] * 32), bytes32([0] * 32), uint64(idx))],
+        [confirmed_coin] + [parent.additions[0] for parent in parents],
+        SerializedProgram(),
+    )
+
+
 class TestPendingTxCache:
     def test_recall(self):
         c = PendingTxCache(100)
@@ -169,6 +193,41 @@ class TestMempool:
         spend_bundle = generate_test_spend_bundle(wallet_a, coin)
         assert spend_bundle is not None
 
+    def test_min_fee_rate_skips_ancestors(self):
+        mempool = Mempool(300)
+        parent = make_chained_item(1, fee=0)
+        for item in (parent, make_chained_item(2, fee=200), make_chained_item(3, fee=300)):
+            mempool.add_to_pool(item)
+
+        # the parent is the cheapest item, but a child can't kick it out
+        assert mempool.get_min_fee_rate(100) == 0
+        assert mempool.get_min_fee_rate(100, {parent.name}) == 2
+
+        child = make_chained_item(4, fee=400, parents=(parent,))
+        mempool.add_to_pool(child)
+        assert set(mempool.spends.keys()) == {parent.name, bytes32([3] * 32), child.name}
+        assert mempool.total_mempool_cost == 300
+
+    def test_child_pays_for_parent_eviction(self):
+        mempool = Mempool(300)
+        parent = make_chained_item(1, fee=0)
+        child = make_chained_item(2, fee=600, parents=(parent,))
+        unrelated = make_chained_item(3, fee=100)
+        for item in (parent, child, unrelated):
+            mempool.add_to_pool(item)
+        # the parent is kicked out along with its child, so it's as hard to kick out
+        assert mempool.package_fee_per_cost[parent.name] == 0
+        assert mempool.eviction_fee_per_cost[parent.name] == 3
+        assert mempool.get_min_fee_rate(100) == 1
+
+        mempool.add_to_pool(make_chained_item(4, fee=200))
+        assert unrelated.name not in mempool.spends
+        assert parent.name in mempool.spends and child.name in mempool.spends
+
+        mempool.remove_from_pool(child)
+        assert mempool.eviction_fee_per_cost[parent.name] == 0
+        assert mempool.get_min_fee_rate(100) == 0
+
 
 @peer_required
 @api_request
@@ -237,6 +296,236 @@ class TestMempoolManager:
             spend_bundle.name(),
         )
 
+    @pytest.mark.asyncio
+    async def test_pre_validate_cache(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coin = await next_block(full_node_1, wallet_a, bt)
+        spend_bundle = generate_test_spend_bundle(wallet_a, coin)
+        spend_name = spend_bundle.name()
+        assert mempool_manager.validation_cache.get(spend_name) is None
+
+        npc_result = await mempool_manager.pre_validate_spendbundle(spend_bundle, None, spend_name)
+        assert mempool_manager.validation_cache.get(spend_name) == bytes(npc_result)
+
+        # the second validation is served from the cache, without going through the process pool
+        pool = mempool_manager.pool
+        mempool_manager.pool = None
+        try:
+            assert await mempool_manager.pre_validate_spendbundle(spend_bundle, None, spend_name) == npc_result
+        finally:
+            mempool_manager.pool = pool
+
+        # invalid bundles are not cached
+        bad_bundle = dataclasses.replace(spend_bundle, aggregated_signature=G2Element.generator())
+        with pytest.raises(ValidationError):
+            await mempool_manager.pre_validate_spendbundle(bad_bundle, None, bad_bundle.name())
+        assert mempool_manager.validation_cache.get(bad_bundle.name()) is None
+
+    @pytest.mark.asyncio
+    async def test_pre_validate_batch(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coins = [await next_block(full_node_1, wallet_a, bt) for _ in range(3)]
+        bundles = [generate_test_spend_bundle(wallet_a, coin) for coin in coins]
+        bad_bundle = dataclasses.replace(bundles[1], aggregated_signature=G2Element.generator())
+        bundles.append(bad_bundle)
+
+        # bundles validated concurrently are sent to the pool together, and only the invalid one fails
+        old_latency, old_size = mempool_manager.validation_batch_latency, mempool_manager.validation_batch_size
+        mempool_manager.validation_batch_latency = 1
+        mempool_manager.validation_batch_size = len(bundles)
+        try:
+            results = await asyncio.gather(
+                *[mempool_manager.pre_validate_spendbundle(sb, None, sb.name()) for sb in bundles],
+                return_exceptions=True,
+            )
+        finally:
+            mempool_manager.validation_batch_latency, mempool_manager.validation_batch_size = old_latency, old_size
+        assert all(isinstance(result, NPCResult) for result in results[:3])
+        assert isinstance(results[3], ValidationError)
+        assert results[3].code == Err.BAD_AGGREGATE_SIGNATURE
+        assert mempool_manager._validation_batch == []
+
+        # a single bundle doesn't wait for a full batch longer than the latency cap
+        coin = await next_block(full_node_1, wallet_a, bt)
+        spend_bundle = generate_test_spend_bundle(wallet_a, coin)
+        npc_result = await asyncio.wait_for(
+            mempool_manager.pre_validate_spendbundle(spend_bundle, None, spend_bundle.name()), timeout=10
+        )
+        assert npc_result.error is None
+
+    @pytest.mark.asyncio
+    async def test_send_transaction_queued_per_wallet(self, bt, one_node_one_block, wallet_a, monkeypatch):
+        full_node_1, server_1 = one_node_one_block
+        transaction_queue = full_node_1.full_node.transaction_queue
+        queued: List[TransactionQueueEntry] = []
+        put = transaction_queue.put
+
+        def record_put(entry: TransactionQueueEntry, fee_per_cost: float = 0) -> bool:
+            queued.append(entry)
+            return put(entry, fee_per_cost)
+
+        monkeypatch.setattr(transaction_queue, "put", record_put)
+
+        # transactions from a wallet connection get the share of the queue of a peer, not the local priority lane
+        wallet_peer = WalletPeer(bytes32([7] * 32))
+        coin = await next_block(full_node_1, wallet_a, bt)
+        spend_bundle = generate_test_spend_bundle(wallet_a, coin)
+        res = await full_node_1.send_transaction(wallet_protocol.SendTransaction(spend_bundle), wallet_peer, test=True)
+        assert res is not None
+        ack: TransactionAck = TransactionAck.from_bytes(res.data)
+        assert ack.status == MempoolInclusionStatus.SUCCESS.value
+        assert [entry.peer for entry in queued] == [wallet_peer]
+
+    @pytest.mark.asyncio
+    async def test_shut_down_pending_batch(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = MempoolManager(
+            full_node_1.full_node.mempool_manager.coin_store, bt.constants, single_threaded=True
+        )
+        mempool_manager.validation_batch_latency = 10
+
+        coin = await next_block(full_node_1, wallet_a, bt)
+        spend_bundle = generate_test_spend_bundle(wallet_a, coin)
+        task = asyncio.create_task(mempool_manager.pre_validate_spendbundle(spend_bundle, None, spend_bundle.name()))
+        await asyncio.sleep(0)
+        assert len(mempool_manager._validation_batch) == 1
+
+        # the bundle waiting for its batch isn't left hanging
+        mempool_manager.shut_down()
+        assert mempool_manager._validation_batch_timer is None
+        assert mempool_manager._validation_batch == []
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_mempool_snapshot(self, bt, one_node_one_block, wallet_a, tmp_path):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coin_1 = await next_block(full_node_1, wallet_a, bt)
+        coin_2 = await next_block(full_node_1, wallet_a, bt)
+        spend_bundle_1 = generate_test_spend_bundle(wallet_a, coin_1)
+        spend_bundle_2 = generate_test_spend_bundle(wallet_a, coin_2)
+        for sb in (spend_bundle_1, spend_bundle_2):
+            status, err = await full_node_1.full_node.respond_transaction(sb, sb.name(), test=True)
+            assert status == MempoolInclusionStatus.SUCCESS
+
+        snapshot_path = tmp_path / "mempool.dat"
+        assert mempool_manager.peak is not None
+        await write_mempool_snapshot(snapshot_path, mempool_manager.mempool, mempool_manager.peak.header_hash)
+        snapshot = await read_mempool_snapshot(snapshot_path)
+        assert snapshot is not None
+        assert not snapshot_path.exists()
+        assert snapshot.peak_hash == mempool_manager.peak.header_hash
+        assert {item.spend_bundle for item in snapshot.items} == {spend_bundle_1, spend_bundle_2}
+
+        # the bundles are validated again even at the same peak, their persisted results aren't trusted
+        bad_bundle = dataclasses.replace(spend_bundle_2, aggregated_signature=G2Element.generator())
+        tampered = [snapshot.items[0], dataclasses.replace(snapshot.items[1], spend_bundle=bad_bundle)]
+        restored = await mempool_manager.pre_validate_restored_items(tampered)
+        assert [spend_name for _, _, spend_name in restored] == [spend_bundle_1.name()]
+
+        # once coin_1 has been spent, only the second bundle is restored
+        spent_block = bt.get_consecutive_blocks(
+            1,
+            block_list_input=await full_node_1.get_all_full_blocks(),
+            guarantee_transaction_block=True,
+            transaction_data=spend_bundle_1,
+        )[-1]
+        await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(spent_block))
+        restored = await mempool_manager.pre_validate_restored_items(snapshot.items)
+        assert [spend_name for _, _, spend_name in restored] == [spend_bundle_2.name()]
+
+    @pytest.mark.asyncio
+    async def test_chained_spends(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coin = await next_block(full_node_1, wallet_a, bt)
+        puzzle_hash = wallet_a.get_new_puzzlehash()
+        parent_bundle = generate_test_spend_bundle(wallet_a, coin, new_puzzle_hash=puzzle_hash)
+        # spends the coin created by parent_bundle, which only exists in the mempool
+        unconfirmed_coin = Coin(coin.name(), puzzle_hash, uint64(1000))
+        child_bundle = generate_test_spend_bundle(wallet_a, unconfirmed_coin, fee=uint64(500), amount=uint64(400))
+        for sb in (parent_bundle, child_bundle):
+            status, err = await full_node_1.full_node.respond_transaction(sb, sb.name(), test=True)
+            assert err is None
+            assert status == MempoolInclusionStatus.SUCCESS
+
+        mempool = mempool_manager.mempool
+        assert mempool.parents[child_bundle.name()] == {parent_bundle.name()}
+        assert mempool.children[parent_bundle.name()] == {child_bundle.name()}
+        parent_item = mempool.spends[parent_bundle.name()]
+        child_item = mempool.spends[child_bundle.name()]
+        assert mempool.package_fee_per_cost[parent_bundle.name()] == 0
+        assert mempool.package_fee_per_cost[child_bundle.name()] == 500 / (parent_item.cost + child_item.cost)
+
+        # the parent is included in the block along with the child paying for it
+        peak = full_node_1.full_node.blockchain.get_peak()
+        result = await mempool_manager.create_bundle_from_mempool(peak.header_hash)
+        assert result is not None
+        block_bundle, additions, removals = result
+        assert set(block_bundle.coin_spends) == set(parent_bundle.coin_spends + child_bundle.coin_spends)
+        assert unconfirmed_coin in additions and unconfirmed_coin in removals
+
+        block = bt.get_consecutive_blocks(
+            1,
+            block_list_input=await full_node_1.get_all_full_blocks(),
+            guarantee_transaction_block=True,
+            transaction_data=block_bundle,
+        )[-1]
+        await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        assert mempool_manager.get_spendbundle(parent_bundle.name()) is None
+        assert mempool_manager.get_spendbundle(child_bundle.name()) is None
+
+    @pytest.mark.asyncio
+    async def test_chained_spend_does_not_fit(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coin = await next_block(full_node_1, wallet_a, bt)
+        puzzle_hash = wallet_a.get_new_puzzlehash()
+        parent_bundle = generate_test_spend_bundle(wallet_a, coin, new_puzzle_hash=puzzle_hash)
+        status, err = await full_node_1.full_node.respond_transaction(parent_bundle, parent_bundle.name(), test=True)
+        assert status == MempoolInclusionStatus.SUCCESS
+
+        # the only item that could make room for the child is its parent
+        mempool = mempool_manager.mempool
+        mempool.max_size_in_cost = mempool.total_mempool_cost
+        unconfirmed_coin = Coin(coin.name(), puzzle_hash, uint64(1000))
+        child_bundle = generate_test_spend_bundle(wallet_a, unconfirmed_coin, fee=uint64(500), amount=uint64(400))
+        status, err = await full_node_1.full_node.respond_transaction(child_bundle, child_bundle.name(), test=True)
+        assert status == MempoolInclusionStatus.FAILED
+        assert err == Err.MEMPOOL_IS_FULL
+        assert mempool_manager.get_spendbundle(parent_bundle.name()) is not None
+        assert mempool.total_mempool_cost <= mempool.max_size_in_cost
+
+    @pytest.mark.asyncio
+    async def test_chained_spend_of_replaced_parent(self, bt, one_node_one_block, wallet_a):
+        full_node_1, server_1 = one_node_one_block
+        mempool_manager = full_node_1.full_node.mempool_manager
+
+        coin = await next_block(full_node_1, wallet_a, bt)
+        puzzle_hash = wallet_a.get_new_puzzlehash()
+        parent_bundle = generate_test_spend_bundle(wallet_a, coin, new_puzzle_hash=puzzle_hash)
+        unconfirmed_coin = Coin(coin.name(), puzzle_hash, uint64(1000))
+        child_bundle = generate_test_spend_bundle(wallet_a, unconfirmed_coin, fee=uint64(10), amount=uint64(400))
+        for sb in (parent_bundle, child_bundle):
+            status, err = await full_node_1.full_node.respond_transaction(sb, sb.name(), test=True)
+            assert status == MempoolInclusionStatus.SUCCESS
+
+        # replacing the parent also kicks out the child, since the coin it spends will never be created
+        replacement = generate_test_spend_bundle(wallet_a, coin, fee=uint64(mempool_manager.get_min_fee_increase() * 2))
+        status, err = await full_node_1.full_node.respond_transaction(replacement, replacement.name(), test=True)
+        assert status == MempoolInclusionStatus.SUCCESS
+        assert mempool_manager.get_spendbundle(parent_bundle.name()) is None
+        assert mempool_manager.get_spendbundle(child_bundle.name()) is None
+        assert not mempool_manager.seen(child_bundle.name())
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
         "opcode,lock_value,expected",
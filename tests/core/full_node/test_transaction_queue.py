@@ -0,0 +1,80 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pytest
+from blspy import G2Element
+
+from chia.full_node.transaction_queue import TransactionQueue
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.spend_bundle import SpendBundle
+from chia.types.transaction_queue_entry import TransactionQueueEntry
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FakePeer:
+    peer_node_id: bytes32
+
+
+def make_entry(idx: int, peer: Optional[FakePeer]) -> TransactionQueueEntry:
+    return TransactionQueueEntry(SpendBundle([], G2Element()), None, bytes32([idx] * 32), peer, False)  # type: ignore
+
+
+async def drain(queue: TransactionQueue) -> List[TransactionQueueEntry]:
+    entries = []
+    while not queue.empty():
+        entries.append(await queue.pop())
+    return entries
+
+
+class TestTransactionQueue:
+    @pytest.mark.asyncio
+    async def test_local_first(self):
+        queue = TransactionQueue(100, 10, log)
+        peer = FakePeer(bytes32([1] * 32))
+        assert queue.put(make_entry(1, peer))
+        assert queue.put(make_entry(2, None))
+        assert [e.spend_name for e in await drain(queue)] == [bytes32([2] * 32), bytes32([1] * 32)]
+
+    @pytest.mark.asyncio
+    async def test_fee_order_within_peer(self):
+        queue = TransactionQueue(100, 10, log)
+        peer = FakePeer(bytes32([1] * 32))
+        assert queue.put(make_entry(1, peer), 1.0)
+        assert queue.put(make_entry(2, peer), 10.0)
+        assert queue.put(make_entry(3, peer), 5.0)
+        assert queue.put(make_entry(4, peer), 5.0)
+        assert [e.spend_name[0] for e in await drain(queue)] == [2, 3, 4, 1]
+
+    @pytest.mark.asyncio
+    async def test_round_robin(self):
+        queue = TransactionQueue(100, 50, log)
+        spammer = FakePeer(bytes32([1] * 32))
+        honest = FakePeer(bytes32([2] * 32))
+        for i in range(20):
+            assert queue.put(make_entry(i, spammer), 100.0)
+        assert queue.put(make_entry(200, honest), 0.0)
+        # the honest peer's transaction is handled right after the first one of the spammer, despite the lower fee
+        assert (await queue.pop()).peer == spammer
+        assert (await queue.pop()).peer == honest
+        assert queue.qsize() == 19
+
+    @pytest.mark.asyncio
+    async def test_limits(self):
+        queue = TransactionQueue(4, 3, log)
+        spammer = FakePeer(bytes32([1] * 32))
+        honest = FakePeer(bytes32([2] * 32))
+        for i in range(3):
+            assert queue.put(make_entry(i, spammer), float(i))
+        assert not queue.put(make_entry(3, spammer))
+        assert queue.put(make_entry(100, honest))
+        # the queue is full, so the lowest priority transaction of the longest queue is evicted
+        assert queue.put(make_entry(101, honest))
+        assert queue.qsize() == 4
+        # but a peer can't evict from a queue that's not longer than its own
+        assert not queue.put(make_entry(102, honest))
+        assert queue.get_info()["dropped"] == {"peer_queue_full": 1, "evicted": 1, "queue_full": 1}
+        entries = await drain(queue)
+        assert sorted(e.spend_name[0] for e in entries) == [1, 2, 100, 101]
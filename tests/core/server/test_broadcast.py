@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+import pytest
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.outbound_message import Message, NodeType, make_msg
+from chia.server.server import ChiaServer
+from chia.server.ws_connection import WSChiaConnection
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+log = logging.getLogger(__name__)
+
+
+class FakeTransport:
+    def get_extra_info(self, name: str):
+        return "1.2.3.4", 8444
+
+
+class FakeWriter:
+    transport = FakeTransport()
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self._writer = FakeWriter()
+        self.sent: List[bytes] = []
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+
+def make_connection(idx: int, node_type: NodeType = NodeType.FULL_NODE) -> WSChiaConnection:
+    connection = WSChiaConnection(
+        NodeType.FULL_NODE,
+        FakeWebSocket(),
+        8444,
+        log,
+        False,
+        False,
+        "1.2.3.4",
+        asyncio.Queue(),
+        lambda *args: None,
+        bytes32([idx] * 32),
+        100,
+        100,
+    )
+    connection.connection_type = node_type
+    return connection
+
+
+def make_server(connections: List[WSChiaConnection]) -> ChiaServer:
+    # only what the broadcast methods use
+    server = ChiaServer.__new__(ChiaServer)
+    server.log = log
+    server.all_connections = {connection.peer_node_id: connection for connection in connections}
+    return server
+
+
+class TestBroadcast:
+    @pytest.mark.asyncio
+    async def test_encoded_once(self):
+        connections = [make_connection(i) for i in range(3)] + [make_connection(3, NodeType.WALLET)]
+        server = make_server(connections)
+        messages = [
+            make_msg(ProtocolMessageTypes.new_transaction, bytes(100)),
+            make_msg(ProtocolMessageTypes.new_peak, bytes(200)),
+        ]
+
+        async def queued(connection: WSChiaConnection) -> List[bytes]:
+            # consensus messages like new_peak are sent first, so the messages are put back in order
+            encoded: Dict[int, bytes] = {}
+            for _ in messages:
+                queued_message, queued_encoded = await connection.outgoing_queue.get()
+                assert queued_encoded == bytes(queued_message)
+                encoded[queued_message.type] = queued_encoded
+            assert connection.outgoing_queue.queued_bytes == {p: 0 for p in connection.outgoing_queue.queued_bytes}
+            return [encoded[message.type] for message in messages]
+
+        await server.send_to_all(messages, NodeType.FULL_NODE)
+        sent = [await queued(connection) for connection in connections[:3]]
+        # every peer gets the very same bytes objects
+        for encoded in sent[1:]:
+            assert all(a is b for a, b in zip(encoded, sent[0]))
+        assert connections[3].outgoing_queue.queued_bytes == {p: 0 for p in connections[3].outgoing_queue.queued_bytes}
+
+        await server.send_to_all_except(messages, NodeType.FULL_NODE, connections[0].peer_node_id)
+        sent = [await queued(connection) for connection in connections[1:3]]
+        assert all(a is b for a, b in zip(sent[0], sent[1]))
+
+        await server.send_to_others(messages, NodeType.FULL_NODE, connections[1])
+        sent = [await queued(connection) for connection in (connections[0], connections[2])]
+        assert all(a is b for a, b in zip(sent[0], sent[1]))
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_keeps_encoding(self, monkeypatch):
+        connection = make_connection(1)
+        monkeypatch.setattr(connection.outbound_rate_limiter, "process_msg_and_check", lambda message: False)
+        message: Message = make_msg(ProtocolMessageTypes.new_transaction, bytes(100))
+        encoded = bytes(message)
+
+        await connection._send_message(message, encoded)
+        assert connection.ws.sent == []
+        # the message is queued again after a second, still encoded
+        queued_message, queued_encoded = await asyncio.wait_for(connection.outgoing_queue.get(), timeout=5)
+        assert queued_message == message
+        assert queued_encoded is encoded
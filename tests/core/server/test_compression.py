@@ -0,0 +1,65 @@
+import pytest
+import zstd
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.protocols.shared_protocol import Capability, Handshake
+from chia.server.compression import (
+    ZSTD_MAGIC,
+    compress_message,
+    decompress_frame,
+    is_compressed_frame,
+    max_decompressed_size,
+    zstd_content_size,
+)
+from chia.server.outbound_message import Message, make_msg
+from chia.server.ws_connection import CAPABILITIES, has_capability
+from chia.util.ints import uint8, uint16
+
+
+class TestCompression:
+    def test_round_trip(self):
+        message = make_msg(ProtocolMessageTypes.respond_blocks, bytes(range(256)) * 1000)
+        encoded = bytes(message)
+        frame = compress_message(encoded)
+        assert len(frame) < len(encoded)
+        assert is_compressed_frame(frame)
+        assert not is_compressed_frame(encoded)
+        assert Message.from_bytes(decompress_frame(frame)) == message
+
+    @pytest.mark.parametrize("size", [0, 100, 255, 256, 1000, 65535 + 256, 100000, 10 * 1024 * 1024])
+    def test_content_size(self, size: int):
+        assert zstd_content_size(zstd.compress(bytes(size))) == size
+
+    def test_invalid_frames(self):
+        respond_blocks = bytes([ProtocolMessageTypes.respond_blocks.value])
+        with pytest.raises(ValueError):
+            decompress_frame(b"\x00")
+        with pytest.raises(ValueError):
+            decompress_frame(b"\x00" + respond_blocks + b"not zstd")
+        with pytest.raises(ValueError):
+            decompress_frame(b"\x00" + respond_blocks + ZSTD_MAGIC)
+
+        # a frame claiming to decompress to more than its type allows is rejected before allocating anything
+        new_peak = ProtocolMessageTypes.new_peak.value
+        assert max_decompressed_size(new_peak) == 512 + 8
+        assert max_decompressed_size(ProtocolMessageTypes.coin_state_update.value) == 50 * 1024 * 1024
+        header = ZSTD_MAGIC + bytes([0xE0]) + (max_decompressed_size(new_peak) + 1).to_bytes(8, "little")
+        with pytest.raises(ValueError):
+            decompress_frame(b"\x00" + bytes([new_peak]) + header + bytes(10))
+
+        # the type in the frame must be the type of the message
+        frame = compress_message(bytes(make_msg(ProtocolMessageTypes.respond_blocks, bytes(1000))))
+        with pytest.raises(ValueError):
+            decompress_frame(frame[:1] + bytes([new_peak]) + frame[2:])
+
+    def test_capabilities(self):
+        handshake = Handshake("mainnet", "0.0.34", "1.0", uint16(8444), uint8(1), CAPABILITIES)
+        assert has_capability(handshake, Capability.BASE)
+        assert has_capability(handshake, Capability.ZSTD_COMPRESSION)
+        old_handshake = Handshake("mainnet", "0.0.34", "1.0", uint16(8444), uint8(1), [(uint16(1), "1")])
+        assert not has_capability(old_handshake, Capability.ZSTD_COMPRESSION)
+        # other versions of the protocol use capability 2 for something else
+        other_handshake = Handshake(
+            "mainnet", "0.0.34", "1.6.0", uint16(8444), uint8(1), [(uint16(1), "1"), (uint16(2), "1")]
+        )
+        assert not has_capability(other_handshake, Capability.ZSTD_COMPRESSION)
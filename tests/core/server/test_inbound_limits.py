@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+import pytest
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.inbound_limits import InboundMessageLimiter
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.loop_monitor import LoopLagMonitor
+
+peer_1 = bytes32([1] * 32)
+peer_2 = bytes32([2] * 32)
+
+
+class TestInboundLimits:
+    @pytest.mark.asyncio
+    async def test_concurrency_limits(self):
+        limiter = InboundMessageLimiter(
+            {"max_concurrent_messages": {"bulk": 2}, "max_concurrent_messages_per_peer": {"bulk": 1}}
+        )
+        running = []
+
+        async def handle(peer_id: bytes32, message_type: ProtocolMessageTypes) -> None:
+            async with limiter.limit(message_type, peer_id):
+                running.append(peer_id)
+                await asyncio.sleep(0.2)
+                running.remove(peer_id)
+
+        tasks = [
+            asyncio.create_task(handle(peer_1, ProtocolMessageTypes.request_blocks)),
+            asyncio.create_task(handle(peer_1, ProtocolMessageTypes.request_blocks)),
+            asyncio.create_task(handle(peer_2, ProtocolMessageTypes.request_block)),
+        ]
+        await asyncio.sleep(0.1)
+        assert sorted(running) == [peer_1, peer_2]
+
+        # other classes have their own limits
+        new_peak = asyncio.create_task(handle(peer_1, ProtocolMessageTypes.new_peak))
+        await asyncio.sleep(0.05)
+        assert running.count(peer_1) == 2
+        await asyncio.gather(*tasks, new_peak)
+
+    @pytest.mark.asyncio
+    async def test_queued_limit(self):
+        limiter = InboundMessageLimiter({"max_queued_messages_per_peer": {"bulk": 2}})
+        assert limiter.admit(ProtocolMessageTypes.request_blocks, bytes([1]), peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        assert not limiter.admit(ProtocolMessageTypes.request_blocks, bytes([2]), peer_1)
+        # other peers and classes have their own limits
+        assert limiter.admit(ProtocolMessageTypes.request_blocks, bytes([2]), peer_2)
+        assert limiter.admit(ProtocolMessageTypes.new_peak, b"", peer_1)
+
+        limiter.release(ProtocolMessageTypes.request_peers, b"", peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_blocks, bytes([2]), peer_1)
+        limiter.peer_disconnected(peer_1)
+        # releasing messages of a peer that's gone doesn't make room for more than the limit
+        limiter.release(ProtocolMessageTypes.request_blocks, bytes([2]), peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_blocks, bytes([1]), peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_blocks, bytes([2]), peer_1)
+        assert not limiter.admit(ProtocolMessageTypes.request_blocks, bytes([3]), peer_1)
+
+    @pytest.mark.asyncio
+    async def test_shedding(self):
+        monitor = LoopLagMonitor(logging.getLogger(__name__))
+        limiter = InboundMessageLimiter({"shed_requests_lag_seconds": 1}, monitor)
+        request = bytes([1] * 8)
+        assert limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_block, request, peer_1)
+
+        # nothing is shed while the monitor isn't running
+        monitor.samples.append(2)
+        assert limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        monitor.start()
+        assert not limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        assert not limiter.admit(ProtocolMessageTypes.request_mempool_transactions, b"", peer_1)
+        assert limiter.admit(ProtocolMessageTypes.new_peak, b"", peer_1)
+        # only repeated requests are dropped
+        assert not limiter.admit(ProtocolMessageTypes.request_block, request, peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_block, request, peer_2)
+        assert limiter.admit(ProtocolMessageTypes.request_block, bytes([2] * 8), peer_1)
+        limiter.release(ProtocolMessageTypes.request_block, request, peer_1)
+        assert limiter.admit(ProtocolMessageTypes.request_block, request, peer_1)
+
+        limiter.peer_disconnected(peer_1)
+        assert limiter.in_flight.get(peer_1) is None
+        monitor.samples.append(0)
+        assert limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        monitor.stop()
+
+    @pytest.mark.asyncio
+    async def test_shedding_disabled(self):
+        monitor = LoopLagMonitor(logging.getLogger(__name__))
+        limiter = InboundMessageLimiter({"shed_requests_lag_seconds": 0}, monitor)
+        monitor.start()
+        monitor.samples.append(10)
+        assert limiter.admit(ProtocolMessageTypes.request_peers, b"", peer_1)
+        monitor.stop()
@@ -0,0 +1,41 @@
+from chia.server.message_metrics import LATENCY_BUCKETS, MessageMetrics
+
+
+class TestMessageMetrics:
+    def test_metrics(self):
+        metrics = MessageMetrics()
+        metrics.message_received("request_block", 40)
+        metrics.call_started("request_block")
+        assert metrics.get_metrics()["request_block"]["in_flight"] == 1
+        metrics.call_finished("request_block", 0.003)
+        metrics.message_received("request_block", 40)
+        metrics.call_started("request_block")
+        metrics.call_finished("request_block", 100, True)
+        metrics.message_sent("respond_block", 1000)
+
+        request_block = metrics.get_metrics()["request_block"]
+        assert request_block["received"] == 2
+        assert request_block["in_flight"] == 0
+        assert request_block["errors"] == 1
+        assert request_block["bytes_in"] == 80
+        assert request_block["latency_sum"] == 100.003
+        assert request_block["latency_buckets"][1] == [0.005, 1]
+        assert request_block["latency_buckets"][-1] == ["+Inf", 1]
+        assert sum(count for _, count in request_block["latency_buckets"]) == 2
+        assert metrics.get_metrics()["respond_block"]["bytes_out"] == 1000
+
+    def test_prometheus(self):
+        metrics = MessageMetrics()
+        metrics.message_received("request_block", 40)
+        metrics.call_started("request_block")
+        metrics.call_finished("request_block", 0.003)
+        lines = metrics.to_prometheus("chia_full_node").splitlines()
+
+        assert 'chia_full_node_messages_received_total{message_type="request_block"} 1' in lines
+        assert 'chia_full_node_message_bytes_received_total{message_type="request_block"} 40' in lines
+        assert 'chia_full_node_message_handler_seconds_bucket{message_type="request_block",le="0.001"} 0' in lines
+        assert 'chia_full_node_message_handler_seconds_bucket{message_type="request_block",le="0.005"} 1' in lines
+        assert 'chia_full_node_message_handler_seconds_bucket{message_type="request_block",le="+Inf"} 1' in lines
+        assert 'chia_full_node_message_handler_seconds_count{message_type="request_block"} 1' in lines
+        assert "# TYPE chia_full_node_message_handler_seconds histogram" in lines
+        assert len([line for line in lines if "_bucket" in line]) == len(LATENCY_BUCKETS) + 1
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.outbound_message import Message, make_msg
+from chia.server.outbound_queue import MessagePriority, OutboundMessageQueue
+from chia.util.ints import uint8, uint16
+
+
+class TestOutboundQueue:
+    @pytest.mark.asyncio
+    async def test_priority(self):
+        queue = OutboundMessageQueue()
+        respond_blocks = make_msg(ProtocolMessageTypes.respond_blocks, bytes([1] * 100))
+        new_transaction = make_msg(ProtocolMessageTypes.new_transaction, bytes([2] * 40))
+        new_peak = make_msg(ProtocolMessageTypes.new_peak, bytes([3] * 40))
+        assert await queue.put(respond_blocks)
+        assert await queue.put(new_transaction, b"encoded")
+        assert await queue.put(new_peak)
+
+        assert await queue.get() == (new_peak, None)
+        assert await queue.get() == (new_transaction, b"encoded")
+        assert await queue.get() == (respond_blocks, None)
+        assert queue.qsize() == 0
+
+    @pytest.mark.asyncio
+    async def test_wallet_updates_in_order(self):
+        queue = OutboundMessageQueue()
+        coin_state_update = make_msg(ProtocolMessageTypes.coin_state_update, bytes([1] * 40))
+        new_peak_wallet = make_msg(ProtocolMessageTypes.new_peak_wallet, bytes([2] * 40))
+        assert await queue.put(coin_state_update)
+        assert await queue.put(new_peak_wallet)
+        assert await queue.get() == (coin_state_update, None)
+        assert await queue.get() == (new_peak_wallet, None)
+
+    @pytest.mark.asyncio
+    async def test_bounded(self):
+        queue = OutboundMessageQueue({p: 100 for p in MessagePriority})
+        new_transaction = make_msg(ProtocolMessageTypes.new_transaction, bytes([1] * 60))
+        # the first message is queued even if it's bigger than the limit
+        assert await queue.put(make_msg(ProtocolMessageTypes.new_transaction, bytes([1] * 200)))
+        assert not await queue.put(new_transaction)
+        assert queue.get_metrics()["normal"]["dropped_messages"] == 1
+
+        # responses wait for room instead
+        response = Message(new_transaction.type, uint16(1), new_transaction.data)
+        put_task = asyncio.create_task(queue.put(response))
+        await asyncio.sleep(0.1)
+        assert not put_task.done()
+        await queue.get()
+        assert await put_task
+        assert await queue.get() == (response, None)
+
+    @pytest.mark.asyncio
+    async def test_put_later(self):
+        queue = OutboundMessageQueue()
+        first = make_msg(ProtocolMessageTypes.new_transaction, bytes([1] * 40))
+        second = make_msg(ProtocolMessageTypes.new_transaction, bytes([2] * 40))
+        await queue.put(second)
+        await queue.put_later(first, None, 0.1)
+        assert queue.get_metrics()["normal"]["queued_bytes"] == 80
+        assert await queue.get() == (first, None)
+        assert await queue.get() == (second, None)
+        assert queue.get_metrics()["normal"]["queued_bytes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        queue = OutboundMessageQueue({p: 100 for p in MessagePriority})
+        await queue.put(make_msg(ProtocolMessageTypes.new_transaction, bytes([1] * 200)))
+        response = Message(uint8(ProtocolMessageTypes.respond_transaction.value), uint16(1), bytes([1] * 60))
+        put_task = asyncio.create_task(queue.put(response))
+        await asyncio.sleep(0.1)
+        await queue.close()
+        assert not await put_task
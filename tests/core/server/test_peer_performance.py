@@ -0,0 +1,121 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from chia.server.address_manager import AddressManager
+from chia.server.node_discovery import FullNodePeers
+from chia.server.peer_performance import MIN_SAMPLES, PeerPerformance, peer_to_rotate
+from chia.server.peer_store_resolver import PeerStoreResolver
+from chia.types.peer_info import PeerInfo, TimestampedPeerInfo
+from chia.util.ints import uint16, uint64
+
+
+@dataclass
+class FakeConnection:
+    creation_time: float = 0
+    performance: PeerPerformance = field(default_factory=PeerPerformance)
+    host: str = "250.7.1.1"
+    is_feeler: bool = False
+    closed: bool = False
+
+    def get_peer_info(self) -> PeerInfo:
+        return PeerInfo(self.host, uint16(8444))
+
+    def get_peer_logging(self) -> PeerInfo:
+        return self.get_peer_info()
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@dataclass
+class FakeServer:
+    connections: List[FakeConnection]
+
+    def get_full_node_outgoing_connections(self) -> List[FakeConnection]:
+        return self.connections
+
+
+def make_connection(rtt: float, creation_time: float = 0, host: str = "250.7.1.1") -> FakeConnection:
+    connection = FakeConnection(creation_time, host=host)
+    for _ in range(MIN_SAMPLES):
+        connection.performance.request_finished(rtt, 100)
+    return connection
+
+
+class TestPeerPerformance:
+    def test_cost(self):
+        performance = PeerPerformance()
+        for _ in range(MIN_SAMPLES - 1):
+            performance.request_finished(0.1, 100)
+        assert performance.cost() is None
+        performance.request_finished(0.1, 100)
+        assert performance.cost() == 0.1
+        assert performance.throughput is None
+
+        # 1 MiB/s
+        performance.request_finished(1.0, 1024 * 1024)
+        assert performance.throughput == 1024 * 1024
+        assert performance.cost() == performance.rtt + 1.0
+
+        slow_peaks = PeerPerformance()
+        for _ in range(MIN_SAMPLES):
+            slow_peaks.new_peak_seen(3.0)
+        assert slow_peaks.cost() == 3.0
+
+        timeouts = PeerPerformance()
+        for _ in range(MIN_SAMPLES):
+            timeouts.request_finished(60, None)
+        assert timeouts.rtt is None
+        assert timeouts.cost() > 5
+        assert timeouts.get_metrics()["samples"] == MIN_SAMPLES
+
+    def test_peer_to_rotate(self):
+        fast = [make_connection(0.1), make_connection(0.2), make_connection(0.15)]
+        assert peer_to_rotate(fast, 60, now=100) is None
+
+        slow = make_connection(2.0)
+        assert peer_to_rotate([*fast, slow], 60, now=100) is slow
+        # too few peers to compare, or too young to judge
+        assert peer_to_rotate([fast[0], slow], 60, now=100) is None
+        assert peer_to_rotate([*fast, make_connection(2.0, creation_time=90)], 60, now=100) is None
+        # peers that aren't scored yet are left alone
+        assert peer_to_rotate([*fast, FakeConnection()], 60, now=100) is None
+
+    @pytest.mark.asyncio
+    async def test_rotate_outbound_peer(self, tmp_path: Path):
+        connections = [make_connection(rtt, host=f"250.7.{i}.1") for i, rtt in enumerate([0.1, 0.2, 0.15, 2.0])]
+        resolver = PeerStoreResolver(
+            tmp_path,
+            {},
+            selected_network="mainnet",
+            peers_file_path_key="peers_file_path",
+            legacy_peer_db_path_key="peer_db_path",
+            default_peers_file_path="db/peers.dat",
+        )
+        peers = FullNodePeers(
+            FakeServer(connections), 10, 4, resolver, None, [], 30, "mainnet", None, logging.getLogger(__name__)
+        )
+        address_manager = AddressManager()
+        address_manager.make_private_subnets_valid()
+        peer = connections[3].get_peer_info()
+        now = int(time.time())
+        await address_manager.add_to_new_table([TimestampedPeerInfo(peer.host, peer.port, uint64(now))])
+        await address_manager.mark_good(peer, timestamp=now - 3600)
+        peers.address_manager = address_manager
+
+        assert await peers.rotate_outbound_peer() is connections[3]
+        assert connections[3].closed
+        # the connect loop won't try it again for a while
+        info, _ = address_manager.find_(peer)
+        assert info is not None and info.last_try >= now
+        assert not any(c.closed for c in connections[:3])
+
+        # nothing is rotated while outbound slots are free
+        peers.server = FakeServer(connections[:3] + [make_connection(5.0)])
+        peers.target_outbound_count = 8
+        assert await peers.rotate_outbound_peer() is None
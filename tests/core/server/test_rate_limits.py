@@ -254,3 +254,29 @@ class TestRateLimits:
 
         new_signatures_message = make_msg(ProtocolMessageTypes.respond_signatures, bytes([1]))
         assert not r.process_msg_and_check(new_signatures_message)
+
+    @pytest.mark.asyncio
+    async def test_smooth_refill(self):
+        r = RateLimiter(True, 5)
+        new_peak_message = make_msg(ProtocolMessageTypes.new_peak, bytes([1] * 40))
+        for i in range(200):
+            assert r.process_msg_and_check(new_peak_message)
+        assert not r.process_msg_and_check(new_peak_message)
+
+        # a tenth of the period refills a tenth of the limit, there's no burst at a period boundary
+        await asyncio.sleep(0.6)
+        passed = 0
+        for i in range(200):
+            if r.process_msg_and_check(new_peak_message):
+                passed += 1
+        assert 10 <= passed <= 30
+
+    @pytest.mark.asyncio
+    async def test_outgoing_tokens_not_taken(self):
+        r = RateLimiter(incoming=False)
+        large_message = make_msg(ProtocolMessageTypes.respond_peers, bytes([1] * 2 * 1024 * 1024))
+        small_message = make_msg(ProtocolMessageTypes.respond_peers, bytes([1]))
+        for i in range(20):
+            assert not r.process_msg_and_check(large_message)
+        for i in range(10):
+            assert r.process_msg_and_check(small_message)
@@ -321,3 +321,36 @@ async def test_merkle_set_random_regression():
             python_root = merkle_set.get_root()
             rust_root = bytes32(compute_merkle_set_root(values))
             assert rust_root == python_root
+
+
+@pytest.mark.asyncio
+async def test_merkle_set_from_already_hashed():
+    rng = random.Random()
+    rng.seed(654321)
+    edge_cases: List[List[bytes32]] = [
+        [],
+        [bytes32([0x80] + [0] * 31)],
+        [bytes32([0x80] + [0] * 31), bytes32([0x80] + [0] * 31)],
+        [bytes32([0x80] + [0] * 31), bytes32([0] * 31 + [1]), bytes32([0] * 31 + [2]), bytes32([0] * 31 + [3])],
+        [
+            bytes32([0x40] + [0] * 31),
+            bytes32([0xFF] * 32),
+            bytes32([0xFF] * 31 + [0xFE]),
+            bytes32([0xFF] * 31 + [0xFD]),
+        ],
+    ]
+    random_cases: List[List[bytes32]] = [[rand_hash(rng) for _ in range(rng.randint(2, 2000))] for _ in range(20)]
+    for values in edge_cases + random_cases:
+        merkle_set = MerkleSet()
+        for v in values:
+            merkle_set.add_already_hashed(v)
+        bulk_merkle_set = MerkleSet.from_already_hashed(reversed(values))
+
+        assert bulk_merkle_set.get_root() == merkle_set.get_root()
+        assert bulk_merkle_set.get_root() == bytes32(compute_merkle_set_root(values))
+        # the trees are the same, so are the proofs
+        for v in values[:100] + [rand_hash(rng)]:
+            assert bulk_merkle_set.is_included_already_hashed(v) == merkle_set.is_included_already_hashed(v)
+
+    with pytest.raises(AssertionError):
+        MerkleSet.from_already_hashed([bytes([0x80] + [0] * 30)])
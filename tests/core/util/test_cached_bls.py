@@ -1,7 +1,8 @@
-from blspy import AugSchemeMPL, G1Element
+from blspy import AugSchemeMPL, G1Element, G2Element
 from chia.util import cached_bls
 from chia.util.hash import std_hash
 from chia.util.lru_cache import LRUCache
+from chia.util.shared_pairing_cache import SharedPairingCache
 
 
 def test_cached_bls():
@@ -52,3 +53,75 @@ def test_cached_bls_repeat_pk():
     assert AugSchemeMPL.aggregate_verify([G1Element.from_bytes(pk) for pk in pks], msgs, agg_sig)
 
     assert cached_bls.aggregate_verify(pks, msgs, agg_sig, force_cache=True)
+
+
+def test_shared_pairing_cache():
+    n_keys = 10
+    seed = b"b" * 32
+    sks = [AugSchemeMPL.key_gen(seed + bytes([i])) for i in range(n_keys)]
+    pks = [bytes(sk.get_g1()) for sk in sks]
+    msgs = [("msg-%d" % (i,)).encode() for i in range(n_keys)]
+    agg_sig = AugSchemeMPL.aggregate([AugSchemeMPL.sign(sk, msg) for sk, msg in zip(sks, msgs)])
+
+    shared_cache = SharedPairingCache.create(100)
+    try:
+        attached_cache = SharedPairingCache.attach(shared_cache.name)
+        old_shared_cache = cached_bls.SHARED_CACHE
+        cached_bls.SHARED_CACHE = shared_cache
+        try:
+            # the pairings computed with one local cache are found by another one through the shared cache
+            assert cached_bls.aggregate_verify(pks, msgs, agg_sig, True, LRUCache(n_keys))
+            local_cache = LRUCache(n_keys)
+            assert cached_bls.get_pairings(local_cache, pks, msgs, False) != []
+            assert len(local_cache.cache) == n_keys
+        finally:
+            cached_bls.SHARED_CACHE = old_shared_cache
+
+        key = bytes(std_hash(pks[0] + msgs[0]))
+        pairing = attached_cache.get(key)
+        assert pairing is not None
+        assert pairing == local_cache.get(key)
+        assert attached_cache.get(bytes(std_hash(b"not cached"))) is None
+
+        # a slot being written concurrently doesn't match its checksum, and is treated as a cache miss
+        offset = attached_cache._offset(key)
+        attached_cache._shm.buf[offset + SharedPairingCache.SLOT_SIZE - 1] ^= 1
+        assert shared_cache.get(key) is None
+        attached_cache.close()
+    finally:
+        shared_cache.close()
+
+
+def test_batch_aggregate_verify():
+    n_keys = 6
+    seed = b"c" * 32
+    sks = [AugSchemeMPL.key_gen(seed + bytes([i])) for i in range(n_keys)]
+    pks = [bytes(sk.get_g1()) for sk in sks]
+    msgs = [("msg-%d" % (i,)).encode() for i in range(n_keys)]
+    sigs = [AugSchemeMPL.sign(sk, msg) for sk, msg in zip(sks, msgs)]
+
+    triples = [
+        (pks[0:2], msgs[0:2], AugSchemeMPL.aggregate(sigs[0:2])),
+        (pks[2:3], msgs[2:3], sigs[2]),
+        (pks[3:6], msgs[3:6], AugSchemeMPL.aggregate(sigs[3:6])),
+    ]
+    assert cached_bls.batch_aggregate_verify(triples, LRUCache(n_keys)) == [True, True, True]
+    assert cached_bls.batch_aggregate_verify([], LRUCache(n_keys)) == []
+    assert cached_bls.batch_aggregate_verify(triples[1:2], LRUCache(n_keys)) == [True]
+
+    # an invalid signature fails the batch, and is found by checking the signatures one by one
+    invalid = (pks[0:2], msgs[0:2], sigs[0])
+    assert cached_bls.batch_aggregate_verify([triples[1], invalid, triples[2]], LRUCache(n_keys)) == [
+        True,
+        False,
+        True,
+    ]
+
+    # two invalid signatures don't cancel out: their sum is valid, but not each of them
+    swapped = [(pks[0:1], msgs[0:1], sigs[1]), (pks[1:2], msgs[1:2], sigs[0])]
+    assert cached_bls.batch_aggregate_verify(swapped, LRUCache(n_keys)) == [False, False]
+
+    # without public keys, only the identity signature is valid
+    empty = ([], [], G2Element())
+    assert cached_bls.batch_aggregate_verify([empty, triples[0]], LRUCache(n_keys)) == [True, True]
+    assert cached_bls.batch_aggregate_verify([([], [], sigs[0])], LRUCache(n_keys)) == [False]
@@ -31,6 +31,7 @@ from chia.util.streamable import (
     parse_str,
     parse_tuple,
     parse_uint32,
+    recurse_jsonify,
     streamable,
     write_uint32,
 )
@@ -378,6 +379,16 @@ def test_recursive_json() -> None:
     assert TestClassRecursive2.from_json_dict(tc2.to_json_dict()) == tc2
 
 
+def test_generated_json_matches_recurse_jsonify() -> None:
+    tc1 = TestClassRecursive1([uint32(1), uint32(2)])
+    tc2 = TestClassRecursive2(uint32(5), [[tc1], None], bytes32(bytes([1] * 32)))
+    assert tc2.to_json_dict() == recurse_jsonify(tc2)
+
+    coin = Coin(bytes32([2] * 32), bytes32([3] * 32), uint64(4))
+    rr = RespondRemovals(uint32(1), bytes32([1] * 32), [(coin.name(), coin), (bytes32([5] * 32), None)], None)
+    assert rr.to_json_dict() == recurse_jsonify(rr)
+
+
 def test_recursive_types() -> None:
     coin: Optional[Coin] = None
     l1 = [(bytes32([2] * 32), coin)]
@@ -491,6 +502,56 @@ def test_ambiguous_deserialization_program() -> None:
         TestClassProgram.from_bytes(bytes(program) + b"9")
 
 
+@streamable
+@dataclass(frozen=True)
+class FixedSizeFieldsTestClass(Streamable):
+    a: uint8
+    b: bool
+    c: uint64
+    d: bytes32
+    e: List[uint32]
+    f: List[bytes32]
+    g: Optional[uint32]
+    h: List[Optional[uint64]]
+    i: str
+    j: uint32
+    k: Coin
+
+
+def test_generated_functions_fixed_size_fields() -> None:
+    coin = Coin(bytes32(b"1" * 32), bytes32(b"2" * 32), uint64(3))
+    a = FixedSizeFieldsTestClass(
+        uint8(1),
+        True,
+        uint64(uint64.MAXIMUM_EXCLUSIVE - 1),
+        bytes32(b"4" * 32),
+        [uint32(5), uint32(uint32.MAXIMUM_EXCLUSIVE - 1)],
+        [bytes32(b"6" * 32)],
+        uint32(7),
+        [None, uint64(8)],
+        "nine",
+        uint32(10),
+        coin,
+    )
+    f = io.BytesIO()
+    for item in fields(FixedSizeFieldsTestClass):
+        FixedSizeFieldsTestClass.function_to_stream_one_item(item.type)(getattr(a, item.name), f)
+    expected = f.getvalue()
+
+    assert bytes(a) == expected
+    assert FixedSizeFieldsTestClass.from_bytes(expected) == a
+
+    # the run of a, b, c and d is cut short
+    with pytest.raises(ValueError):
+        FixedSizeFieldsTestClass.from_bytes(expected[:20])
+    # the items of e are cut short
+    with pytest.raises(ValueError):
+        FixedSizeFieldsTestClass.from_bytes(expected[:50])
+    # the bool byte is invalid
+    with pytest.raises(ValueError):
+        FixedSizeFieldsTestClass.from_bytes(expected[:1] + bytes([2]) + expected[2:])
+
+
 def test_streamable_empty() -> None:
     @streamable
     @dataclass(frozen=True)
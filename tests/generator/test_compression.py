@@ -13,6 +13,7 @@ from chia.full_node.bundle_tools import (
 )
 from chia.full_node.generator import run_generator_unsafe, create_generator_args
 from chia.full_node.mempool_check_conditions import get_puzzle_and_solution_for_coin
+from chia.full_node.puzzle_solution_store import get_puzzle_solution_offsets
 from chia.types.blockchain_format.program import Program, SerializedProgram, INFINITE_COST
 from chia.types.generator_types import BlockGenerator, CompressorArg
 from chia.types.spend_bundle import SpendBundle
@@ -158,6 +159,22 @@ class TestCompression(TestCase):
         assert bytes(puzzle) == bytes(sb.coin_spends[0].puzzle_reveal)
         assert bytes(solution) == bytes(sb.coin_spends[0].solution)
 
+    def test_puzzle_solution_offsets(self):
+        sb: SpendBundle = make_spend_bundle(1)
+        start, end = match_standard_transaction_at_any_index(original_generator)
+        ca = CompressorArg(uint32(0), SerializedProgram.from_bytes(original_generator), start, end)
+        c = compressed_spend_bundle_solution(ca, sb)
+        s = simple_solution_generator(sb)
+        for generator in [c, s]:
+            offsets = get_puzzle_solution_offsets(generator, INFINITE_COST)
+            assert [o.coin_id for o in offsets] == [cs.coin.name() for cs in sb.coin_spends]
+            for o, coin_spend in zip(offsets, sb.coin_spends):
+                puzzle, solution = o.get_puzzle_and_solution(generator)
+                assert puzzle == coin_spend.puzzle_reveal
+                assert solution == coin_spend.solution
+        # the compressed generator takes the puzzle from the referenced generator
+        assert get_puzzle_solution_offsets(c, INFINITE_COST)[0].puzzle_source == 1
+
     def test_spend_byndle_coin_spend(self):
         for i in range(0, 10):
             sb: SpendBundle = make_spend_bundle(i)
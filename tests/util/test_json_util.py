@@ -0,0 +1,63 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pytest
+
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util import json_util
+from chia.util.ints import uint8, uint64, uint128
+from chia.util.json_util import dict_to_json_bytes, dict_to_json_str
+from chia.util.streamable import Streamable, streamable
+from chia.wallet.util.wallet_types import WalletType
+
+
+@streamable
+@dataclass(frozen=True)
+class Inner(Streamable):
+    amount: uint128
+    memo: bytes
+    coins: List[Coin]
+
+
+@streamable
+@dataclass(frozen=True)
+class Outer(Streamable):
+    version: uint8
+    inner: Inner
+    optional_inner: Optional[Inner]
+
+
+coin = Coin(bytes32([1] * 32), bytes32([2] * 32), uint64(2**64 - 1))
+small_inner = Inner(uint128(1000), b"\x00\xff", [coin, coin])
+large_inner = Inner(uint128(2**128 - 1), b"", [])
+
+objects = [
+    {"coin": coin, "height": 10, "hash": bytes32([3] * 32), "raw": b"\x01\x02"},
+    Outer(uint8(1), small_inner, None),
+    # uint128 values beyond 64 bits make orjson fall back to json
+    Outer(uint8(2), small_inner, large_inner),
+    {"wallets": [{"type": WalletType.STANDARD_WALLET}, {"type": WalletType.CAT}], "ids": {1: "a", 2: "b"}},
+    {"name": "café ✓", "nested": {"b": [1.5, True, None], "a": {"z": [], "y": {}}}},
+]
+
+
+@pytest.mark.parametrize("o", objects)
+def test_json_bytes_equivalent(o: object) -> None:
+    assert json.loads(dict_to_json_bytes(o)) == json.loads(dict_to_json_str(o))
+
+
+@pytest.mark.parametrize("o", objects)
+def test_json_bytes_without_orjson(monkeypatch: pytest.MonkeyPatch, o: object) -> None:
+    monkeypatch.setattr(json_util, "orjson", None)
+    assert dict_to_json_bytes(o) == dict_to_json_str(o).encode("utf-8")
+
+
+def test_json_bytes_not_finite() -> None:
+    o = {"values": [math.nan, math.inf, -math.inf]}
+    if json_util.orjson is not None:
+        assert json.loads(dict_to_json_bytes(o)) == {"values": [None, None, None]}
+    else:
+        assert dict_to_json_bytes(o) == b'{"values": [NaN, Infinity, -Infinity]}'
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from chia.util.loop_monitor import LoopLagMonitor
+
+
+def blocking_callback() -> None:
+    time.sleep(0.6)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = LoopLagMonitor(logging.getLogger(__name__), threshold=0.3)
+    monitor.start()
+    assert monitor.enabled
+    try:
+        await asyncio.sleep(0.3)
+        assert monitor.current_lag() < 0.3
+        with caplog.at_level(logging.WARNING):
+            blocking_callback()
+            # the sample for the stall isn't taken yet, but it's already overdue
+            assert monitor.current_lag() > 0.3
+            await asyncio.sleep(0.3)
+    finally:
+        monitor.stop()
+
+    assert monitor.current_lag() == 0
+    stats = monitor.get_stats()
+    assert not stats["enabled"]
+    assert stats["stalls"] == 1
+    assert stats["samples"] > 2
+    assert stats["max"] > 0.3
+    assert stats["p50"] < 0.3
+    assert "blocking_callback" in caplog.text
+    assert "Event loop was blocked" in caplog.text
+
+
+def test_no_samples() -> None:
+    stats = LoopLagMonitor(logging.getLogger(__name__)).get_stats()
+    assert stats["p50"] is None
+    assert stats["max"] == 0
@@ -0,0 +1,47 @@
+import dataclasses
+from itertools import islice
+
+import pytest
+
+from chia.consensus.block_record import BlockRecord
+from chia.types.full_block import FullBlock
+from chia.util.streamable_view import StreamableView
+from tests.util.test_full_block_utils import get_full_blocks
+
+
+def test_full_block_view() -> None:
+    # every combination of Optionals takes too long, a sample of them is enough
+    for block in islice(get_full_blocks(), 0, None, 97):
+        block_bytes = bytes(block)
+        view = StreamableView(FullBlock, block_bytes)
+
+        assert view.height == block.height
+        assert view.header_hash == block.header_hash
+        assert view.is_transaction_block() == block.is_transaction_block()
+        assert view.get_hash() == block.get_hash()
+        for field in dataclasses.fields(FullBlock):
+            assert getattr(view, field.name) == getattr(block, field.name)
+        assert b"".join(view.field_bytes(field.name) for field in dataclasses.fields(FullBlock)) == block_bytes
+        assert bytes(view) is block_bytes
+        assert view.get_object() == block
+        assert view.to_json_dict() == block.to_json_dict()
+
+        replaced = view.replace(transactions_generator=None)
+        assert bytes(replaced) == bytes(dataclasses.replace(block, transactions_generator=None))
+        assert replaced.foliage == block.foliage
+
+
+def test_view_errors() -> None:
+    block = next(get_full_blocks())
+    view = StreamableView(FullBlock, bytes(block)[:1000])
+    with pytest.raises(ValueError):
+        view.transactions_generator_ref_list
+
+    with pytest.raises(TypeError):
+        StreamableView(FullBlock, bytes(block)).replace(height=1)
+
+    with pytest.raises(AttributeError):
+        StreamableView(FullBlock, bytes(block)).unknown
+
+    with pytest.raises(KeyError):
+        StreamableView(BlockRecord, bytes(block)).field_bytes("foliage")